@@ -27,14 +27,18 @@
 # 20-Mar-2022  Wayne Shih              Create user's profile right after user has been created
 # 23-Mar-2022  Wayne Shih              Update user-related serializer and add UserProfileSerializerForUpdate
 # 29-May-2022  Wayne Shih              Fix style
+# 18-Oct-2026  Wayne Shih              Add ListSerializerWithCachedUsers to prefetch users by page
 # $HISTORY$
 # =================================================================================================
 
 
 from django.contrib.auth.models import User
+from django.db import models
 from rest_framework import exceptions, serializers
 
 from accounts.models import UserProfile
+from accounts.services import UserService
+from utils.caches.memcached_helpers import MemcachedHelper
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -60,6 +64,22 @@ class UserSerializerWithProfile(serializers.ModelSerializer):
         return None
 
 
+class ListSerializerWithCachedUsers(serializers.ListSerializer):
+    # <Wayne Shih> 18-Oct-2026
+    # Prefetch users referred by child.cached_user_field, e.g. 'from_user' for friendships,
+    # and their profiles for the whole page, instead of one cache round trip per row.
+    # - https://www.django-rest-framework.org/api-guide/serializers/#customizing-listserializer-behavior
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.Manager) else data)
+        users = MemcachedHelper.prefetch_objects_through_cache(
+            instances,
+            User,
+            self.child.cached_user_field,
+        )
+        UserService.prefetch_profiles_through_cache(users)
+        return super().to_representation(instances)
+
+
 class UserSerializerForTweet(UserSerializerWithProfile):
     pass
 
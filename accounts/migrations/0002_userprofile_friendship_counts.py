@@ -0,0 +1,40 @@
+# Generated by Django 3.1.3 on 2026-10-18 00:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_friendship_counts(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    Friendship = apps.get_model('friendships', 'Friendship')
+
+    for user_field, count_field in (
+        ('to_user_id', 'followers_count'),
+        ('from_user_id', 'followings_count'),
+    ):
+        counts = Friendship.objects.filter(**{f'{user_field}__isnull': False})\
+            .values(user_field).annotate(count=Count('id')).values_list(user_field, 'count')
+        for user_id, count in counts.iterator():
+            UserProfile.objects.filter(user_id=user_id).update(**{count_field: count})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('friendships', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.IntegerField(default=0, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='followings_count',
+            field=models.IntegerField(default=0, null=True),
+        ),
+        migrations.RunPython(backfill_friendship_counts, migrations.RunPython.noop),
+    ]
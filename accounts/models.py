@@ -15,6 +15,7 @@
 # 26-May-2022  Wayne Shih              Add Django signal-listener
 # 27-May-2022  Wayne Shih              React to memcached helper
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
+# 18-Oct-2026  Wayne Shih              Add followers_count and followings_count to UserProfile
 # $HISTORY$
 # =================================================================================================
 
@@ -33,6 +34,10 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True)
     nickname = models.CharField(null=True, max_length=100)
     avatar = models.FileField(null=True)
+    # <Wayne Shih> 18-Oct-2026
+    # Denormalized counts of friendships, which are updated by friendship listeners
+    followers_count = models.IntegerField(default=0, null=True)
+    followings_count = models.IntegerField(default=0, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
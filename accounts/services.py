@@ -9,6 +9,13 @@
 # 25-May-2022  Wayne Shih              Initial create
 # 27-May-2022  Wayne Shih              React to memcached helper
 # 29-May-2022  Wayne Shih              Fix style
+# 18-Oct-2026  Wayne Shih              Add get_profiles_through_cache()
+# 18-Oct-2026  Wayne Shih              Look up the request scoped identity map before memcached
+# 18-Oct-2026  Wayne Shih              Add prefetch_profiles_through_cache()
+# 18-Oct-2026  Wayne Shih              Track last activity of users
+# 18-Oct-2026  Wayne Shih              Look up the process wide LocalCache before memcached
+# 18-Oct-2026  Wayne Shih              Invalidate profiles by bumping versions of their keys
+# 18-Oct-2026  Wayne Shih              Create profiles lazily with their friendship counts
 # $HISTORY$
 # =================================================================================================
 
@@ -17,7 +24,14 @@ from django.conf import settings
 from django.core.cache import caches
 
 from accounts.models import UserProfile
-from twitter.caches import USER_PROFILE_PATTERN
+from friendships.models import Friendship
+from twitter.caches import USER_LAST_ACTIVITY_KEY, USER_PROFILE_PATTERN
+from utils.caches.identity_map import IdentityMap
+from utils.caches.local_cache import LocalCache
+from utils.caches.memcached_helpers import MemcachedHelper
+from utils.caches.redis_client import RedisClient
+from utils.caches.redis_helpers import RedisHelper
+from utils.time_helpers import datetime_to_timestamp_us, utc_now
 
 
 cache = caches['default'] if not settings.TESTING else caches['testing']
@@ -25,6 +39,16 @@ cache = caches['default'] if not settings.TESTING else caches['testing']
 
 class UserService(object):
 
+    @classmethod
+    def _get_or_create_profile(cls, user_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Profiles of previous users are created with the friendship counts they already have,
+        # which are counted once here and kept by the friendship listeners afterwards.
+        return UserProfile.objects.get_or_create(user_id=user_id, defaults={
+            'followers_count': Friendship.objects.filter(to_user_id=user_id).count(),
+            'followings_count': Friendship.objects.filter(from_user_id=user_id).count(),
+        })
+
     # <Wayne Shih> 27-May-2022
     # Keep this for profile cache specifically instead of using memcached helper
     # because profile key pattern is different than others as well as it needs
@@ -32,15 +56,125 @@ class UserService(object):
     @classmethod
     def get_profile_through_cache(cls, user_id):
         key = USER_PROFILE_PATTERN.format(user_id=user_id)
-        profile = cache.get(key)
+        profile = IdentityMap.get(key)
+        if profile is not None:
+            return profile
+
+        profile = LocalCache.get(key)
         if profile is not None:
+            IdentityMap.set(key, profile)
             return profile
 
-        profile, _ = UserProfile.objects.get_or_create(user_id=user_id)
-        cache.set(key, profile)
+        versioned_key = MemcachedHelper.get_versioned_key(key)
+        profile = cache.get(versioned_key)
+        if profile is not None:
+            LocalCache.set(key, profile)
+            IdentityMap.set(key, profile)
+            return profile
+
+        profile = UserProfile.objects.filter(user_id=user_id).first()
+        created = False
+        if profile is None:
+            profile, created = cls._get_or_create_profile(user_id)
+        if created:
+            # <Wayne Shih> 18-Oct-2026
+            # Creating the profile has bumped the version, see invalidate_profile_cache()
+            versioned_key = MemcachedHelper.get_versioned_key(key)
+        cache.set(versioned_key, profile)
+        LocalCache.set(key, profile)
+        IdentityMap.set(key, profile)
         return profile
 
+    @classmethod
+    def get_profiles_through_cache(cls, user_ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Batch version of get_profile_through_cache(), which returns {user_id: profile} by one
+        # memcached get_many() and one db query for the cache misses.
+        keys = {
+            user_id: USER_PROFILE_PATTERN.format(user_id=user_id)
+            for user_id in user_ids
+        }
+        cached_profiles = IdentityMap.get_many(keys.values())
+        uncached_keys = [key for key in keys.values() if key not in cached_profiles]
+        if uncached_keys:
+            local_profiles = LocalCache.get_many(uncached_keys)
+            IdentityMap.set_many(local_profiles)
+            cached_profiles.update(local_profiles)
+            uncached_keys = [key for key in uncached_keys if key not in local_profiles]
+        if uncached_keys:
+            versioned_keys = MemcachedHelper.get_versioned_keys(uncached_keys)
+            versioned_profiles = cache.get_many(versioned_keys.values())
+            memcached_profiles = {
+                key: versioned_profiles[versioned_key]
+                for key, versioned_key in versioned_keys.items()
+                if versioned_key in versioned_profiles
+            }
+            LocalCache.set_many(memcached_profiles)
+            IdentityMap.set_many(memcached_profiles)
+            cached_profiles.update(memcached_profiles)
+        profiles = {
+            user_id: cached_profiles[key]
+            for user_id, key in keys.items()
+            if key in cached_profiles
+        }
+        missing_ids = [user_id for user_id in keys if user_id not in profiles]
+        if not missing_ids:
+            return profiles
+
+        for profile in UserProfile.objects.filter(user_id__in=missing_ids):
+            profiles[profile.user_id] = profile
+        # <Wayne Shih> 18-Oct-2026
+        # Lazy creation of profiles for previous users, same as get_profile_through_cache()
+        created_keys = []
+        for user_id in missing_ids:
+            if user_id not in profiles:
+                profiles[user_id], created = cls._get_or_create_profile(user_id)
+                if created:
+                    created_keys.append(keys[user_id])
+        if created_keys:
+            versioned_keys.update(MemcachedHelper.get_versioned_keys(created_keys))
+        missing_profiles = {keys[user_id]: profiles[user_id] for user_id in missing_ids}
+        cache.set_many({
+            versioned_keys[key]: profile
+            for key, profile in missing_profiles.items()
+        })
+        LocalCache.set_many(missing_profiles)
+        IdentityMap.set_many(missing_profiles)
+        return profiles
+
+    @classmethod
+    def prefetch_profiles_through_cache(cls, users):
+        # <Wayne Shih> 18-Oct-2026
+        # Attach profiles to a page of users so that user.profile hits no cache at all,
+        # see get_profile() in accounts/models.py
+        profiles = cls.get_profiles_through_cache([user.id for user in users])
+        for user in users:
+            setattr(user, '_cached_user_profile', profiles[user.id])
+
     @classmethod
     def invalidate_profile_cache(cls, user_id):
         key = USER_PROFILE_PATTERN.format(user_id=user_id)
-        cache.delete(key)
+        MemcachedHelper.bump_version(key)
+        LocalCache.invalidate(key)
+        IdentityMap.delete(key)
+
+    # <Wayne Shih> 18-Oct-2026
+    # Last activity of users is kept in a redis sorted set scored by time in microseconds,
+    # which costs one ZADD per request, see LastActivityMiddleware.
+    @classmethod
+    def touch_last_activity(cls, user_id):
+        conn = RedisClient.get_connection()
+        conn.zadd(USER_LAST_ACTIVITY_KEY, {user_id: datetime_to_timestamp_us(utc_now())})
+
+    @classmethod
+    def get_dormant_user_ids(cls, user_ids, active_since):
+        # <Wayne Shih> 18-Oct-2026
+        # Users without any activity recorded, e.g. not seen since it started to be tracked, are
+        # regarded as active.
+        timestamp_us = datetime_to_timestamp_us(active_since)
+        scores = RedisHelper.get_scores_in_sorted_set(USER_LAST_ACTIVITY_KEY, user_ids)
+        return {
+            user_id
+            for user_id, score in scores.items()
+            if score is not None and score < timestamp_us
+        }
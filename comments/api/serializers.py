@@ -20,27 +20,47 @@
 # 17-Mar-2022  Wayne Shih              Add CommentSerializerForNotifications
 # 26-May-2022  Wayne Shih              Fetch user from cache
 # 11-Jun-2022  Wayne Shih              Fetch likes_count from cache
+# 18-Oct-2026  Wayne Shih              Prefetch users by page
+# 18-Oct-2026  Wayne Shih              Load likes_count and has_liked by page
 # $HISTORY$
 # =================================================================================================
 
 
+from django.db import models
 from rest_framework import serializers
 
-from accounts.api.serializers import UserSerializerForComment
+from accounts.api.serializers import ListSerializerWithCachedUsers, UserSerializerForComment
+from comments.loaders import CommentLoader
 from comments.models import Comment
-from likes.services import LikeService
 from tweets.models import Tweet
-from utils.caches.redis_helpers import RedisHelper
+
+
+def get_comment_loader(context):
+    # <Wayne Shih> 18-Oct-2026
+    # One loader per serializer context, i.e. per request.
+    if 'comment_loader' not in context:
+        context['comment_loader'] = CommentLoader(context['request'].user)
+    return context['comment_loader']
 
 
 class DefaultCommentSerializer(serializers.Serializer):
     pass
 
 
+class CommentListSerializer(ListSerializerWithCachedUsers):
+    # <Wayne Shih> 18-Oct-2026
+    # Load likes_count and has_liked for the whole page before serializing comments one by one
+    def to_representation(self, data):
+        comments = list(data.all() if isinstance(data, models.Manager) else data)
+        get_comment_loader(self.context).load(comments)
+        return super().to_representation(comments)
+
+
 class CommentSerializer(serializers.ModelSerializer):
     user = UserSerializerForComment(source='cached_user')
     likes_count = serializers.SerializerMethodField()
     has_liked = serializers.SerializerMethodField()
+    cached_user_field = 'user'
 
     class Meta:
         model = Comment
@@ -53,12 +73,13 @@ class CommentSerializer(serializers.ModelSerializer):
             'likes_count',
             'has_liked',
         )
+        list_serializer_class = CommentListSerializer
 
     def get_likes_count(self, obj):
-        return RedisHelper.get_count(obj, 'likes_count')
+        return get_comment_loader(self.context).get_likes_count(obj)
 
     def get_has_liked(self, obj):
-        return LikeService.get_has_liked(self.context['request'].user, obj)
+        return get_comment_loader(self.context).get_has_liked(obj)
 
 
 class CommentSerializerForCreate(serializers.ModelSerializer):
@@ -19,10 +19,13 @@
 # 29-Apr-2022  Wayne Shih              React to deprecating key in newsfeeds list api
 # 26-May-2022  Wayne Shih              Add clear cache before each test
 # 09-Jun-2022  Wayne Shih              Test cached comments_count
+# 18-Oct-2026  Wayne Shih              Add test for loading comment fields by page
 # $HISTORY$
 # =================================================================================================
 
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -441,3 +444,31 @@ class CommentApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(self.tweet.comments_count, 4)
         self.assertEqual(response.data['results'][0]['tweet']['comments_count'], 4)
+
+    def test_list_api_loads_fields_by_page(self):
+        comments = [self.create_comment(self.lbj23, self.tweet) for _ in range(3)]
+        self.create_like(self.kd35, comments[1])
+        self.create_like(self.lbj23, comments[1])
+        self.create_like(self.lbj23, comments[2])
+
+        response = self.kd35_client.get(COMMENT_URL, {'tweet_id': self.tweet.id})
+        results = response.data['comments']
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([comment['has_liked'] for comment in results], [False, True, False])
+        self.assertEqual([comment['likes_count'] for comment in results], [0, 2, 1])
+        response = self.kd35_client.get(TWEET_DETAIL_URL.format(self.tweet.id))
+        results = response.data['comments']
+        self.assertEqual([comment['has_liked'] for comment in results], [False, True, False])
+
+        # <Wayne Shih> 18-Oct-2026
+        # Number of db queries does not grow with the number of comments
+        with CaptureQueriesContext(connection) as three_comments_queries:
+            self.kd35_client.get(TWEET_DETAIL_URL.format(self.tweet.id))
+        comments[1].delete()
+        comments[2].delete()
+        with CaptureQueriesContext(connection) as one_comment_queries:
+            self.kd35_client.get(TWEET_DETAIL_URL.format(self.tweet.id))
+        self.assertEqual(
+            len(three_comments_queries.captured_queries),
+            len(one_comment_queries.captured_queries),
+        )
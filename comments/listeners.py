@@ -8,10 +8,14 @@
 #    Date      Name                    Description of Change
 # 05-Jun-2022  Wayne Shih              Initial create
 # 09-Jun-2022  Wayne Shih              Cache reacts to comments_count change
+# 18-Oct-2026  Wayne Shih              Update comments_count cache without fetching tweet
+# 18-Oct-2026  Wayne Shih              Add write-behind mode of comments_count
 # $HISTORY$
 # =================================================================================================
 
 
+from django.conf import settings
+
 from utils.caches.redis_helpers import RedisHelper
 
 
@@ -24,17 +28,30 @@ def increase_comments_count(sender, instance, created, **kwargs):
     if not created:
         return
 
+    # <Wayne Shih> 18-Oct-2026
+    # No row lock on hot tweets in write-behind mode, see RedisHelper.add_count_delta()
+    if settings.COUNTS_WRITE_BEHIND:
+        RedisHelper.add_count_delta(Tweet(id=instance.tweet_id), 'comments_count', 1)
+        return
+
     # <Wayne Shih> 05-Jun-2022
     # https://docs.djangoproject.com/en/4.0/ref/models/expressions/#f-expressions
     Tweet.objects.filter(id=instance.tweet_id).update(comments_count=F('comments_count') + 1)
-    RedisHelper.incr_count(instance.tweet, 'comments_count')
+    # <Wayne Shih> 18-Oct-2026
+    # Counts are cached by model and id only, so there is no need to fetch the tweet from db.
+    # It costs one atomic redis round trip unless the count is not cached.
+    RedisHelper.incr_count(Tweet(id=instance.tweet_id), 'comments_count')
 
 
 def decrease_comments_count(sender, instance, **kwargs):
     from django.db.models import F
     from tweets.models import Tweet
 
+    if settings.COUNTS_WRITE_BEHIND:
+        RedisHelper.add_count_delta(Tweet(id=instance.tweet_id), 'comments_count', -1)
+        return
+
     # <Wayne Shih> 05-Jun-2022
     # https://docs.djangoproject.com/en/4.0/ref/models/expressions/#f-expressions
     Tweet.objects.filter(id=instance.tweet_id).update(comments_count=F('comments_count') - 1)
-    RedisHelper.decr_count(instance.tweet, 'comments_count')
+    RedisHelper.decr_count(Tweet(id=instance.tweet_id), 'comments_count')
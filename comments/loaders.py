@@ -0,0 +1,51 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#   Request scoped data loader for comment serializers, see tweets/loaders.py
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+from django.contrib.auth.models import User
+
+from comments.models import Comment
+from likes.services import LikeService
+from utils.caches.redis_helpers import RedisHelper
+
+
+class CommentLoader(object):
+
+    def __init__(self, user: User):
+        # <Wayne Shih> 18-Oct-2026
+        # user is the one who sends the request, which is for has_liked
+        self.user = user
+        self.loaded_comment_ids = set()
+        self.likes_counts = {}
+        self.liked_comment_ids = set()
+
+    def load(self, comments):
+        # <Wayne Shih> 18-Oct-2026
+        # Users are prefetched by ListSerializerWithCachedUsers
+        comments = [comment for comment in comments if comment.id not in self.loaded_comment_ids]
+        if not comments:
+            return
+
+        comment_ids = [comment.id for comment in comments]
+        self.likes_counts.update(RedisHelper.get_counts(comments, 'likes_count'))
+        self.liked_comment_ids.update(
+            LikeService.get_liked_object_ids(self.user, Comment, comment_ids)
+        )
+        self.loaded_comment_ids.update(comment_ids)
+
+    def get_likes_count(self, comment: Comment):
+        self.load([comment])
+        return self.likes_counts[comment.id]
+
+    def get_has_liked(self, comment: Comment):
+        self.load([comment])
+        return comment.id in self.liked_comment_ids
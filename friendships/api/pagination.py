@@ -10,13 +10,17 @@
 #    Date      Name                    Description of Change
 # 02-Apr-2021  Wayne Shih              Initial create
 # 03-Apr-2022  Wayne Shih              React to deprecating keys in friendships apis
+# 18-Oct-2026  Wayne Shih              Add FriendshipCursorPagination
 # $HISTORY$
 # =================================================================================================
 
 
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
 from rest_framework.response import Response
 
+from utils.pagination import EndlessPagination
+
 
 class FriendshipPagination(PageNumberPagination):
     page_size = 10
@@ -26,7 +30,9 @@ class FriendshipPagination(PageNumberPagination):
     # <Wayne Shih> 02-Apr-2022
     # https://www.django-rest-framework.org/api-guide/pagination/#modifying-the-pagination-style
     # https://www.django-rest-framework.org/api-guide/pagination/#custom-pagination-styles
-    def get_paginated_response(self, data):
+    def get_paginated_response(self, data, get_count=None):
+        # <Wayne Shih> 18-Oct-2026
+        # get_count is not used, since page numbers need the COUNT(*) by paginator anyway
         return Response({
             'count': self.page.paginator.count,
             'num_pages': self.page.paginator.num_pages,
@@ -37,3 +43,28 @@ class FriendshipPagination(PageNumberPagination):
             'next': self.get_next_link(),
             'results': data,
         })
+
+
+class FriendshipCursorPagination(EndlessPagination):
+    # <Wayne Shih> 18-Oct-2026
+    # Keyset pagination on (created_at, id), which is served by the (to_user_id, created_at) and
+    # (from_user_id, created_at) indexes without OFFSET, since a secondary index of InnoDB also
+    # contains the primary key. The next page is requested by cursor__lt in the next link.
+    # - https://use-the-index-luke.com/no-offset
+    page_size = FriendshipPagination.page_size
+    max_page_size = FriendshipPagination.max_page_size
+
+    def _set_up_attrs(self, request: Request):
+        super()._set_up_attrs(request)
+        # <Wayne Shih> 18-Oct-2026
+        # Friendships are only paged to older ones. Ignore cursor__gt, which would return all
+        # newer friendships in one page.
+        self.cursor__gt = None
+
+    def get_paginated_response(self, data, get_count=None):
+        return Response({
+            'count': get_count() if get_count is not None else None,
+            'has_next': self.has_next,
+            'next': self._get_next_link(data),
+            'results': data,
+        })
@@ -19,65 +19,85 @@
 # 03-Apr-2022  Wayne Shih              Add has_followed to Follower and Following Serializers
 # 30-Apr-2022  Wayne Shih              Resolve N + 1 query problem by cache
 # 26-May-2022  Wayne Shih              Fetch user from cache
+# 18-Oct-2026  Wayne Shih              Prefetch users by page, has_followed by user ids
+# 18-Oct-2026  Wayne Shih              Check has_followed of a page in one batch
 # $HISTORY$
 # =================================================================================================
 
 
+from django.db import models
 from rest_framework import serializers
 
-from accounts.api.serializers import UserSerializerForFriendship
+from accounts.api.serializers import ListSerializerWithCachedUsers, UserSerializerForFriendship
 from friendships.models import Friendship
 from friendships.services import FriendshipService
 
 
-class FollowingUserIdSetMixin:
-    @property
-    def following_user_id_set(self: serializers.ModelSerializer):
+class HasFollowedMixin:
+    def has_followed_user(self: serializers.ModelSerializer, user_id):
         if self.context['request'].user.is_anonymous:
-            return {}
-        if hasattr(self, '_cached_following_user_id_set'):
-            return self._cached_following_user_id_set
-        following_user_id_set = FriendshipService.get_following_user_id_set(
-            from_user_id=self.context['request'].user.id,
-        )
-        setattr(self, '_cached_following_user_id_set', following_user_id_set)
-        return following_user_id_set
+            return False
+        followed_user_ids = self.context.get('followed_user_ids')
+        if followed_user_ids is None:
+            # <Wayne Shih> 18-Oct-2026
+            # Not serialized by page, e.g. the follow api
+            followed_user_ids = FriendshipService.get_followed_user_ids(
+                from_user_id=self.context['request'].user.id,
+                user_ids=[user_id],
+            )
+        return user_id in followed_user_ids
+
+
+class FriendshipListSerializer(ListSerializerWithCachedUsers):
+    # <Wayne Shih> 18-Oct-2026
+    # has_followed of the whole page is checked by one batch membership check on the cached
+    # followings of request user, see FriendshipService.get_followed_user_ids()
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.Manager) else data)
+        user = self.context['request'].user
+        if not user.is_anonymous:
+            user_id_field = f'{self.child.cached_user_field}_id'
+            self.context['followed_user_ids'] = FriendshipService.get_followed_user_ids(
+                from_user_id=user.id,
+                user_ids=[getattr(instance, user_id_field) for instance in instances],
+            )
+        return super().to_representation(instances)
 
 
 class DefaultFriendshipSerializer(serializers.Serializer):
     pass
 
 
-class FollowerSerializer(serializers.ModelSerializer, FollowingUserIdSetMixin):
+class FollowerSerializer(serializers.ModelSerializer, HasFollowedMixin):
     from_user = UserSerializerForFriendship(source='cached_from_user')
     # user = UserSerializerForFriendship(source='from_user')
     has_followed = serializers.SerializerMethodField()
+    cached_user_field = 'from_user'
 
     class Meta:
         model = Friendship
         fields = ('from_user', 'created_at', 'has_followed')
         # fields = ('user', 'created_at',)
+        list_serializer_class = FriendshipListSerializer
 
     def get_has_followed(self, obj):
-        if self.context['request'].user.is_anonymous:
-            return False
-        return obj.from_user.id in self.following_user_id_set
+        return self.has_followed_user(obj.from_user_id)
 
 
-class FollowingSerializer(serializers.ModelSerializer, FollowingUserIdSetMixin):
+class FollowingSerializer(serializers.ModelSerializer, HasFollowedMixin):
     # to_user = UserSerializerForFriendship()
     user = UserSerializerForFriendship(source='cached_to_user')
     has_followed = serializers.SerializerMethodField()
+    cached_user_field = 'to_user'
 
     class Meta:
         model = Friendship
         # fields = ('to_user', 'created_at',)
         fields = ('user', 'created_at', 'has_followed')
+        list_serializer_class = FriendshipListSerializer
 
     def get_has_followed(self, obj):
-        if self.context['request'].user.is_anonymous:
-            return False
-        return obj.to_user.id in self.following_user_id_set
+        return self.has_followed_user(obj.to_user_id)
 
 
 class FriendshipSerializerForCreate(serializers.ModelSerializer):
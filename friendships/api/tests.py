@@ -16,16 +16,20 @@
 # 03-Apr-2022  Wayne Shih              Add tests for followers & followings pagination, react to adding has_followed
 # 03-Apr-2022  Wayne Shih              React to deprecating keys in friendships apis
 # 30-Apr-2022  Wayne Shih              React to adding cache
+# 18-Oct-2026  Wayne Shih              Add tests for friendships cursor pagination
 # $HISTORY$
 # =================================================================================================
 
 
 from math import ceil
 
+from django.test import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from friendships.api.pagination import FriendshipPagination
+from friendships.api.pagination import FriendshipCursorPagination, FriendshipPagination
 from friendships.models import Friendship
 from testing.testcases import TestCase
 
@@ -205,6 +209,7 @@ class FriendshipApiTests(TestCase):
         self.assertEqual(response.data['num_deleted'], 0)
         self.assertEqual(Friendship.objects.count(), count)
 
+    @override_settings(FRIENDSHIP_PAGE_NUMBER_PAGINATION=True)
     def test_friendships_pagination(self):
         page_size = FriendshipPagination.page_size
         max_page_size = FriendshipPagination.max_page_size
@@ -298,6 +303,7 @@ class FriendshipApiTests(TestCase):
         self.assertEqual(response.data['num_pages'], ceil(num_followers / customized_page_size))
         self.assertEqual(response.data['page_number'], 2)
 
+    @override_settings(FRIENDSHIP_PAGE_NUMBER_PAGINATION=True)
     def test_followers_pagination(self):
         page_size = FriendshipPagination.page_size
         url = FOLLOWERS_URL.format(self.kb24.id)
@@ -338,6 +344,7 @@ class FriendshipApiTests(TestCase):
         self.assertEqual(response.data['has_previous'], True)
         self.assertEqual(response.data['has_next'], False)
 
+    @override_settings(FRIENDSHIP_PAGE_NUMBER_PAGINATION=True)
     def test_followings_pagination(self):
         page_size = FriendshipPagination.page_size
         url = FOLLOWINGS_URL.format(self.kd35.id)
@@ -391,3 +398,60 @@ class FriendshipApiTests(TestCase):
         self.assertEqual(len(response.data['results']), page_size)
         self.assertEqual(response.data['num_pages'], ceil(num_followings / page_size))
         self.assertEqual(response.data['page_number'], 2)
+
+    def test_friendships_cursor_pagination(self):
+        page_size = FriendshipCursorPagination.page_size
+        url = FOLLOWERS_URL.format(self.kb24.id)
+        num_followers = page_size * 2 + 1
+        for i in range(num_followers):
+            follower = self.create_user(username=f'kb24_follower{i}')
+            Friendship.objects.create(from_user=follower, to_user=self.kb24)
+        # <Wayne Shih> 18-Oct-2026
+        # Followers created in the same microsecond are ordered by id
+        created_at = Friendship.objects.filter(to_user=self.kb24).first().created_at
+        Friendship.objects.filter(to_user=self.kb24).update(created_at=created_at)
+        friendships = list(Friendship.objects.filter(to_user=self.kb24).order_by('-id'))
+
+        # test FOLLOWERS_URL - no COUNT(*) and OFFSET  <Wayne Shih> 18-Oct-2026
+        with CaptureQueriesContext(connection) as captured:
+            response = self.anonymous_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in captured.captured_queries:
+            self.assertEqual('COUNT(' in query['sql'], False)
+            self.assertEqual('OFFSET' in query['sql'], False)
+        self.assertEqual(response.data['count'], num_followers)
+        self.assertEqual(response.data['has_next'], True)
+        self.assertEqual('page_number' in response.data, False)
+        self.assertEqual(
+            [result['from_user']['id'] for result in response.data['results']],
+            [friendship.from_user_id for friendship in friendships[:page_size]],
+        )
+
+        # test FOLLOWERS_URL - follow the next links  <Wayne Shih> 18-Oct-2026
+        from_user_ids = [result['from_user']['id'] for result in response.data['results']]
+        while response.data['has_next']:
+            response = self.anonymous_client.get(response.data['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], num_followers)
+            from_user_ids += [result['from_user']['id'] for result in response.data['results']]
+        self.assertEqual(response.data['next'], None)
+        self.assertEqual(
+            from_user_ids,
+            [friendship.from_user_id for friendship in friendships],
+        )
+
+        # test FOLLOWINGS_URL - count is updated by follow and unfollow  <Wayne Shih> 18-Oct-2026
+        url = FOLLOWINGS_URL.format(self.lbj23.id)
+        response = self.anonymous_client.get(url)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['has_next'], False)
+        self.assertEqual(response.data['next'], None)
+        self.lbj23_client.post(FOLLOW_URL.format(self.kb24.id))
+        response = self.anonymous_client.get(url)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(response.data['results'][0]['user']['id'], self.kb24.id)
+        self.lbj23_client.post(UNFOLLOW_URL.format(self.kb24.id))
+        response = self.anonymous_client.get(url)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 3)
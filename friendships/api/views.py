@@ -16,10 +16,12 @@
 # 03-Apr-2022  Wayne Shih              React to adding has_followed
 # 03-Apr-2022  Wayne Shih              Deprecate keys in friendships apis, fix typo
 # 18-Jun-2022  Wayne Shih              Add ratelimit
+# 18-Oct-2026  Wayne Shih              Paginate followers and followings by keyset unless page number flag
 # $HISTORY$
 # =================================================================================================
 
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils.decorators import method_decorator
 from ratelimit.decorators import ratelimit
@@ -29,7 +31,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from friendships.api.pagination import FriendshipPagination
+from friendships.api.pagination import FriendshipCursorPagination, FriendshipPagination
 from friendships.api.serializers import (
     DefaultFriendshipSerializer,
     FollowerSerializer,
@@ -37,12 +39,23 @@ from friendships.api.serializers import (
     FriendshipSerializerForCreate,
 )
 from friendships.models import Friendship
+from friendships.services import FriendshipService
 
 
 class FriendshipViewSet(viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = DefaultFriendshipSerializer
-    pagination_class = FriendshipPagination
+
+    @property
+    def pagination_class(self):
+        if settings.FRIENDSHIP_PAGE_NUMBER_PAGINATION:
+            return FriendshipPagination
+        return FriendshipCursorPagination
+
+    def get_paginated_response(self, data, get_count=None):
+        # <Wayne Shih> 18-Oct-2026
+        # get_count returns the count from cached counters instead of COUNT(*)
+        return self.paginator.get_paginated_response(data, get_count=get_count)
 
     def list(self, request):
         return Response({
@@ -70,21 +83,28 @@ class FriendshipViewSet(viewsets.GenericViewSet):
     @method_decorator(ratelimit(key='user_or_ip', rate='3/s', method='GET', block=True))
     def followers(self, request, pk):
         to_user = self.get_object()
-        followers = Friendship.objects.filter(to_user_id=to_user.id).order_by('-created_at')
+        followers = Friendship.objects.filter(to_user_id=to_user.id).order_by('-created_at', '-id')
         # <Wayne Shih> 02-Apr-2022
         # https://www.django-rest-framework.org/api-guide/viewsets/#marking-extra-actions-for-routing
         page = self.paginate_queryset(followers)
         serializer = FollowerSerializer(page, many=True, context={'request': request})
-        return self.get_paginated_response(serializer.data)
+        return self.get_paginated_response(
+            serializer.data,
+            get_count=lambda: FriendshipService.get_follower_count(to_user.id),
+        )
 
     @action(methods=['GET'], detail=True, permission_classes=[AllowAny])
     @method_decorator(ratelimit(key='user_or_ip', rate='3/s', method='GET', block=True))
     def followings(self, request, pk):
         from_user = self.get_object()
-        followings = Friendship.objects.filter(from_user_id=from_user.id).order_by('-created_at')
+        followings = Friendship.objects.filter(from_user_id=from_user.id)\
+            .order_by('-created_at', '-id')
         page = self.paginate_queryset(followings)
         serializer = FollowingSerializer(page, many=True, context={'request': request})
-        return self.get_paginated_response(serializer.data)
+        return self.get_paginated_response(
+            serializer.data,
+            get_count=lambda: FriendshipService.get_following_count(from_user.id),
+        )
 
     @action(methods=['POST'], detail=True, permission_classes=[IsAuthenticated])
     @method_decorator(ratelimit(key='user_or_ip', rate='5/s', method='POST', block=True))
@@ -7,12 +7,90 @@
 # =================================================================================================
 #    Date      Name                    Description of Change
 # 30-Apr-2022  Wayne Shih              Initial create
+# 18-Oct-2026  Wayne Shih              Add listeners to update followers_count and followings_count
+# 18-Oct-2026  Wayne Shih              Update cached followers and followings incrementally
+# 18-Oct-2026  Wayne Shih              Backfill and purge newsfeeds on follow and unfollow
+# 18-Oct-2026  Wayne Shih              Create profiles before a friendship is saved
 # $HISTORY$
 # =================================================================================================
 
 
 # <Wayne Shih> 30-Apr-2022
 # https://docs.djangoproject.com/en/3.1/topics/signals/#receiver-functions
-def invalidate_followings_cache(sender, instance, **kwargs):
+def add_friendship_to_cache(sender, instance, created, **kwargs):
     from friendships.services import FriendshipService
-    FriendshipService.invalidate_followings_cache(instance.from_user_id)
+
+    # <Wayne Shih> 18-Oct-2026
+    # Cached followers and followings are updated incrementally instead of being invalidated
+    if not created:
+        return
+    FriendshipService.add_friendship_to_cache(instance)
+
+
+def remove_friendship_from_cache(sender, instance, **kwargs):
+    from friendships.services import FriendshipService
+    FriendshipService.remove_friendship_from_cache(instance)
+
+
+def create_profiles_before_follow(sender, instance, **kwargs):
+    from accounts.services import UserService
+
+    # <Wayne Shih> 18-Oct-2026
+    # Profiles lazily created for previous users count their friendships in db, so create them
+    # before a new friendship is saved. OW, the new one would be counted twice, once by the
+    # lazy creation and once by increase_friendship_counts().
+    if not instance._state.adding:
+        return
+    for user_id in (instance.to_user_id, instance.from_user_id):
+        if user_id is not None:
+            UserService.get_profile_through_cache(user_id)
+
+
+def _update_friendship_counts(instance, amount):
+    from django.db.models import F
+    from accounts.models import UserProfile
+    from accounts.services import UserService
+    from utils.caches.redis_helpers import RedisHelper
+
+    for user_id, attr in (
+        (instance.to_user_id, 'followers_count'),
+        (instance.from_user_id, 'followings_count'),
+    ):
+        # <Wayne Shih> 18-Oct-2026
+        # User might have been deleted, see on_delete=models.SET_NULL
+        if user_id is None:
+            continue
+        # <Wayne Shih> 18-Oct-2026
+        # Counts are kept in profiles, which are lazily created for previous users
+        profile = UserService.get_profile_through_cache(user_id)
+        UserProfile.objects.filter(id=profile.id).update(**{attr: F(attr) + amount})
+        if amount > 0:
+            RedisHelper.incr_count(profile, attr)
+        else:
+            RedisHelper.decr_count(profile, attr)
+
+
+def increase_friendship_counts(sender, instance, created, **kwargs):
+    if not created:
+        return
+    _update_friendship_counts(instance, 1)
+
+
+def decrease_friendship_counts(sender, instance, **kwargs):
+    _update_friendship_counts(instance, -1)
+
+
+def backfill_newsfeeds(sender, instance, created, **kwargs):
+    from newsfeeds.tasks import backfill_newsfeeds_task
+
+    if not created or instance.from_user_id is None or instance.to_user_id is None:
+        return
+    backfill_newsfeeds_task.delay(instance.from_user_id, instance.to_user_id)
+
+
+def purge_newsfeeds(sender, instance, **kwargs):
+    from newsfeeds.tasks import purge_newsfeeds_task
+
+    if instance.from_user_id is None or instance.to_user_id is None:
+        return
+    purge_newsfeeds_task.delay(instance.from_user_id, instance.to_user_id)
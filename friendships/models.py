@@ -17,15 +17,28 @@
 # 26-May-2022  Wayne Shih              Fetch user from cache
 # 27-May-2022  Wayne Shih              React to memcached helper
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
+# 18-Oct-2026  Wayne Shih              Use objects prefetched by page if any
+# 18-Oct-2026  Wayne Shih              Connect listeners of friendship counts
+# 18-Oct-2026  Wayne Shih              React to caching friendships in redis sorted sets
+# 18-Oct-2026  Wayne Shih              Backfill and purge newsfeeds on follow and unfollow
+# 18-Oct-2026  Wayne Shih              Connect create_profiles_before_follow()
 # $HISTORY$
 # =================================================================================================
 
 
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, pre_delete, pre_save
 
-from friendships.listeners import invalidate_followings_cache
+from friendships.listeners import (
+    add_friendship_to_cache,
+    backfill_newsfeeds,
+    create_profiles_before_follow,
+    decrease_friendship_counts,
+    increase_friendship_counts,
+    purge_newsfeeds,
+    remove_friendship_from_cache,
+)
 from utils.caches.memcached_helpers import MemcachedHelper
 
 
@@ -92,15 +105,20 @@ class Friendship(models.Model):
 
     @property
     def cached_from_user(self):
-        return MemcachedHelper.get_object_through_cache(User, self.from_user_id)
+        return MemcachedHelper.get_related_object_through_cache(self, User, 'from_user')
 
     @property
     def cached_to_user(self):
-        return MemcachedHelper.get_object_through_cache(User, self.to_user_id)
+        return MemcachedHelper.get_related_object_through_cache(self, User, 'to_user')
 
 
 # <Wayne Shih> 29-Apr-2022
 # https://docs.djangoproject.com/en/3.1/ref/signals/#post-save
 # https://docs.djangoproject.com/en/3.1/topics/signals/#listening-to-signals
-post_save.connect(invalidate_followings_cache, sender=Friendship)
-pre_delete.connect(invalidate_followings_cache, sender=Friendship)
+post_save.connect(add_friendship_to_cache, sender=Friendship)
+pre_delete.connect(remove_friendship_from_cache, sender=Friendship)
+pre_save.connect(create_profiles_before_follow, sender=Friendship)
+post_save.connect(increase_friendship_counts, sender=Friendship)
+pre_delete.connect(decrease_friendship_counts, sender=Friendship)
+post_save.connect(backfill_newsfeeds, sender=Friendship)
+pre_delete.connect(purge_newsfeeds, sender=Friendship)
@@ -12,45 +12,167 @@
 # 26-May-2022  Wayne Shih              Add print to debug github travis CI
 # 26-May-2022  Wayne Shih              Remove debug print for github travis CI
 # 12-Jun-2022  Wayne Shih              Deprecate get_followers()
+# 18-Oct-2026  Wayne Shih              Add get_follower_count()
+# 18-Oct-2026  Wayne Shih              Use cached counters for follower and following counts
+# 18-Oct-2026  Wayne Shih              Cache followers and followings in redis sorted sets
+# 18-Oct-2026  Wayne Shih              Read friendships from db in batches by keyset
+# 18-Oct-2026  Wayne Shih              Remove get_follower_ids(), load cached followers for fanout
 # $HISTORY$
 # =================================================================================================
 
 
-from django.conf import settings
-from django.core.cache import caches
+from django.db.models import Q
 
+from accounts.services import UserService
 from friendships.models import Friendship
-from twitter.caches import FOLLOWINGS_PATTERN
-
-cache = caches['default'] if not settings.TESTING else caches['testing']
+from twitter.caches import USER_FOLLOWERS_PATTERN, USER_FOLLOWINGS_PATTERN
+from utils.caches.redis_helpers import ID_SET_LOAD_BATCH_SIZE, RedisHelper
+from utils.time_helpers import datetime_to_timestamp_us
 
 
 class FriendshipService(object):
 
     @classmethod
-    def get_follower_ids(cls, user_id):
-        follower_friendships = Friendship.objects.filter(to_user_id=user_id)
-        follower_ids = [
-            friendship.from_user_id
-            for friendship in follower_friendships
-        ]
-        return follower_ids
+    def _iter_friendship_batches(cls, user_field, user_id, friend_field, batch_size):
+        # <Wayne Shih> 18-Oct-2026
+        # Read (id, friend id, created_at) of friendships in batches by keyset on (created_at, id)
+        # from the oldest, which is served by the (user, created_at) index, since a secondary
+        # index of InnoDB also contains the primary key. Unlike OFFSET or iterator(), which is
+        # fully buffered by MySQL client, each batch is only one index range scan.
+        friendships = Friendship.objects.filter(**{
+            user_field: user_id,
+            f'{friend_field}__isnull': False,
+        }).order_by('created_at', 'id').values_list('id', friend_field, 'created_at')
+        cursor_filter = Q()
+        while True:
+            batch = list(friendships.filter(cursor_filter)[:batch_size])
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            last_id, _, last_created_at = batch[-1]
+            cursor_filter = Q(created_at__gt=last_created_at) | \
+                Q(created_at=last_created_at, id__gt=last_id)
+
+    @classmethod
+    def _get_friend_ids_and_scores(cls, user_field, user_id, friend_field):
+        # <Wayne Shih> 18-Oct-2026
+        # Only ids and created_at are read, in batches, instead of whole Friendship objects
+        for batch in cls._iter_friendship_batches(
+            user_field, user_id, friend_field, ID_SET_LOAD_BATCH_SIZE,
+        ):
+            for _, friend_id, created_at in batch:
+                yield friend_id, datetime_to_timestamp_us(created_at)
+
+    @classmethod
+    def _get_follower_ids_and_scores(cls, user_id):
+        return cls._get_friend_ids_and_scores('to_user_id', user_id, 'from_user_id')
+
+    @classmethod
+    def _get_following_ids_and_scores(cls, user_id):
+        return cls._get_friend_ids_and_scores('from_user_id', user_id, 'to_user_id')
+
+    # <Wayne Shih> 18-Oct-2026
+    # Followers and followings are cached in redis sorted sets scored by follow time, which are
+    # updated by friendship listeners instead of being invalidated. These return the key, or
+    # None if the set is not cached, e.g. it is being loaded by someone else for too long.
+    @classmethod
+    def _load_followers_to_cache(cls, user_id):
+        key = USER_FOLLOWERS_PATTERN.format(user_id=user_id)
+        if RedisHelper.load_id_sorted_set(key, lambda: cls._get_follower_ids_and_scores(user_id)):
+            return key
+        return None
+
+    @classmethod
+    def _load_followings_to_cache(cls, user_id):
+        key = USER_FOLLOWINGS_PATTERN.format(user_id=user_id)
+        if RedisHelper.load_id_sorted_set(key, lambda: cls._get_following_ids_and_scores(user_id)):
+            return key
+        return None
+
+    @classmethod
+    def iter_follower_id_batches(cls, user_id, batch_size):
+        # <Wayne Shih> 18-Oct-2026
+        # Stream follower ids in lists of about batch_size for fanout, so that the whole
+        # followers are never held in memory at once.
+        # Followers not cached are loaded to cache first, which is read in batches from db as
+        # well. They are read from db batch by batch only if the cache cannot be loaded.
+        key = cls._load_followers_to_cache(user_id)
+        if key is not None:
+            yield from RedisHelper.iter_ids_in_sorted_set(key, batch_size)
+            return
+
+        batches = cls._iter_friendship_batches('to_user_id', user_id, 'from_user_id', batch_size)
+        for batch in batches:
+            yield [follower_id for _, follower_id, _ in batch]
+
+    # <Wayne Shih> 18-Oct-2026
+    # Counts are read from the cached counters in profiles instead of COUNT(*)
+    @classmethod
+    def get_follower_count(cls, user_id):
+        profile = UserService.get_profile_through_cache(user_id)
+        return RedisHelper.get_count(profile, 'followers_count')
+
+    @classmethod
+    def get_following_count(cls, user_id):
+        profile = UserService.get_profile_through_cache(user_id)
+        return RedisHelper.get_count(profile, 'followings_count')
 
     @classmethod
     def get_following_user_id_set(cls, from_user_id):
-        key = FOLLOWINGS_PATTERN.format(user_id=from_user_id)
-        following_user_id_set = cache.get(key)
-        if following_user_id_set is not None:
-            return following_user_id_set
-
-        friendships = Friendship.objects.filter(from_user_id=from_user_id)
-        following_user_id_set = {
-            friendship.to_user_id for friendship in friendships
+        key = cls._load_followings_to_cache(from_user_id)
+        if key is None:
+            return {
+                following_id
+                for following_id, _ in cls._get_following_ids_and_scores(from_user_id)
+            }
+        return {
+            following_id
+            for following_ids in RedisHelper.iter_ids_in_sorted_set(key, ID_SET_LOAD_BATCH_SIZE)
+            for following_id in following_ids
         }
-        cache.set(key, following_user_id_set)
-        return following_user_id_set
 
     @classmethod
-    def invalidate_followings_cache(cls, from_user_id):
-        key = FOLLOWINGS_PATTERN.format(user_id=from_user_id)
-        cache.delete(key)
+    def get_followed_user_ids(cls, from_user_id, user_ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Batch has_followed check, which returns the ones in user_ids followed by from_user
+        # in one round trip.
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        key = cls._load_followings_to_cache(from_user_id)
+        if key is None:
+            return set(Friendship.objects.filter(
+                from_user_id=from_user_id,
+                to_user_id__in=user_ids,
+            ).values_list('to_user_id', flat=True))
+        return RedisHelper.get_ids_in_sorted_set(key, user_ids)
+
+    @classmethod
+    def add_friendship_to_cache(cls, friendship):
+        if friendship.from_user_id is None or friendship.to_user_id is None:
+            return
+        score = datetime_to_timestamp_us(friendship.created_at)
+        RedisHelper.add_id_to_cached_sorted_set(
+            USER_FOLLOWERS_PATTERN.format(user_id=friendship.to_user_id),
+            friendship.from_user_id,
+            score,
+        )
+        RedisHelper.add_id_to_cached_sorted_set(
+            USER_FOLLOWINGS_PATTERN.format(user_id=friendship.from_user_id),
+            friendship.to_user_id,
+            score,
+        )
+
+    @classmethod
+    def remove_friendship_from_cache(cls, friendship):
+        if friendship.from_user_id is None or friendship.to_user_id is None:
+            return
+        RedisHelper.remove_id_from_sorted_set(
+            USER_FOLLOWERS_PATTERN.format(user_id=friendship.to_user_id),
+            friendship.from_user_id,
+        )
+        RedisHelper.remove_id_from_sorted_set(
+            USER_FOLLOWINGS_PATTERN.format(user_id=friendship.from_user_id),
+            friendship.to_user_id,
+        )
@@ -10,15 +10,25 @@
 # 10-Oct-2021  Wayne Shih              React to pylint checks
 # 17-Oct-2021  Wayne Shih              Fix pylint checks
 # 30-Apr-2022  Wayne Shih              Add a test for FriendshipService
+# 18-Oct-2026  Wayne Shih              Add tests for friendship counts
+# 18-Oct-2026  Wayne Shih              Add a test for cached followers and followings
+# 18-Oct-2026  Wayne Shih              Add a test for streaming followers from db
+# 18-Oct-2026  Wayne Shih              React to removing get_follower_ids()
+# 18-Oct-2026  Wayne Shih              Add test for friendship counts of previous users
 # $HISTORY$
 # =================================================================================================
 
 
 import re
+from unittest import mock
 
+from accounts.models import UserProfile
 from friendships.models import Friendship
 from friendships.services import FriendshipService
 from testing.testcases import TestCase
+from twitter.caches import USER_FOLLOWERS_PATTERN, USER_FOLLOWINGS_PATTERN
+from utils.caches.redis_client import RedisClient
+from utils.caches.redis_helpers import RedisHelper
 
 
 class FriendshipTest(TestCase):
@@ -146,3 +156,105 @@ class FriendshipServiceTest(TestCase):
         # Get followings from cache second time  <Wayne Shih> 30-Apr-2022
         following_user_id_set = FriendshipService.get_following_user_id_set(self.kd35.id)
         self.assertSetEqual(following_user_id_set, kd35_following_id_set)
+
+    def test_get_friendship_counts(self):
+        for i in range(3):
+            user = self.create_user(username=f'kd35_follower:{i}')
+            Friendship.objects.create(from_user=user, to_user=self.kd35)
+        Friendship.objects.create(from_user=self.kd35, to_user=self.mj23)
+        self.assertEqual(FriendshipService.get_follower_count(self.kd35.id), 3)
+        self.assertEqual(FriendshipService.get_following_count(self.kd35.id), 1)
+        self.assertEqual(FriendshipService.get_follower_count(self.mj23.id), 1)
+        self.assertEqual(UserProfile.objects.get(user=self.kd35).followers_count, 3)
+
+        # Counts are refilled from profiles in db  <Wayne Shih> 18-Oct-2026
+        self.clear_cache()
+        self.assertEqual(FriendshipService.get_follower_count(self.kd35.id), 3)
+        Friendship.objects.filter(to_user=self.kd35).first().delete()
+        self.assertEqual(FriendshipService.get_follower_count(self.kd35.id), 2)
+        Friendship.objects.filter(from_user=self.kd35).delete()
+        self.assertEqual(FriendshipService.get_following_count(self.kd35.id), 0)
+        self.assertEqual(FriendshipService.get_follower_count(self.mj23.id), 0)
+
+    def test_get_friendship_counts_of_previous_users(self):
+        # <Wayne Shih> 18-Oct-2026
+        # Friendships saved without signals, e.g. before friendship counts, and no profiles
+        Friendship.objects.bulk_create([Friendship(from_user=self.mj23, to_user=self.kd35)])
+        UserProfile.objects.filter(user_id__in=[self.kd35.id, self.mj23.id]).delete()
+        self.clear_cache()
+        self.assertEqual(FriendshipService.get_follower_count(self.kd35.id), 1)
+        self.assertEqual(FriendshipService.get_following_count(self.mj23.id), 1)
+
+        # a new friendship of a previous user is counted once  <Wayne Shih> 18-Oct-2026
+        lbj23 = self.create_user(username='lbj23')
+        Friendship.objects.bulk_create([Friendship(from_user=lbj23, to_user=self.mj23)])
+        UserProfile.objects.filter(user_id=self.mj23.id).delete()
+        self.clear_cache()
+        Friendship.objects.create(from_user=self.kd35, to_user=self.mj23)
+        self.assertEqual(FriendshipService.get_follower_count(self.mj23.id), 2)
+        self.assertEqual(UserProfile.objects.get(user=self.mj23).followers_count, 2)
+
+    def test_cached_followers_and_followings(self):
+        conn = RedisClient.get_connection()
+        followers = [self.create_user(username=f'kd35_follower:{i}') for i in range(5)]
+        for follower in followers:
+            Friendship.objects.create(from_user=follower, to_user=self.kd35)
+        follower_ids = [follower.id for follower in followers]
+
+        # Followers are loaded to cache on first read  <Wayne Shih> 18-Oct-2026
+        key = USER_FOLLOWERS_PATTERN.format(user_id=self.kd35.id)
+        self.assertEqual(conn.exists(key), False)
+        self.assertEqual(
+            list(FriendshipService.iter_follower_id_batches(self.kd35.id, batch_size=2)),
+            [follower_ids[:2], follower_ids[2:4], follower_ids[4:]],
+        )
+        self.assertEqual(conn.exists(key), True)
+
+        # Cached followers are updated by follow and unfollow  <Wayne Shih> 18-Oct-2026
+        Friendship.objects.create(from_user=self.mj23, to_user=self.kd35)
+        Friendship.objects.filter(from_user=followers[0], to_user=self.kd35).delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(FriendshipService.iter_follower_id_batches(self.kd35.id, batch_size=10)),
+                [follower_ids[1:] + [self.mj23.id]],
+            )
+
+        # Batch has_followed check  <Wayne Shih> 18-Oct-2026
+        user_ids = [self.kd35.id, followers[0].id, followers[1].id]
+        self.assertEqual(
+            FriendshipService.get_followed_user_ids(followers[1].id, user_ids),
+            {self.kd35.id},
+        )
+        self.assertEqual(
+            FriendshipService.get_followed_user_ids(followers[0].id, user_ids),
+            set(),
+        )
+        key = USER_FOLLOWINGS_PATTERN.format(user_id=followers[1].id)
+        self.assertEqual(conn.exists(key), True)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                FriendshipService.get_followed_user_ids(followers[1].id, user_ids),
+                {self.kd35.id},
+            )
+
+    def test_iter_follower_id_batches_from_db(self):
+        followers = [self.create_user(username=f'kd35_follower:{i}') for i in range(5)]
+        for follower in followers:
+            Friendship.objects.create(from_user=follower, to_user=self.kd35)
+        follower_ids = [follower.id for follower in followers]
+        # <Wayne Shih> 18-Oct-2026
+        # Followers created in the same microsecond are ordered by id
+        created_at = Friendship.objects.filter(to_user=self.kd35).first().created_at
+        Friendship.objects.filter(from_user__in=followers[2:]).update(created_at=created_at)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Followers which cannot be loaded to cache are streamed from db by keyset, one query
+        # per batch
+        with mock.patch.object(RedisHelper, 'load_id_sorted_set', return_value=False), \
+                self.assertNumQueries(3):
+            self.assertEqual(
+                list(FriendshipService.iter_follower_id_batches(self.kd35.id, batch_size=2)),
+                [follower_ids[:2], follower_ids[2:4], follower_ids[4:]],
+            )
+        key = USER_FOLLOWERS_PATTERN.format(user_id=self.kd35.id)
+        self.assertEqual(RedisClient.get_connection().exists(key), False)
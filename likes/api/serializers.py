@@ -19,6 +19,7 @@
 # 12-Mar-2022  Wayne Shih              Update create to get_or_create
 # 17-Mar-2022  Wayne Shih              Update history and comments
 # 26-May-2022  Wayne Shih              Fetch user from cache
+# 18-Oct-2026  Wayne Shih              Prefetch users by page
 # $HISTORY$
 # =================================================================================================
 
@@ -26,7 +27,7 @@
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 
-from accounts.api.serializers import UserSerializerForLike
+from accounts.api.serializers import ListSerializerWithCachedUsers, UserSerializerForLike
 from comments.models import Comment
 from likes.models import Like
 from tweets.models import Tweet
@@ -35,10 +36,12 @@ from tweets.models import Tweet
 class LikeSerializer(serializers.ModelSerializer):
     user = UserSerializerForLike(source='cached_user')
     # user = UserSerializerForLike()
+    cached_user_field = 'user'
 
     class Meta:
         model = Like
         fields = ('user', 'created_at')
+        list_serializer_class = ListSerializerWithCachedUsers
 
 
 class BaseLikeSerializerForCreateAndCancel(serializers.ModelSerializer):
@@ -9,10 +9,14 @@
 # 05-Jun-2022  Wayne Shih              Initial create
 # 09-Jun-2022  Wayne Shih              Cache reacts to likes_count change
 # 11-Jun-2022  Wayne Shih              React to adding likes_count for comment denormalization
+# 18-Oct-2026  Wayne Shih              Update likes_count cache without fetching content_object
+# 18-Oct-2026  Wayne Shih              Add write-behind mode of likes_count
 # $HISTORY$
 # =================================================================================================
 
 
+from django.conf import settings
+
 from utils.caches.redis_helpers import RedisHelper
 
 
@@ -26,10 +30,19 @@ def increase_likes_count(sender, instance, created, **kwargs):
         return
 
     model_class = instance.content_type.model_class()
+    # <Wayne Shih> 18-Oct-2026
+    # No row lock on hot objects in write-behind mode, see RedisHelper.add_count_delta()
+    if settings.COUNTS_WRITE_BEHIND:
+        RedisHelper.add_count_delta(model_class(id=instance.object_id), 'likes_count', 1)
+        return
+
     # <Wayne Shih> 05-Jun-2022
     # https://docs.djangoproject.com/en/4.0/ref/models/expressions/#f-expressions
     model_class.objects.filter(id=instance.object_id).update(likes_count=F('likes_count') + 1)
-    RedisHelper.incr_count(instance.content_object, 'likes_count')
+    # <Wayne Shih> 18-Oct-2026
+    # Counts are cached by model and id only, so there is no need to fetch content_object
+    # from db. It costs one atomic redis round trip unless the count is not cached.
+    RedisHelper.incr_count(model_class(id=instance.object_id), 'likes_count')
 
 
 def decrease_likes_count(sender, instance, **kwargs):
@@ -37,7 +50,11 @@ def decrease_likes_count(sender, instance, **kwargs):
     from tweets.models import Tweet
 
     model_class = instance.content_type.model_class()
+    if settings.COUNTS_WRITE_BEHIND:
+        RedisHelper.add_count_delta(model_class(id=instance.object_id), 'likes_count', -1)
+        return
+
     # <Wayne Shih> 05-Jun-2022
     # https://docs.djangoproject.com/en/4.0/ref/models/expressions/#f-expressions
     model_class.objects.filter(id=instance.object_id).update(likes_count=F('likes_count') - 1)
-    RedisHelper.decr_count(instance.content_object, 'likes_count')
+    RedisHelper.decr_count(model_class(id=instance.object_id), 'likes_count')
@@ -15,6 +15,7 @@
 # 27-May-2022  Wayne Shih              React to memcached helper
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
 # 05-Jun-2022  Wayne Shih              React to tweet model denormalization for likes_count
+# 18-Oct-2026  Wayne Shih              Use objects prefetched by page if any
 # $HISTORY$
 # =================================================================================================
 
@@ -61,7 +62,7 @@ class Like(models.Model):
 
     @property
     def cached_user(self):
-        return MemcachedHelper.get_object_through_cache(User, self.user_id)
+        return MemcachedHelper.get_related_object_through_cache(self, User, 'user')
 
 
 # <Wayne Shih> 05-Jun-2022
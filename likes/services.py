@@ -7,6 +7,8 @@
 # =================================================================================================
 #    Date      Name                    Description of Change
 # 11-Mar-2022  Wayne Shih              Initial create
+# 18-Oct-2026  Wayne Shih              Add get_liked_object_ids()
+# 18-Oct-2026  Wayne Shih              Remove get_has_liked(), replaced by the loaders
 # $HISTORY$
 # =================================================================================================
 
@@ -20,11 +22,13 @@ from likes.models import Like
 class LikeService(object):
 
     @classmethod
-    def get_has_liked(cls, user: User, target):
-        if user.is_anonymous:
-            return False
-        return Like.objects.filter(
+    def get_liked_object_ids(cls, user: User, model_class, object_ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Ids of targets in object_ids liked by user, for a page of targets in one db query
+        if user.is_anonymous or not object_ids:
+            return set()
+        return set(Like.objects.filter(
             user_id=user.id,
-            content_type=ContentType.objects.get_for_model(target.__class__),
-            object_id=target.id,
-        ).exists()
+            content_type=ContentType.objects.get_for_model(model_class),
+            object_id__in=object_ids,
+        ).values_list('object_id', flat=True))
@@ -15,6 +15,9 @@
 #    Date      Name                    Description of Change
 # 04-Nov-2021  Wayne Shih              Initial create
 # 27-May-2022  Wayne Shih              Add cached_tweet
+# 18-Oct-2026  Wayne Shih              Load fields of tweets of a page by TweetLoader
+# 18-Oct-2026  Wayne Shih              Prefetch tweets by page
+# 18-Oct-2026  Wayne Shih              Skip newsfeeds of deleted tweets
 # $HISTORY$
 # =================================================================================================
 
@@ -22,7 +25,23 @@
 from rest_framework import serializers
 
 from newsfeeds.models import NewsFeed
-from tweets.api.serializers import TweetSerializer
+from tweets.api.serializers import TweetSerializer, get_tweet_loader
+from tweets.models import Tweet
+from utils.caches.memcached_helpers import MemcachedHelper
+
+
+class NewsFeedListSerializer(serializers.ListSerializer):
+    # <Wayne Shih> 18-Oct-2026
+    # Load fields of tweets for the whole page, see TweetListSerializer
+    def to_representation(self, data):
+        newsfeeds = list(data)
+        tweets = MemcachedHelper.prefetch_objects_through_cache(newsfeeds, Tweet, 'tweet')
+        get_tweet_loader(self.context).load(tweets)
+        # <Wayne Shih> 18-Oct-2026
+        # Skip newsfeeds of deleted tweets which are not deleted by delete_newsfeeds_main_task()
+        # yet, since their tweets are not prefetched.
+        newsfeeds = [newsfeed for newsfeed in newsfeeds if hasattr(newsfeed, '_cached_tweet')]
+        return super().to_representation(newsfeeds)
 
 
 class NewsFeedSerializer(serializers.ModelSerializer):
@@ -31,3 +50,4 @@ class NewsFeedSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsFeed
         fields = ('id', 'user', 'created_at', 'tweet')
+        list_serializer_class = NewsFeedListSerializer
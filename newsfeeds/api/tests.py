@@ -12,18 +12,27 @@
 # 26-May-2022  Wayne Shih              Add a test to test cached user
 # 26-May-2022  Wayne Shih              Add a test to test cached tweet
 # 05-Jun-2022  Wayne Shih              Add test for only caching REDIS_LIST_SIZE_LIMIT in redis
+# 18-Oct-2026  Wayne Shih              Add test for newsfeeds list api with pull mode followings
+# 18-Oct-2026  Wayne Shih              Add test for newsfeeds pagination with ids only cache
+# 18-Oct-2026  Wayne Shih              Add test for newsfeeds pagination with sorted set cache
+# 18-Oct-2026  Wayne Shih              Add test for skipping newsfeeds of deleted tweets
+# 18-Oct-2026  Wayne Shih              Add test for pagination with pull mode followings
+# 18-Oct-2026  Wayne Shih              Add test for a page of deleted tweets
 # $HISTORY$
 # =================================================================================================
 
 
+from unittest import mock
 from urllib import parse
 
 from django.conf import settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from newsfeeds.constants import FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD
 from newsfeeds.models import NewsFeed
 from newsfeeds.services import NewsFeedService
+from newsfeeds.tasks import delete_newsfeeds_main_task
 from testing.testcases import TestCase
 from utils.pagination import EndlessPagination
 
@@ -140,6 +149,99 @@ class NewsFeedApiTests(TestCase):
         self.assertEqual(response.data['results'][0]['id'], new_newsfeed2.id)
         self.assertEqual(response.data['results'][1]['id'], new_newsfeed1.id)
 
+    def test_list_api_with_pull_mode_followings(self):
+        self.lbj23_client.post(FOLLOW_URL.format(self.kobe24.id))
+        for i in range(FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD - 1):
+            self.create_friendship(self.create_user(f'kobe24_follower:{i}'), self.kobe24)
+
+        # <Wayne Shih> 18-Oct-2026
+        # kobe24 is in pull mode, lbj23 still sees his tweets in time order
+        self.lbj23_client.post(TWEET_CREATE_URL, {'content': 'I am the King James!'})
+        self.kobe24_client.post(TWEET_CREATE_URL, {'content': 'Be Better!'})
+        self.lbj23_client.post(TWEET_CREATE_URL, {'content': 'Taco Tuesday!'})
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.lbj23.id).count(), 2)
+
+        response = self.lbj23_client.get(NEWSFEED_LIST_URL)
+        newsfeeds = response.data['results']
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['has_next'], False)
+        self.assertEqual(
+            [feed['tweet']['content'] for feed in newsfeeds],
+            ['Taco Tuesday!', 'Be Better!', 'I am the King James!'],
+        )
+        self.assertEqual(newsfeeds[1]['id'], None)
+        self.assertEqual(newsfeeds[1]['tweet']['user']['username'], 'kobe24')
+
+    def test_list_pagination_with_pull_mode_followings(self):
+        self.create_friendship(self.lbj23, self.kobe24)
+        for i in range(FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD - 1):
+            self.create_friendship(self.create_user(f'kobe24_follower:{i}'), self.kobe24)
+        self.kobe24_client.post(TWEET_CREATE_URL, {'content': 'Be Better!'})
+        for i in range(settings.REDIS_LIST_SIZE_LIMIT):
+            self.lbj23_client.post(TWEET_CREATE_URL, {'content': f'lbj23::tweet::{i}'})
+
+        # <Wayne Shih> 18-Oct-2026
+        # kobe24's tweet is older than the cached newsfeeds, and is merged into the page from db
+        results = []
+        response = self.lbj23_client.get(NEWSFEED_LIST_URL)
+        results.extend(response.data['results'])
+        while response.data['has_next']:
+            response = self.lbj23_client.get(response.data['next'])
+            results.extend(response.data['results'])
+        self.assertEqual(len(results), settings.REDIS_LIST_SIZE_LIMIT + 1)
+        self.assertEqual(results[-1]['tweet']['content'], 'Be Better!')
+        self.assertEqual(results[-1]['id'], None)
+        self.assertEqual(results[-2]['tweet']['content'], 'lbj23::tweet::0')
+
+    def test_list_pagination_with_ids_only_cache(self):
+        newsfeeds = []
+        for i in range(settings.REDIS_LIST_SIZE_LIMIT + 1):
+            tweet = self.create_tweet(self.kobe24, f'kb24::tweet::{i}')
+            newsfeeds.append(self.create_newsfeed(self.lbj23, tweet))
+        newsfeeds = newsfeeds[::-1]
+
+        # <Wayne Shih> 18-Oct-2026
+        # Pages are the same as the ones from the cache with whole objects
+        with self.settings(REDIS_TIMELINE_IDS_ONLY=True):
+            results = self._get_all_paginated_newsfeeds(self.lbj23_client)
+            self.assertEqual([feed['id'] for feed in results], [feed.id for feed in newsfeeds])
+            self.assertEqual(results[0]['tweet']['content'], newsfeeds[0].tweet.content)
+            self.assertEqual(results[-1]['tweet']['content'], newsfeeds[-1].tweet.content)
+
+    def test_list_pagination_with_sorted_set_cache(self):
+        newsfeeds = []
+        for i in range(settings.REDIS_LIST_SIZE_LIMIT + 1):
+            tweet = self.create_tweet(self.kobe24, f'kb24::tweet::{i}')
+            newsfeeds.append(self.create_newsfeed(self.lbj23, tweet))
+        newsfeeds = newsfeeds[::-1]
+
+        for ids_only in [False, True]:
+            with self.settings(REDIS_TIMELINE_SORTED_SET=True, REDIS_TIMELINE_IDS_ONLY=ids_only):
+                self.clear_cache()
+                # <Wayne Shih> 18-Oct-2026
+                # The last page is beyond the cached sorted set and falls back to db
+                results = self._get_all_paginated_newsfeeds(self.lbj23_client)
+                self.assertEqual(
+                    [feed['id'] for feed in results],
+                    [feed.id for feed in newsfeeds],
+                )
+                self.assertEqual(results[0]['tweet']['content'], newsfeeds[0].tweet.content)
+
+        # test fanout to cached sorted sets and pull down to refresh  <Wayne Shih> 18-Oct-2026
+        with self.settings(REDIS_TIMELINE_SORTED_SET=True):
+            self.create_friendship(self.lbj23, self.kobe24)
+            self.kobe24_client.post(TWEET_CREATE_URL, {'content': 'Mamba out!'})
+            new_newsfeed = NewsFeed.objects.filter(user_id=self.lbj23.id).first()
+            response = self.lbj23_client.get(
+                NEWSFEED_LIST_URL,
+                {'created_at__gt': newsfeeds[0].created_at},
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['has_next'], False)
+            self.assertEqual(len(response.data['results']), 1)
+            self.assertEqual(response.data['results'][0]['id'], new_newsfeed.id)
+            self.assertEqual(response.data['results'][0]['tweet']['content'], 'Mamba out!')
+
     def test_cached_user(self):
         profile = self.kobe24.profile
         profile.nickname = 'lakers_24'
@@ -321,3 +423,48 @@ class NewsFeedApiTests(TestCase):
         self.assertEqual(response.data['has_next'], False)
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['tweet']['id'], kb_tweet.id)
+
+    def test_list_api_skips_deleted_tweets(self):
+        self.lbj23_client.post(FOLLOW_URL.format(self.kobe24.id))
+        tweets = [self.create_tweet(self.kobe24, f'kobe24 tweet - {i}') for i in range(3)]
+        for tweet in tweets:
+            NewsFeedService.fanout_to_followers(tweet)
+        response = self.lbj23_client.get(NEWSFEED_LIST_URL)
+        self.assertEqual(len(response.data['results']), 3)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Newsfeeds of a deleted tweet are skipped before they are deleted
+        deleted_tweet_id = tweets[1].id
+        with mock.patch.object(delete_newsfeeds_main_task, 'delay'):
+            tweets[1].delete()
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=deleted_tweet_id).count(), 2)
+        response = self.lbj23_client.get(NEWSFEED_LIST_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [newsfeed['tweet']['id'] for newsfeed in response.data['results']],
+            [tweets[2].id, tweets[0].id],
+        )
+
+    def test_list_api_with_page_of_deleted_tweets(self):
+        self.lbj23_client.post(FOLLOW_URL.format(self.kobe24.id))
+        page_size = 2
+        tweets = [self.create_tweet(self.kobe24, f'kobe24 tweet - {i}') for i in range(3)]
+        for tweet in tweets:
+            NewsFeedService.fanout_to_followers(tweet)
+
+        # <Wayne Shih> 18-Oct-2026
+        # All newsfeeds of the first page are skipped, and the next link still goes on
+        with mock.patch.object(delete_newsfeeds_main_task, 'delay'):
+            for tweet in tweets[1:]:
+                tweet.delete()
+        response = self.lbj23_client.get(NEWSFEED_LIST_URL, {'page_size': page_size})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['has_next'], True)
+        response = self.lbj23_client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [newsfeed['tweet']['id'] for newsfeed in response.data['results']],
+            [tweets[0].id],
+        )
+        self.assertEqual(response.data['has_next'], False)
@@ -16,6 +16,9 @@
 # 30-May-2022  Wayne Shih              React to user newsfeeds cache
 # 05-Jun-2022  Wayne Shih              React to only caching REDIS_LIST_SIZE_LIMIT in redis
 # 18-Jun-2022  Wayne Shih              Add ratelimit
+# 18-Oct-2026  Wayne Shih              Hydrate page from ids only cache
+# 18-Oct-2026  Wayne Shih              Order newsfeeds by id for ties of created_at
+# 18-Oct-2026  Wayne Shih              Merge tweets of pull mode followings into pages from db
 # $HISTORY$
 # =================================================================================================
 
@@ -48,7 +51,16 @@ class NewsFeedViewSet(viewsets.GenericViewSet):
         cached_newsfeeds = NewsFeedService.get_cached_newsfeeds(request.user.id)
         page = self.paginator.paginate_cached_list(cached_newsfeeds, request)
         if page is None:
-            newsfeeds = self.get_queryset().order_by('-created_at')
-            page = self.paginate_queryset(newsfeeds)
+            # <Wayne Shih> 18-Oct-2026
+            # Tweets of pull mode followings are merged into pages from db as well
+            querysets = [self.get_queryset()]
+            pull_mode_tweets = NewsFeedService.get_pull_mode_tweets(request.user.id)
+            if pull_mode_tweets is not None:
+                querysets.append(pull_mode_tweets)
+            page = self.paginator.paginate_querysets(querysets, request)
+            page = NewsFeedService.turn_pulled_tweets_into_newsfeeds(request.user.id, page)
+        # <Wayne Shih> 18-Oct-2026
+        # Only newsfeeds of this page are hydrated if cache holds ids only.
+        page = NewsFeedService.hydrate_newsfeeds(page)
         serializer = NewsFeedSerializer(page, many=True, context={'request': request})
         return self.get_paginated_response(serializer.data)
@@ -7,10 +7,61 @@
 # =================================================================================================
 #    Date      Name                    Description of Change
 # 12-Jun-2022  Wayne Shih              Initial create
+# 18-Oct-2026  Wayne Shih              Add FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD
+# 18-Oct-2026  Wayne Shih              Add constants of fanout batch retries and status
+# 18-Oct-2026  Wayne Shih              Add FANOUT_DORMANT_AFTER
+# 18-Oct-2026  Wayne Shih              Add constants of adaptive batch size and bulk fanout
+# 18-Oct-2026  Wayne Shih              Fix comment of dormant followers queue
+# 18-Oct-2026  Wayne Shih              Fix comment of newsfeeds_bulk queue
+# 18-Oct-2026  Wayne Shih              Add FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD
 # $HISTORY$
 # =================================================================================================
 
 
+from datetime import timedelta
+
 from django.conf import settings
 
 FANOUT_BATCH_SIZE = 1000 if not settings.TESTING else 3
+
+# <Wayne Shih> 18-Oct-2026
+# Users with at least this many followers are in pull mode. Their tweets are not fanned out,
+# instead their followers pull these tweets from the user tweets cache while reading newsfeeds.
+FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD = 100000 if not settings.TESTING else 10
+# <Wayne Shih> 18-Oct-2026
+# Users in pull mode fall back to push mode only below this many followers, so that a user
+# hovering around FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD never flips between modes, each flip
+# fanning out tweets posted in pull mode late.
+FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD = 90000 if not settings.TESTING else 8
+
+# <Wayne Shih> 18-Oct-2026
+# A failed fanout batch is retried after FANOUT_BATCH_RETRY_DELAY * 2 ** retries seconds, and is
+# marked as failed in the fanout progress once it runs out of retries.
+FANOUT_BATCH_MAX_RETRIES = 3
+FANOUT_BATCH_RETRY_DELAY = 10  # in seconds
+FANOUT_BATCH_DONE = 'done'
+FANOUT_BATCH_FAILED = 'failed'
+
+# <Wayne Shih> 18-Oct-2026
+# Followers without any activity in this period are dormant. Their newsfeeds are created on the
+# newsfeeds_low queue, which has its own workers of lower concurrency, see CELERY_QUEUES. They
+# are not pushed to cache, since their cached newsfeeds have usually expired anyway.
+FANOUT_DORMANT_AFTER = timedelta(days=30)
+
+# <Wayne Shih> 18-Oct-2026
+# Fanout batch size adapts to the measured latency of batches, so that a batch takes about
+# FANOUT_BATCH_TARGET_SECONDS, within FANOUT_MIN_BATCH_SIZE and FANOUT_MAX_BATCH_SIZE.
+# FANOUT_BATCH_SIZE is used until any batch is measured.
+FANOUT_BATCH_TARGET_SECONDS = 1.0
+FANOUT_MIN_BATCH_SIZE = 100 if not settings.TESTING else FANOUT_BATCH_SIZE
+FANOUT_MAX_BATCH_SIZE = 5000 if not settings.TESTING else FANOUT_BATCH_SIZE
+# weight of the latest batch in the moving average of latency
+FANOUT_BATCH_LATENCY_WEIGHT = 0.2
+
+# <Wayne Shih> 18-Oct-2026
+# Batches of authors with at least this many followers go to the newsfeeds_bulk queue, except
+# the first FANOUT_PRIORITY_BATCHES ones. Workers consume both queues, and the broker rotates
+# between them, so a large fanout only gets about half of the workers and never starves small
+# accounts. See CELERY_QUEUES.
+FANOUT_LARGE_AUTHOR_FOLLOWERS = 10000 if not settings.TESTING else 5
+FANOUT_PRIORITY_BATCHES = 1
@@ -7,6 +7,7 @@
 # =================================================================================================
 #    Date      Name                    Description of Change
 # 30-May-2022  Wayne Shih              Initial create
+# 18-Oct-2026  Wayne Shih              Delete newsfeeds of deleted tweets
 # $HISTORY$
 # =================================================================================================
 
@@ -19,3 +20,13 @@ def push_newsfeed_to_cache(sender, instance, created, **kwargs):
 
     from newsfeeds.services import NewsFeedService
     NewsFeedService.push_newsfeed_to_cache(instance)
+
+
+def delete_newsfeeds_of_tweet(sender, instance, **kwargs):
+    from newsfeeds.tasks import delete_newsfeeds_main_task
+    from tweets.services import TweetService
+
+    # <Wayne Shih> 18-Oct-2026
+    # Pull mode followers read the tweets of the author from the user tweets cache
+    TweetService.invalidate_user_tweets_cache(instance.user_id)
+    delete_newsfeeds_main_task.delay(instance.id)
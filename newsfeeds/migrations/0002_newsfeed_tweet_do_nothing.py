@@ -0,0 +1,20 @@
+# Generated by Django 3.1.3 on 2026-10-18 03:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweets', '0004_auto_20220605_1958'),
+        ('newsfeeds', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newsfeed',
+            name='tweet',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='tweets.tweet'),
+        ),
+    ]
@@ -14,22 +14,33 @@
 # 27-May-2022  Wayne Shih              Add cached_tweet
 # 29-May-2022  Wayne Shih              Add Django signal-listener for user newsfeeds cache
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
+# 18-Oct-2026  Wayne Shih              Use objects prefetched by page if any
+# 18-Oct-2026  Wayne Shih              Delete newsfeeds of deleted tweets by tweet_id in batches
 # $HISTORY$
 # =================================================================================================
 
 
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
-from newsfeeds.listeners import push_newsfeed_to_cache
+from newsfeeds.listeners import delete_newsfeeds_of_tweet, push_newsfeed_to_cache
 from tweets.models import Tweet
 from utils.caches.memcached_helpers import MemcachedHelper
 
 
 class NewsFeed(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    tweet = models.ForeignKey(Tweet, on_delete=models.SET_NULL, null=True)
+    # <Wayne Shih> 18-Oct-2026
+    # Newsfeeds of a deleted tweet are deleted in batches by delete_newsfeeds_main_task(), which
+    # looks them up by tweet_id. So deleting a tweet neither sets tweet_id of all its newsfeeds
+    # to null nor is blocked by a foreign key constraint.
+    tweet = models.ForeignKey(
+        Tweet,
+        on_delete=models.DO_NOTHING,
+        null=True,
+        db_constraint=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -42,10 +53,11 @@ class NewsFeed(models.Model):
 
     @property
     def cached_tweet(self):
-        return MemcachedHelper.get_object_through_cache(Tweet, self.tweet_id)
+        return MemcachedHelper.get_related_object_through_cache(self, Tweet, 'tweet')
 
 
 # <Wayne Shih> 29-Apr-2022
 # https://docs.djangoproject.com/en/3.1/ref/signals/#post-save
 # https://docs.djangoproject.com/en/3.1/topics/signals/#listening-to-signals
 post_save.connect(push_newsfeed_to_cache, sender=NewsFeed)
+post_delete.connect(delete_newsfeeds_of_tweet, sender=Tweet)
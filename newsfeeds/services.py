@@ -10,15 +10,60 @@
 # 30-May-2022  Wayne Shih              Add uer newsfeeds cache, react to redis helper
 # 12-Jun-2022  Wayne Shih              Use message queue to fanout newsfeeds
 # 12-Jun-2022  Wayne Shih              Make fanout robust
+# 18-Oct-2026  Wayne Shih              Add push_newsfeeds_to_cache() for fanout batch
+# 18-Oct-2026  Wayne Shih              Merge tweets of pull mode followings into newsfeeds
+# 18-Oct-2026  Wayne Shih              Add hydrate_newsfeeds(), pull tweets since pull mode only
+# 18-Oct-2026  Wayne Shih              Merge pull mode tweets into sorted set timelines as a list
+# 18-Oct-2026  Wayne Shih              Order newsfeeds by id for ties of created_at
+# 18-Oct-2026  Wayne Shih              Check pull mode followings in one batch
+# 18-Oct-2026  Wayne Shih              Add create_newsfeeds_for_followers() and fanout progress
+# 18-Oct-2026  Wayne Shih              Drop cached newsfeeds of dormant followers instead of pushing
+# 18-Oct-2026  Wayne Shih              Add adaptive fanout batch size
+# 18-Oct-2026  Wayne Shih              Backfill and purge newsfeeds on follow and unfollow
+# 18-Oct-2026  Wayne Shih              Delete newsfeeds of deleted tweets in batches
+# 18-Oct-2026  Wayne Shih              Rebuild cached newsfeeds by k-way merge of followings' tweets
+# 18-Oct-2026  Wayne Shih              Fan out pull mode tweets on leaving, page them from db
+# 18-Oct-2026  Wayne Shih              Rebuild newsfeeds in refill lock by one tweets query
+# 18-Oct-2026  Wayne Shih              Remove is_fanout_batch_done()
+# 18-Oct-2026  Wayne Shih              Merge cached tweets lists read in one pipeline
+# 18-Oct-2026  Wayne Shih              Leave pull mode below a lower threshold, bound late fanout
 # $HISTORY$
 # =================================================================================================
 
 
+import heapq
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Q, Subquery, Value, When
+
+from friendships.services import FriendshipService
+from newsfeeds.constants import (
+    FANOUT_BATCH_DONE,
+    FANOUT_BATCH_FAILED,
+    FANOUT_BATCH_LATENCY_WEIGHT,
+    FANOUT_BATCH_SIZE,
+    FANOUT_BATCH_TARGET_SECONDS,
+    FANOUT_MAX_BATCH_SIZE,
+    FANOUT_MIN_BATCH_SIZE,
+    FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD,
+    FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD,
+)
 from newsfeeds.models import NewsFeed
 from newsfeeds.tasks import fanout_newsfeeds_main_task
 from tweets.models import Tweet
-from twitter.caches import USER_NEWSFEEDS_PATTERN
+from tweets.services import TweetService
+from twitter.caches import (
+    FANOUT_PROGRESS_PATTERN,
+    FANOUT_SECONDS_PER_FOLLOWER_KEY,
+    PULL_MODE_USERS_KEY,
+    USER_NEWSFEEDS_PATTERN,
+    USER_TWEETS_PATTERN,
+)
+from utils.caches.redis_client import RedisClient
 from utils.caches.redis_helpers import RedisHelper
+from utils.time_helpers import datetime_to_timestamp_us, timestamp_us_to_datetime
 
 
 class NewsFeedService(object):
@@ -34,14 +79,427 @@ class NewsFeedService(object):
     def get_cached_newsfeeds(cls, user_id):
         # <Wayne Shih> 30-May-2022
         # Queryset is in fact lazy loading, so this line doesn't trigger db query yet
-        newsfeeds = NewsFeed.objects.filter(user_id=user_id).order_by('-created_at')
+        newsfeeds = NewsFeed.objects.filter(user_id=user_id).order_by('-created_at', '-id')
         key = USER_NEWSFEEDS_PATTERN.format(user_id=user_id)
-        return RedisHelper.load_objects(key, newsfeeds)
+        rebuild = None
+        if settings.NEWSFEED_REBUILD_FROM_FOLLOWINGS:
+            rebuild = partial(cls.build_newsfeeds_from_followings, user_id)
+        newsfeeds = RedisHelper.load_objects(key, newsfeeds, rebuild=rebuild)
+
+        pull_mode_followings = cls.get_pull_mode_followings(user_id)
+        if not pull_mode_followings:
+            return newsfeeds
+        return cls._merge_pull_mode_tweets(user_id, newsfeeds, pull_mode_followings)
+
+    @classmethod
+    def hydrate_newsfeeds(cls, newsfeeds):
+        return RedisHelper.hydrate_objects(NewsFeed, newsfeeds)
+
+    @classmethod
+    def update_pull_mode(cls, user_id, since):
+        # <Wayne Shih> 18-Oct-2026
+        # Users with too many followers are marked as pull mode so that their tweets are not
+        # fanned out. The mark is refreshed whenever they tweet, so a user falls back to push
+        # mode once the number of followers drops below FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD,
+        # which is lower than the one to enter pull mode.
+        # Score is the time since when tweets have not been fanned out, and nx=True keeps it
+        # unchanged for a user who has been in pull mode.
+        # - https://redis.io/commands/zadd/
+        conn = RedisClient.get_connection()
+        pull_mode_since = cls.get_pull_mode_since(user_id)
+        threshold = FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD
+        if pull_mode_since is not None:
+            threshold = FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD
+        if FriendshipService.get_follower_count(user_id) >= threshold:
+            conn.zadd(PULL_MODE_USERS_KEY, {user_id: datetime_to_timestamp_us(since)}, nx=True)
+            return True
+
+        if pull_mode_since is None:
+            return False
+
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets posted in pull mode have never been fanned out, and are no longer pulled once
+        # the user leaves pull mode. So fan them out late, the same way as a new tweet. They
+        # show up again as soon as their fanout is done, like a new tweet does.
+        # Only the latest REDIS_LIST_SIZE_LIMIT of them are fanned out. Any older one has that
+        # many newer tweets of the same user in the same newsfeeds, so it never makes it into
+        # cached newsfeeds, and is left out of the newsfeeds in db as well.
+        # The mark is removed first, so that these fanouts never see the user in pull mode.
+        conn.zrem(PULL_MODE_USERS_KEY, user_id)
+        tweet_ids = Tweet.objects.filter(
+            user_id=user_id,
+            created_at__gte=pull_mode_since,
+            created_at__lt=since,
+        ).order_by('-created_at').values_list('id', flat=True)[:settings.REDIS_LIST_SIZE_LIMIT]
+        for tweet_id in tweet_ids:
+            fanout_newsfeeds_main_task.delay(tweet_id, user_id, backdate=True)
+        return False
+
+    @classmethod
+    def get_pull_mode_since(cls, user_id):
+        conn = RedisClient.get_connection()
+        since = conn.zscore(PULL_MODE_USERS_KEY, user_id)
+        return timestamp_us_to_datetime(int(since)) if since is not None else None
+
+    @classmethod
+    def get_pull_mode_followings(cls, user_id):
+        conn = RedisClient.get_connection()
+        pull_mode_users = {
+            int(pull_mode_user_id): timestamp_us_to_datetime(int(since))
+            for pull_mode_user_id, since in conn.zrange(
+                PULL_MODE_USERS_KEY, 0, -1, withscores=True,
+            )
+        }
+        if not pull_mode_users:
+            return {}
+
+        followed_user_ids = FriendshipService.get_followed_user_ids(user_id, pull_mode_users)
+        return {
+            pull_mode_user_id: since
+            for pull_mode_user_id, since in pull_mode_users.items()
+            if pull_mode_user_id in followed_user_ids
+        }
+
+    @classmethod
+    def _merge_pull_mode_tweets(cls, user_id, newsfeeds, pull_mode_followings):
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets of pull mode users are turned into newsfeeds which are not saved in db.
+        # Only tweets since the users turned into pull mode are merged, since the earlier ones
+        # have been fanned out.
+        # If cached newsfeeds are full, older newsfeeds are only in db, so only merge tweets
+        # not older than the last cached newsfeed. OW, the merged list would skip the newsfeeds
+        # in db once pagination falls back to db. Older tweets are merged into pages from db,
+        # see get_pull_mode_tweets().
+        # The merged newsfeeds are a list even if timelines are cached in sorted sets, so that
+        # readers following pull mode users load the whole cached newsfeeds as before.
+        newsfeeds = list(newsfeeds)
+        is_all_cached = len(newsfeeds) < settings.REDIS_LIST_SIZE_LIMIT
+        pulled_newsfeeds_list = []
+        for pull_mode_user_id, since in pull_mode_followings.items():
+            pulled_newsfeeds_list.append([
+                cls._make_pulled_newsfeed(user_id, tweet)
+                for tweet in TweetService.get_cached_tweets(pull_mode_user_id)
+                if tweet.created_at >= since and (
+                    is_all_cached or tweet.created_at >= newsfeeds[-1].created_at
+                )
+            ])
+
+        # <Wayne Shih> 18-Oct-2026
+        # All lists are in reversed time order, so merge them rather than sort them again.
+        # https://docs.python.org/3/library/heapq.html#heapq.merge
+        return list(heapq.merge(
+            newsfeeds,
+            *pulled_newsfeeds_list,
+            key=lambda newsfeed: newsfeed.created_at,
+            reverse=True,
+        ))
+
+    @classmethod
+    def _make_pulled_newsfeed(cls, user_id, tweet):
+        return NewsFeed(user_id=user_id, tweet_id=tweet.id, created_at=tweet.created_at)
+
+    @classmethod
+    def get_pull_mode_tweets(cls, user_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets in db of pull mode followings since they turned into pull mode, for pages
+        # beyond the cached newsfeeds. Each following is read by the (user, created_at) index.
+        # None if the user follows no pull mode users.
+        pull_mode_followings = cls.get_pull_mode_followings(user_id)
+        if not pull_mode_followings:
+            return None
+
+        tweet_filter = Q()
+        for pull_mode_user_id, since in pull_mode_followings.items():
+            tweet_filter |= Q(user_id=pull_mode_user_id, created_at__gte=since)
+        return Tweet.objects.filter(tweet_filter)
+
+    @classmethod
+    def turn_pulled_tweets_into_newsfeeds(cls, user_id, objects):
+        return [
+            cls._make_pulled_newsfeed(user_id, obj) if isinstance(obj, Tweet) else obj
+            for obj in objects
+        ]
 
     @classmethod
     def push_newsfeed_to_cache(cls, newsfeed):
         # <Wayne Shih> 30-May-2022
         # Queryset is in fact lazy loading, so this line doesn't trigger db query yet
-        newsfeeds = NewsFeed.objects.filter(user_id=newsfeed.user_id).order_by('-created_at')
+        newsfeeds = NewsFeed.objects.filter(user_id=newsfeed.user_id).order_by('-created_at', '-id')
         key = USER_NEWSFEEDS_PATTERN.format(user_id=newsfeed.user_id)
         RedisHelper.push_objects(key, newsfeed, newsfeeds)
+
+    @classmethod
+    def create_newsfeeds_for_followers(
+        cls,
+        tweet_id,
+        follower_ids,
+        push_to_cache=True,
+        backdate=False,
+    ):
+        # <Wayne Shih> 18-Oct-2026
+        # Idempotent, so that a retried or redelivered fanout batch never raises on the
+        # (user, tweet) unique index nor pushes duplicates to cache. Only newsfeeds not in db
+        # yet are created and pushed. ignore_conflicts covers the ones created by a concurrent
+        # batch in the meantime.
+        # backdate is for tweets fanned out late, see update_pull_mode(). Their newsfeeds are
+        # created at the time of the tweet, so they are not piled up on top.
+        existing_follower_ids = set(NewsFeed.objects.filter(
+            tweet_id=tweet_id,
+            user_id__in=follower_ids,
+        ).values_list('user_id', flat=True))
+        new_follower_ids = [
+            follower_id
+            for follower_id in follower_ids
+            if follower_id not in existing_follower_ids
+        ]
+        if not new_follower_ids:
+            return 0
+
+        # <Wayne Shih> 18-Oct-2021
+        # Use bulk create instead, then only one insert query
+        NewsFeed.objects.bulk_create([
+            NewsFeed(user_id=follower_id, tweet_id=tweet_id)
+            for follower_id in new_follower_ids
+        ], ignore_conflicts=True)
+        if backdate:
+            NewsFeed.objects.filter(tweet_id=tweet_id, user_id__in=new_follower_ids).update(
+                created_at=Subquery(Tweet.objects.filter(id=tweet_id).values('created_at')[:1]),
+            )
+
+        # <Wayne Shih> 30-May-2022
+        # Note that bulk_create() will NOT trigger post_save() signal,
+        # so here needs to push newsfeeds to cache on our own.
+        #
+        # <Wayne Shih> 18-Oct-2026
+        # bulk_create() on MySQL doesn't set ids back to the objects, so read the batch back by
+        # the (user, tweet) unique index before caching it. Then push the whole batch at once.
+        # Otherwise, drop the cached newsfeeds, which would miss the new ones, in one round trip.
+        # Backdated newsfeeds are dropped as well, since a cached list can only be pushed on top.
+        if push_to_cache and not backdate:
+            newsfeeds = NewsFeed.objects.filter(tweet_id=tweet_id, user_id__in=new_follower_ids)
+            cls.push_newsfeeds_to_cache(newsfeeds)
+        else:
+            RedisHelper.delete_objects([
+                USER_NEWSFEEDS_PATTERN.format(user_id=follower_id)
+                for follower_id in new_follower_ids
+            ])
+        return len(new_follower_ids)
+
+    @classmethod
+    def _get_recent_tweets_for_newsfeeds(cls, user_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Recent tweets come from the user tweets cache, which holds at most REDIS_LIST_SIZE_LIMIT
+        # tweets. Tweets since the user turned into pull mode are not in newsfeeds, since they
+        # are pulled while reading newsfeeds.
+        tweets = list(TweetService.get_cached_tweets(user_id))[:settings.REDIS_LIST_SIZE_LIMIT]
+        since = cls.get_pull_mode_since(user_id)
+        if since is None:
+            return tweets
+        return [tweet for tweet in tweets if tweet.created_at < since]
+
+    @classmethod
+    def _create_newsfeeds_for_tweets(cls, user_id, tweets):
+        # <Wayne Shih> 18-Oct-2026
+        # Idempotent like fanout batches. Returns ids of tweets whose newsfeeds are created.
+        existing_tweet_ids = set(NewsFeed.objects.filter(
+            user_id=user_id,
+            tweet_id__in=[tweet.id for tweet in tweets],
+        ).values_list('tweet_id', flat=True))
+        tweets = [tweet for tweet in tweets if tweet.id not in existing_tweet_ids]
+        if not tweets:
+            return []
+
+        # <Wayne Shih> 18-Oct-2026
+        # created_at is auto_now_add, which bulk_create() cannot override. Set it to the time of
+        # each tweet afterwards in one update, so that the newsfeeds are merged in time order
+        # rather than piled up on top.
+        tweet_ids = [tweet.id for tweet in tweets]
+        NewsFeed.objects.bulk_create([
+            NewsFeed(user_id=user_id, tweet_id=tweet.id)
+            for tweet in tweets
+        ], ignore_conflicts=True)
+        NewsFeed.objects.filter(user_id=user_id, tweet_id__in=tweet_ids).update(created_at=Case(
+            *[When(tweet_id=tweet.id, then=Value(tweet.created_at)) for tweet in tweets],
+            output_field=DateTimeField(),
+        ))
+        return tweet_ids
+
+    @classmethod
+    def backfill_newsfeeds(cls, user_id, followee_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Merge recent tweets of a new following into the newsfeeds of the user, so that they
+        # show up without waiting for the next tweet.
+        tweets = cls._get_recent_tweets_for_newsfeeds(followee_id)
+        tweet_ids = cls._create_newsfeeds_for_tweets(user_id, tweets)
+        if not tweet_ids:
+            return 0
+
+        # <Wayne Shih> 18-Oct-2026
+        # Sorted sets are ordered by score, so the newsfeeds are merged into the cached ones in
+        # place. A cached list can only be pushed on top, so it is dropped and reloaded from db
+        # in order on the next read instead.
+        if settings.REDIS_TIMELINE_SORTED_SET:
+            cls.push_newsfeeds_to_cache(
+                NewsFeed.objects.filter(user_id=user_id, tweet_id__in=tweet_ids),
+            )
+        else:
+            RedisHelper.delete_objects([USER_NEWSFEEDS_PATTERN.format(user_id=user_id)])
+        return len(tweet_ids)
+
+    @classmethod
+    def build_newsfeeds_from_followings(cls, user_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Newsfeeds of a user are the latest REDIS_LIST_SIZE_LIMIT tweets of the user and the
+        # followings. Each cached tweets list is in reversed time order, so a heap based k-way
+        # merge takes the top ones in one pass without sorting all of them.
+        # Cached tweets lists are read in one pipeline, and only the missing ones are loaded one
+        # by one. Tweets since a following turned into pull mode are skipped, see
+        # _get_recent_tweets_for_newsfeeds().
+        # The newsfeeds are read back by the (user, tweet) unique index for their ids, instead of
+        # by an ORDER BY created_at over all newsfeeds of the user.
+        # https://docs.python.org/3/library/heapq.html#heapq.merge
+        user_ids = [user_id] + list(FriendshipService.get_following_user_id_set(user_id))
+        keys = {
+            tweets_user_id: USER_TWEETS_PATTERN.format(user_id=tweets_user_id)
+            for tweets_user_id in user_ids
+        }
+        cached_tweets = RedisHelper.get_cached_objects_many(keys.values())
+        pull_mode_followings = cls.get_pull_mode_followings(user_id)
+        tweets_list = []
+        for tweets_user_id, key in keys.items():
+            tweets = cached_tweets[key]
+            if tweets is None:
+                tweets = TweetService.get_cached_tweets(tweets_user_id)
+            tweets = list(tweets)[:settings.REDIS_LIST_SIZE_LIMIT]
+            since = pull_mode_followings.get(tweets_user_id)
+            if since is not None:
+                tweets = [tweet for tweet in tweets if tweet.created_at < since]
+            tweets_list.append(tweets)
+        tweets = list(islice(
+            heapq.merge(*tweets_list, key=lambda tweet: tweet.created_at, reverse=True),
+            settings.REDIS_LIST_SIZE_LIMIT,
+        ))
+        cls._create_newsfeeds_for_tweets(user_id, tweets)
+        newsfeeds = NewsFeed.objects.filter(
+            user_id=user_id,
+            tweet_id__in=[tweet.id for tweet in tweets],
+        )
+        return sorted(
+            newsfeeds,
+            key=lambda newsfeed: (newsfeed.created_at, newsfeed.id),
+            reverse=True,
+        )
+
+    @classmethod
+    def purge_newsfeeds(cls, user_id, followee_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Drop recent tweets of an unfollowed user from the newsfeeds of the user. Older ones are
+        # left in db, since they are out of the cached newsfeeds and rarely paged to.
+        tweet_ids = [
+            tweet.id
+            for tweet in TweetService.get_cached_tweets(followee_id)
+        ][:settings.REDIS_LIST_SIZE_LIMIT]
+        if not tweet_ids:
+            return 0
+
+        num_deleted, _ = NewsFeed.objects.filter(user_id=user_id, tweet_id__in=tweet_ids).delete()
+        if num_deleted:
+            RedisHelper.delete_objects([USER_NEWSFEEDS_PATTERN.format(user_id=user_id)])
+        return num_deleted
+
+    @classmethod
+    def iter_newsfeed_id_batches_of_tweet(cls, tweet_id, batch_size):
+        # <Wayne Shih> 18-Oct-2026
+        # Keyset pagination on id by the index of tweet_id, so each batch costs the same no
+        # matter how many newsfeeds have been read before.
+        last_id = 0
+        while True:
+            newsfeed_ids = list(
+                NewsFeed.objects.filter(tweet_id=tweet_id, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if newsfeed_ids:
+                yield newsfeed_ids
+            if len(newsfeed_ids) < batch_size:
+                return
+            last_id = newsfeed_ids[-1]
+
+    @classmethod
+    def delete_newsfeeds(cls, newsfeed_ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Idempotent, newsfeeds which have been deleted are skipped.
+        # Newsfeeds are deleted from db before cache. OW, a cache miss in between would load
+        # them from db back to cache.
+        newsfeeds = list(NewsFeed.objects.filter(id__in=newsfeed_ids))
+        if not newsfeeds:
+            return 0
+
+        NewsFeed.objects.filter(id__in=[newsfeed.id for newsfeed in newsfeeds]).delete()
+        RedisHelper.remove_objects_from_cached_lists([
+            (USER_NEWSFEEDS_PATTERN.format(user_id=newsfeed.user_id), newsfeed)
+            for newsfeed in newsfeeds
+        ])
+        return len(newsfeeds)
+
+    @classmethod
+    def record_fanout_batch_latency(cls, num_followers, seconds):
+        if num_followers == 0:
+            return
+        RedisHelper.update_moving_average(
+            FANOUT_SECONDS_PER_FOLLOWER_KEY,
+            seconds / num_followers,
+            FANOUT_BATCH_LATENCY_WEIGHT,
+        )
+
+    @classmethod
+    def get_fanout_batch_size(cls):
+        seconds_per_follower = RedisHelper.get_moving_average(FANOUT_SECONDS_PER_FOLLOWER_KEY)
+        if not seconds_per_follower:
+            return FANOUT_BATCH_SIZE
+        batch_size = int(FANOUT_BATCH_TARGET_SECONDS / seconds_per_follower)
+        return max(FANOUT_MIN_BATCH_SIZE, min(FANOUT_MAX_BATCH_SIZE, batch_size))
+
+    # <Wayne Shih> 18-Oct-2026
+    # Fanout progress of a tweet is a redis hash of the status of each batch, the number of
+    # batches of each status, and the total number of batches once all batches are dispatched.
+    @classmethod
+    def set_fanout_batch_status(cls, tweet_id, batch_index, status):
+        key = FANOUT_PROGRESS_PATTERN.format(tweet_id=tweet_id)
+        return RedisHelper.set_progress_status(key, batch_index, status)
+
+    @classmethod
+    def set_fanout_total_batches(cls, tweet_id, num_batches):
+        key = FANOUT_PROGRESS_PATTERN.format(tweet_id=tweet_id)
+        conn = RedisClient.get_connection()
+        pipeline = conn.pipeline()
+        pipeline.hset(key, 'total', num_batches)
+        pipeline.expire(key, settings.REDIS_KEY_EXPIRE_TIME)
+        pipeline.execute()
+
+    @classmethod
+    def get_fanout_progress(cls, tweet_id):
+        # <Wayne Shih> 18-Oct-2026
+        # Returns None if the tweet has no fanout record, e.g. it is by a pull mode user or its
+        # record has expired. total is None while batches are still being dispatched.
+        key = FANOUT_PROGRESS_PATTERN.format(tweet_id=tweet_id)
+        conn = RedisClient.get_connection()
+        if not conn.exists(key):
+            return None
+        total, done, failed = conn.hmget(key, 'total', FANOUT_BATCH_DONE, FANOUT_BATCH_FAILED)
+        return {
+            'total': int(total) if total is not None else None,
+            'done': int(done or 0),
+            'failed': int(failed or 0),
+        }
+
+    @classmethod
+    def push_newsfeeds_to_cache(cls, newsfeeds):
+        # <Wayne Shih> 18-Oct-2026
+        # Only followers whose newsfeeds are cached get pushed, all in one round trip.
+        # The others will load their newsfeeds from db on their next read.
+        keys_and_newsfeeds = [
+            (USER_NEWSFEEDS_PATTERN.format(user_id=newsfeed.user_id), newsfeed)
+            for newsfeed in newsfeeds
+        ]
+        return RedisHelper.push_objects_to_cached_lists(keys_and_newsfeeds)
@@ -11,49 +11,221 @@
 # 12-Jun-2022  Wayne Shih              Initial create
 # 12-Jun-2022  Wayne Shih              Make fanout robust
 # 14-Jun-2022  Wayne Shih              Fix fanout log
+# 18-Oct-2026  Wayne Shih              Push fanout batch to cached newsfeeds in one round trip
+# 18-Oct-2026  Wayne Shih              Skip fanout for pull mode users
+# 18-Oct-2026  Wayne Shih              React to pull mode since tweet created_at
+# 18-Oct-2026  Wayne Shih              Stream follower ids batch by batch for fanout
+# 18-Oct-2026  Wayne Shih              Make fanout batches idempotent, retried and tracked
+# 18-Oct-2026  Wayne Shih              Fan out to active followers first, defer dormant ones
+# 18-Oct-2026  Wayne Shih              Route fanout batches by author size, adapt batch size
+# 18-Oct-2026  Wayne Shih              Add tasks to backfill and purge newsfeeds on (un)follow
+# 18-Oct-2026  Wayne Shih              Add tasks to delete newsfeeds of deleted tweets
+# 18-Oct-2026  Wayne Shih              Add backdate to fanout tasks
+# 18-Oct-2026  Wayne Shih              Skip fanout of deleted tweets
+# 18-Oct-2026  Wayne Shih              Fix comment of dormant followers queue
+# 18-Oct-2026  Wayne Shih              Never skip fanout batches by their numbers
 # $HISTORY$
 # =================================================================================================
 
 
-import math
+import time
 
 from celery import shared_task
 
+from accounts.services import UserService
 from friendships.services import FriendshipService
-from newsfeeds.constants import FANOUT_BATCH_SIZE
-from newsfeeds.models import NewsFeed
+from newsfeeds.constants import (
+    FANOUT_BATCH_DONE,
+    FANOUT_BATCH_FAILED,
+    FANOUT_BATCH_MAX_RETRIES,
+    FANOUT_BATCH_RETRY_DELAY,
+    FANOUT_BATCH_SIZE,
+    FANOUT_DORMANT_AFTER,
+    FANOUT_LARGE_AUTHOR_FOLLOWERS,
+    FANOUT_PRIORITY_BATCHES,
+)
+from tweets.models import Tweet
+from utils.caches.memcached_helpers import MemcachedHelper
 from utils.time_constants import ONE_HOUR
+from utils.time_helpers import utc_now
+
+
+def _get_batch_routing_key(num_author_followers, batch_index, is_dormant):
+    # <Wayne Shih> 18-Oct-2026
+    # Queues are defined by CELERY_QUEUES in settings
+    if is_dormant:
+        return 'newsfeeds_low'
+    if num_author_followers >= FANOUT_LARGE_AUTHOR_FOLLOWERS \
+            and batch_index >= FANOUT_PRIORITY_BATCHES:
+        return 'newsfeeds_bulk'
+    return 'newsfeeds'
 
 
 @shared_task(routing_key='default', time_limit=ONE_HOUR)
-def fanout_newsfeeds_main_task(tweet_id, tweet_user_id):
-    follower_ids = FriendshipService.get_follower_ids(tweet_user_id)
-    batch_from, batch_end = 0, FANOUT_BATCH_SIZE
-    while len(follower_ids[batch_from:batch_end]) > 0:
-        fanout_newsfeeds_batch_task.delay(tweet_id, follower_ids[batch_from:batch_end])
-        batch_from, batch_end = batch_end, batch_end + FANOUT_BATCH_SIZE
+def fanout_newsfeeds_main_task(tweet_id, tweet_user_id, backdate=False):
+    from newsfeeds.services import NewsFeedService
+
+    # <Wayne Shih> 18-Oct-2026
+    # A tweet deleted before this task runs has nothing to fan out. Its newsfeeds are deleted
+    # by delete_newsfeeds_main_task(), so never retry for it.
+    tweets = MemcachedHelper.get_objects_through_cache(Tweet, [tweet_id])
+    if not tweets:
+        return f'Tweet {tweet_id} does not exist, no newsfeeds to fanout.'
+    tweet = tweets[0]
+
+    # <Wayne Shih> 18-Oct-2026
+    # Followers of pull mode users pull their tweets while reading newsfeeds.
+    if NewsFeedService.update_pull_mode(tweet_user_id, since=tweet.created_at):
+        return f'User {tweet_user_id} is in pull mode, no newsfeeds to fanout.'
+
+    # <Wayne Shih> 18-Oct-2026
+    # Each batch is dispatched as soon as it is read, so memory stays constant no matter how
+    # many followers there are.
+    #
+    # Batches are numbered for the fanout progress only. A rerun of this task for the same tweet
+    # fans out all batches again, which only creates the newsfeeds missing, since batches are
+    # idempotent. Batches are never skipped by their numbers, since followers in batch N differ
+    # between runs, e.g. batch sizes adapt and follows shift the batches after them.
+    #
+    # Active followers are fanned out on the newsfeeds queue, while dormant ones are deferred
+    # to the newsfeeds_low queue served by fewer workers, and not pushed to cache.
+    #
+    # Batch size adapts to the measured latency of recent batches.
+    active_since = utc_now() - FANOUT_DORMANT_AFTER
+    num_author_followers = FriendshipService.get_follower_count(tweet_user_id)
+    num_batches, num_followers = 0, 0
+    for follower_ids in FriendshipService.iter_follower_id_batches(
+        tweet_user_id,
+        batch_size=NewsFeedService.get_fanout_batch_size(),
+    ):
+        dormant_follower_ids = UserService.get_dormant_user_ids(follower_ids, active_since)
+        active_follower_ids = [
+            follower_id
+            for follower_id in follower_ids
+            if follower_id not in dormant_follower_ids
+        ]
+        for batch_follower_ids, is_dormant in (
+            (active_follower_ids, False),
+            (sorted(dormant_follower_ids), True),
+        ):
+            if not batch_follower_ids:
+                continue
+            fanout_newsfeeds_batch_task.apply_async(
+                args=(tweet_id, batch_follower_ids),
+                kwargs={
+                    'batch_index': num_batches,
+                    'is_dormant': is_dormant,
+                    'backdate': backdate,
+                },
+                routing_key=_get_batch_routing_key(num_author_followers, num_batches, is_dormant),
+            )
+            num_batches += 1
+        num_followers += len(follower_ids)
+    NewsFeedService.set_fanout_total_batches(tweet_id, num_batches)
+
+    return f'{num_batches} batches created, going to fanout {num_followers} newsfeeds.'
+
+
+@shared_task(
+    bind=True,
+    routing_key='newsfeeds',
+    time_limit=ONE_HOUR,
+    max_retries=FANOUT_BATCH_MAX_RETRIES,
+)
+def fanout_newsfeeds_batch_task(
+    self,
+    tweet_id,
+    follower_ids,
+    batch_index=None,
+    is_dormant=False,
+    backdate=False,
+):
+    from newsfeeds.services import NewsFeedService
+
+    # <Wayne Shih> 18-Oct-2026
+    # Retry with exponential backoff. Creating newsfeeds is idempotent, so a retried batch
+    # resumes from where it failed.
+    # - https://docs.celeryq.dev/en/stable/userguide/tasks.html#retrying
+    try:
+        started_at = time.monotonic()
+        num_created = NewsFeedService.create_newsfeeds_for_followers(
+            tweet_id,
+            follower_ids,
+            push_to_cache=not is_dormant,
+            backdate=backdate,
+        )
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            if batch_index is not None:
+                NewsFeedService.set_fanout_batch_status(tweet_id, batch_index, FANOUT_BATCH_FAILED)
+            raise
+        raise self.retry(exc=exc, countdown=FANOUT_BATCH_RETRY_DELAY * 2 ** self.request.retries)
+
+    if num_created:
+        NewsFeedService.record_fanout_batch_latency(
+            len(follower_ids),
+            time.monotonic() - started_at,
+        )
+    # <Wayne Shih> 18-Oct-2026
+    # batch_index is None for a batch not tracked by fanout progress
+    if batch_index is not None:
+        NewsFeedService.set_fanout_batch_status(tweet_id, batch_index, FANOUT_BATCH_DONE)
+    return f'{num_created} newsfeeds created.'
+
 
-    return f'{math.ceil(len(follower_ids) / FANOUT_BATCH_SIZE)} batches created, '\
-           f'going to fanout {len(follower_ids)} newsfeeds.'
+# <Wayne Shih> 18-Oct-2026
+# Newsfeeds are updated asynchronously on follow and unfollow, so the friendship apis never wait
+# for hundreds of newsfeeds to be written.
+@shared_task(routing_key='newsfeeds', time_limit=ONE_HOUR)
+def backfill_newsfeeds_task(user_id, followee_id):
+    from newsfeeds.services import NewsFeedService
+
+    num_created = NewsFeedService.backfill_newsfeeds(user_id, followee_id)
+    return f'{num_created} newsfeeds backfilled.'
 
 
 @shared_task(routing_key='newsfeeds', time_limit=ONE_HOUR)
-def fanout_newsfeeds_batch_task(tweet_id, follower_ids):
+def purge_newsfeeds_task(user_id, followee_id):
+    from newsfeeds.services import NewsFeedService
+
+    num_deleted = NewsFeedService.purge_newsfeeds(user_id, followee_id)
+    return f'{num_deleted} newsfeeds purged.'
+
+
+@shared_task(routing_key='default', time_limit=ONE_HOUR)
+def delete_newsfeeds_main_task(tweet_id):
+    from newsfeeds.services import NewsFeedService
+
+    # <Wayne Shih> 18-Oct-2026
+    # Fan-in of a deleted tweet, the reverse of fanout. Newsfeeds of the tweet are read batch
+    # by batch and deleted by batch tasks.
+    num_batches, num_newsfeeds = 0, 0
+    for newsfeed_ids in NewsFeedService.iter_newsfeed_id_batches_of_tweet(
+        tweet_id,
+        batch_size=FANOUT_BATCH_SIZE,
+    ):
+        delete_newsfeeds_batch_task.delay(newsfeed_ids)
+        num_batches += 1
+        num_newsfeeds += len(newsfeed_ids)
+
+    return f'{num_batches} batches created, going to delete {num_newsfeeds} newsfeeds.'
+
+
+@shared_task(
+    bind=True,
+    routing_key='newsfeeds',
+    time_limit=ONE_HOUR,
+    max_retries=FANOUT_BATCH_MAX_RETRIES,
+)
+def delete_newsfeeds_batch_task(self, newsfeed_ids):
     from newsfeeds.services import NewsFeedService
 
-    # follower_ids = FriendshipService.get_follower_ids(tweet_user_id)
-    newsfeeds = [
-        NewsFeed(user_id=follower_id, tweet_id=tweet_id)
-        for follower_id in follower_ids
-    ]
-    # <Wayne Shih> 18-Oct-2021
-    # Use bulk create instead, then only one insert query
-    NewsFeed.objects.bulk_create(newsfeeds)
-
-    # <Wayne Shih> 30-May-2022
-    # Note that bulk_create() will NOT trigger post_save() signal,
-    # so here needs to push newsfeeds to cache on our own.
-    for newsfeed in newsfeeds:
-        NewsFeedService.push_newsfeed_to_cache(newsfeed)
-
-    return f'{len(newsfeeds)} newsfeeds created.'
+    # <Wayne Shih> 18-Oct-2026
+    # Retry like fanout batches, deleting newsfeeds is idempotent as well
+    try:
+        num_deleted = NewsFeedService.delete_newsfeeds(newsfeed_ids)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            raise
+        raise self.retry(exc=exc, countdown=FANOUT_BATCH_RETRY_DELAY * 2 ** self.request.retries)
+    return f'{num_deleted} newsfeeds deleted.'
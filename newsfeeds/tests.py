@@ -10,19 +10,74 @@
 # 30-May-2022  Wayne Shih              Test user newsfeeds cache, react to utils file structure refactor
 # 12-Jun-2022  Wayne Shih              Add tests for fanout_newsfeeds_main_task()
 # 14-Jun-2022  Wayne Shih              Test fanout log
+# 18-Oct-2026  Wayne Shih              Add tests for pushing fanout batch to cached newsfeeds
+# 18-Oct-2026  Wayne Shih              Add tests for pull mode fanout and newsfeeds
+# 18-Oct-2026  Wayne Shih              React to pull mode since tweet created_at
+# 18-Oct-2026  Wayne Shih              Add a test for fanout progress
+# 18-Oct-2026  Wayne Shih              Add a test for fanout to dormant followers
+# 18-Oct-2026  Wayne Shih              Add tests for fanout routing and adaptive batch size
+# 18-Oct-2026  Wayne Shih              Test newsfeeds backfill and purge on follow and unfollow
+# 18-Oct-2026  Wayne Shih              Test deleting newsfeeds of deleted tweets
+# 18-Oct-2026  Wayne Shih              Add test for rebuilding newsfeeds from followings
+# 18-Oct-2026  Wayne Shih              Add test for leaving pull mode
+# 18-Oct-2026  Wayne Shih              Add test for fanout of deleted tweet
+# 18-Oct-2026  Wayne Shih              Run tests in timeline modes by _run_in_timeline_modes()
+# 18-Oct-2026  Wayne Shih              Run delete newsfeeds test by _run_in_timeline_modes()
+# 18-Oct-2026  Wayne Shih              Run rebuild newsfeeds test by _run_in_timeline_modes()
+# 18-Oct-2026  Wayne Shih              Add test for rebuilding newsfeeds in refill lock
+# 18-Oct-2026  Wayne Shih              Test fanout batches are never skipped by numbers
+# 18-Oct-2026  Wayne Shih              React to rebuilding from cached tweets lists
+# 18-Oct-2026  Wayne Shih              Add tests for pull mode hysteresis and bounded late fanout
 # $HISTORY$
 # =================================================================================================
 
 
 import re
-
-from newsfeeds.constants import FANOUT_BATCH_SIZE
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from accounts.services import UserService
+from friendships.models import Friendship
+from newsfeeds.constants import (
+    FANOUT_BATCH_MAX_RETRIES,
+    FANOUT_BATCH_SIZE,
+    FANOUT_DORMANT_AFTER,
+    FANOUT_LARGE_AUTHOR_FOLLOWERS,
+    FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD,
+    FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD,
+)
 from newsfeeds.models import NewsFeed
 from newsfeeds.services import NewsFeedService
-from newsfeeds.tasks import fanout_newsfeeds_main_task
+from newsfeeds.tasks import (
+    backfill_newsfeeds_task,
+    delete_newsfeeds_main_task,
+    fanout_newsfeeds_batch_task,
+    fanout_newsfeeds_main_task,
+    purge_newsfeeds_task,
+)
 from testing.testcases import TestCase
-from twitter.caches import USER_NEWSFEEDS_PATTERN
+from tweets.models import Tweet
+from tweets.services import TweetService
+from twitter.caches import PULL_MODE_USERS_KEY, USER_LAST_ACTIVITY_KEY, USER_NEWSFEEDS_PATTERN
 from utils.caches.redis_client import RedisClient
+from utils.caches.redis_helpers import RedisHelper
+from utils.time_helpers import datetime_to_timestamp_us, utc_now
+
+
+def _run_in_timeline_modes(test_case, test_func, reset_models=(), **extra_settings):
+    # <Wayne Shih> 18-Oct-2026
+    # Run test_func with timelines cached in lists and in sorted sets, each from a clean cache
+    # and with reset_models emptied
+    for timeline_settings in ({}, {'REDIS_TIMELINE_SORTED_SET': True}):
+        test_case.clear_cache()
+        for model_class in reset_models:
+            model_class.objects.all().delete()
+        with test_case.subTest(**timeline_settings), \
+                test_case.settings(**timeline_settings, **extra_settings):
+            test_func()
 
 
 class NewsfeedTests(TestCase):
@@ -66,8 +121,9 @@ class NewsfeedTests(TestCase):
     def test_newsfeed_on_delete(self):
         self.user.delete()
         self.assertEqual(NewsFeed.objects.first().user, None)
+        # newsfeeds of a deleted tweet are deleted  <Wayne Shih> 18-Oct-2026
         self.tweet.delete()
-        self.assertEqual(NewsFeed.objects.first().tweet, None)
+        self.assertEqual(NewsFeed.objects.exists(), False)
 
     def test_time(self):
         old_created_time = self.newsfeed.created_at
@@ -152,6 +208,75 @@ class NewsfeedCacheTests(TestCase):
         self.assertEqual([feed.id for feed in kd35_newsfeeds], newsfeed_ids)
         self.assertEqual(type(kd35_newsfeeds), list)
 
+    def test_build_newsfeeds_from_followings(self):
+        _run_in_timeline_modes(
+            self,
+            self._test_build_newsfeeds_from_followings,
+            reset_models=(Tweet, NewsFeed, Friendship),
+            NEWSFEED_REBUILD_FROM_FOLLOWINGS=True,
+        )
+
+    def _test_build_newsfeeds_from_followings(self):
+        lbj23 = self.create_user(username=f'lbj23:{User.objects.count()}')
+        curry30 = self.create_user(username=f'curry30:{User.objects.count()}')
+        self.create_friendship(self.kd35, lbj23)
+        self.create_friendship(self.kd35, curry30)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets are not fanned out, e.g. kd35 has just followed lbj23 and curry30
+        tweets = []
+        for i in range(settings.REDIS_LIST_SIZE_LIMIT):
+            for user in (lbj23, curry30, self.kd35):
+                tweets.append(self.create_tweet(user, f'{user.username} tweet - {i}'))
+        tweets = tweets[::-1][:settings.REDIS_LIST_SIZE_LIMIT]
+        kd35_tweet = tweets[0]
+        kd35_feed = self.create_newsfeed(self.kd35, kd35_tweet)
+        self.clear_cache()
+
+        # the latest tweets are merged and created as newsfeeds  <Wayne Shih> 18-Oct-2026
+        kd35_newsfeeds = list(NewsFeedService.get_cached_newsfeeds(self.kd35.id))
+        self.assertEqual([feed.tweet_id for feed in kd35_newsfeeds], [t.id for t in tweets])
+        self.assertEqual(kd35_newsfeeds[0].id, kd35_feed.id)
+        for feed in kd35_newsfeeds:
+            self.assertEqual(feed.id is None, False)
+        self.assertEqual(
+            NewsFeed.objects.filter(user_id=self.kd35.id).count(),
+            settings.REDIS_LIST_SIZE_LIMIT,
+        )
+
+        # test cache hit  <Wayne Shih> 18-Oct-2026
+        key_kd35 = USER_NEWSFEEDS_PATTERN.format(user_id=self.kd35.id)
+        self.assertEqual(RedisHelper.is_cached(key_kd35), True)
+        cached_kd35_newsfeeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(
+            [feed.id for feed in cached_kd35_newsfeeds],
+            [feed.id for feed in kd35_newsfeeds],
+        )
+
+    def test_build_newsfeeds_from_followings_in_refill_lock(self):
+        lbj23 = self.create_user(username='lbj23')
+        self.create_friendship(self.kd35, lbj23)
+        tweets = [self.create_tweet(lbj23, f'lbj23 tweet - {i}') for i in range(3)][::-1]
+        self.clear_cache()
+
+        # readers without the refill lock read db and never rebuild  <Wayne Shih> 18-Oct-2026
+        conn = RedisClient.get_connection()
+        key_kd35 = USER_NEWSFEEDS_PATTERN.format(user_id=self.kd35.id)
+        conn.set(f'{key_kd35}:refill_lock', 'someone else')
+        with self.settings(NEWSFEED_REBUILD_FROM_FOLLOWINGS=True, REDIS_REFILL_WAIT_TIME=0.05):
+            self.assertEqual(list(NewsFeedService.get_cached_newsfeeds(self.kd35.id)), [])
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).exists(), False)
+        conn.delete(f'{key_kd35}:refill_lock')
+
+        # <Wayne Shih> 18-Oct-2026
+        # The lock holder rebuilds from cached tweets lists, and only reads db for the missing
+        # ones, here the empty tweets of kd35 by 2 queries.
+        TweetService.get_cached_tweets(lbj23.id)
+        with self.settings(NEWSFEED_REBUILD_FROM_FOLLOWINGS=True), self.assertNumQueries(7):
+            kd35_newsfeeds = list(NewsFeedService.get_cached_newsfeeds(self.kd35.id))
+        self.assertEqual([feed.tweet_id for feed in kd35_newsfeeds], [t.id for t in tweets])
+        self.assertEqual(RedisHelper.is_cached(key_kd35), True)
+
 
 class NewsfeedTaskTests(TestCase):
 
@@ -186,7 +311,8 @@ class NewsfeedTaskTests(TestCase):
         msg = fanout_newsfeeds_main_task(self.lbj23_tweet2.id, self.lbj23.id)
         cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
         self.assertEqual(len(cached_kd35_feeds), 2)
-        self.assertEqual(NewsFeed.objects.count(), 1 + FANOUT_BATCH_SIZE)
+        # new followers get tweet1 backfilled on follow  <Wayne Shih> 18-Oct-2026
+        self.assertEqual(NewsFeed.objects.count(), 1 + (FANOUT_BATCH_SIZE - 1) + FANOUT_BATCH_SIZE)
         self.assertEqual(msg, expected_msg.format(
             num_batches=1,
             num_newsfeeds=FANOUT_BATCH_SIZE,
@@ -200,10 +326,517 @@ class NewsfeedTaskTests(TestCase):
         self.clear_cache()
         cached_curry30_feeds = NewsFeedService.get_cached_newsfeeds(curry30.id)
         self.assertEqual(len(cached_kd35_feeds), 3)
-        self.assertEqual(len(cached_curry30_feeds), 1)
-        self.assertEqual(NewsFeed.objects.count(), 1 + FANOUT_BATCH_SIZE + (FANOUT_BATCH_SIZE + 1))
+        self.assertEqual(len(cached_curry30_feeds), 3)
+        self.assertEqual(
+            NewsFeed.objects.count(),
+            1 + (FANOUT_BATCH_SIZE - 1) + FANOUT_BATCH_SIZE + 2 + (FANOUT_BATCH_SIZE + 1),
+        )
         self.assertEqual(msg, expected_msg.format(
             num_batches=2,
             num_newsfeeds=FANOUT_BATCH_SIZE + 1,
         ))
 
+    def test_fanout_main_task_of_deleted_tweet(self):
+        lbj23_tweet = self.create_tweet(self.lbj23, 'I am coming home!!')
+        tweet_id = lbj23_tweet.id
+        lbj23_tweet.delete()
+        msg = fanout_newsfeeds_main_task(tweet_id, self.lbj23.id)
+        self.assertEqual(msg, f'Tweet {tweet_id} does not exist, no newsfeeds to fanout.')
+        self.assertEqual(NewsFeed.objects.count(), 0)
+
+    def test_fanout_batch_task(self):
+        curry30 = self.create_user(username='curry30')
+        self.create_friendship(curry30, self.lbj23)
+        conn = RedisClient.get_connection()
+        key_kd35 = USER_NEWSFEEDS_PATTERN.format(user_id=self.kd35.id)
+        key_curry30 = USER_NEWSFEEDS_PATTERN.format(user_id=curry30.id)
+
+        # kd35's newsfeeds are cached while curry30's are not  <Wayne Shih> 18-Oct-2026
+        kd35_tweet = self.create_tweet(self.kd35, 'kd35 tweet')
+        kd35_feed = self.create_newsfeed(self.kd35, kd35_tweet)
+        NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(conn.exists(key_kd35), True)
+        self.assertEqual(conn.exists(key_curry30), False)
+
+        lbj23_tweet = self.create_tweet(self.lbj23, 'I am coming home!!')
+        msg = fanout_newsfeeds_batch_task(lbj23_tweet.id, [self.kd35.id, curry30.id])
+        self.assertEqual(msg, '2 newsfeeds created.')
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=lbj23_tweet.id).count(), 2)
+
+        # cached newsfeeds get pushed with ids, cold ones are skipped  <Wayne Shih> 18-Oct-2026
+        lbj23_feed_to_kd35 = NewsFeed.objects.get(user_id=self.kd35.id, tweet_id=lbj23_tweet.id)
+        self.assertEqual(conn.llen(key_kd35), 2)
+        self.assertEqual(conn.exists(key_curry30), False)
+        cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(
+            [feed.id for feed in cached_kd35_feeds],
+            [lbj23_feed_to_kd35.id, kd35_feed.id],
+        )
+
+        # cold newsfeeds are loaded from db on next read  <Wayne Shih> 18-Oct-2026
+        cached_curry30_feeds = NewsFeedService.get_cached_newsfeeds(curry30.id)
+        self.assertEqual([feed.tweet_id for feed in cached_curry30_feeds], [lbj23_tweet.id])
+        self.assertEqual(conn.exists(key_curry30), True)
+
+    def test_fanout_progress(self):
+        for i in range(FANOUT_BATCH_SIZE):
+            user = self.create_user(f'user:{i}')
+            self.create_friendship(user, self.lbj23)
+        conn = RedisClient.get_connection()
+        key_kd35 = USER_NEWSFEEDS_PATTERN.format(user_id=self.kd35.id)
+        self.create_newsfeed(self.kd35, self.create_tweet(self.kd35, 'kd35 tweet'))
+        NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+
+        lbj23_tweet = self.create_tweet(self.lbj23, 'I am coming home!!')
+        self.assertEqual(NewsFeedService.get_fanout_progress(lbj23_tweet.id), None)
+        fanout_newsfeeds_main_task(lbj23_tweet.id, self.lbj23.id)
+        self.assertEqual(
+            NewsFeedService.get_fanout_progress(lbj23_tweet.id),
+            {'total': 2, 'done': 2, 'failed': 0},
+        )
+        self.assertEqual(conn.llen(key_kd35), 2)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Rerun of the fanout or a batch creates no duplicates nor pushes them to cache
+        fanout_newsfeeds_main_task(lbj23_tweet.id, self.lbj23.id)
+        msg = fanout_newsfeeds_batch_task(lbj23_tweet.id, [self.kd35.id], batch_index=0)
+        self.assertEqual(msg, '0 newsfeeds created.')
+        msg = fanout_newsfeeds_batch_task(lbj23_tweet.id, [self.kd35.id])
+        self.assertEqual(msg, '0 newsfeeds created.')
+        self.assertEqual(
+            NewsFeedService.get_fanout_progress(lbj23_tweet.id),
+            {'total': 2, 'done': 2, 'failed': 0},
+        )
+        self.assertEqual(
+            NewsFeed.objects.filter(tweet_id=lbj23_tweet.id).count(),
+            1 + FANOUT_BATCH_SIZE,
+        )
+        self.assertEqual(conn.llen(key_kd35), 2)
+
+        # <Wayne Shih> 18-Oct-2026
+        # A batch of a rerun is never skipped by its number, which might hold other followers
+        curry30 = self.create_user('curry30')
+        self.create_friendship(curry30, self.lbj23)
+        NewsFeed.objects.filter(user_id=curry30.id).delete()
+        msg = fanout_newsfeeds_batch_task(lbj23_tweet.id, [curry30.id], batch_index=0)
+        self.assertEqual(msg, '1 newsfeeds created.')
+        self.assertEqual(
+            NewsFeed.objects.filter(user_id=curry30.id, tweet_id=lbj23_tweet.id).exists(),
+            True,
+        )
+
+        # failed batch is retried, then marked as failed  <Wayne Shih> 18-Oct-2026
+        lbj23_tweet = self.create_tweet(self.lbj23, 'Believeland')
+        with mock.patch.object(
+            NewsFeedService,
+            'create_newsfeeds_for_followers',
+            side_effect=Exception('db is down'),
+        ) as create_newsfeeds_for_followers:
+            result = fanout_newsfeeds_batch_task.apply(
+                args=[lbj23_tweet.id, [self.kd35.id]],
+                kwargs={'batch_index': 0},
+            )
+        self.assertEqual(result.failed(), True)
+        self.assertEqual(create_newsfeeds_for_followers.call_count, FANOUT_BATCH_MAX_RETRIES + 1)
+        self.assertEqual(
+            NewsFeedService.get_fanout_progress(lbj23_tweet.id),
+            {'total': None, 'done': 0, 'failed': 1},
+        )
+
+        # failed batch is done once it succeeds  <Wayne Shih> 18-Oct-2026
+        fanout_newsfeeds_batch_task(lbj23_tweet.id, [self.kd35.id], batch_index=0)
+        self.assertEqual(
+            NewsFeedService.get_fanout_progress(lbj23_tweet.id),
+            {'total': None, 'done': 1, 'failed': 0},
+        )
+        self.assertEqual(conn.llen(key_kd35), 3)
+
+    def test_fanout_dormant_followers(self):
+        curry30, curry30_client = self.create_user_and_auth_client(username='curry30')
+        self.create_friendship(curry30, self.lbj23)
+        conn = RedisClient.get_connection()
+
+        # last activity is recorded by requests  <Wayne Shih> 18-Oct-2026
+        self.assertEqual(conn.zscore(USER_LAST_ACTIVITY_KEY, curry30.id), None)
+        curry30_client.get('/api/newsfeeds/')
+        self.assertNotEqual(conn.zscore(USER_LAST_ACTIVITY_KEY, curry30.id), None)
+
+        # <Wayne Shih> 18-Oct-2026
+        # kd35 has been dormant while curry30 is active. Both have newsfeeds cached.
+        dormant_since = utc_now() - FANOUT_DORMANT_AFTER - timedelta(days=1)
+        conn.zadd(USER_LAST_ACTIVITY_KEY, {self.kd35.id: datetime_to_timestamp_us(dormant_since)})
+        for user in (self.kd35, curry30):
+            self.create_newsfeed(user, self.create_tweet(user))
+            NewsFeedService.get_cached_newsfeeds(user.id)
+        self.assertEqual(
+            UserService.get_dormant_user_ids(
+                [self.kd35.id, curry30.id],
+                active_since=utc_now() - FANOUT_DORMANT_AFTER,
+            ),
+            {self.kd35.id},
+        )
+
+        lbj23_tweet = self.create_tweet(self.lbj23, 'I am coming home!!')
+        msg = fanout_newsfeeds_main_task(lbj23_tweet.id, self.lbj23.id)
+        self.assertEqual(msg, '2 batches created, going to fanout 2 newsfeeds.')
+        self.assertEqual(
+            NewsFeedService.get_fanout_progress(lbj23_tweet.id),
+            {'total': 2, 'done': 2, 'failed': 0},
+        )
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=lbj23_tweet.id).count(), 2)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Active follower gets the newsfeed pushed, while the cached newsfeeds of dormant one are
+        # dropped and reloaded from db on next read
+        key_curry30 = USER_NEWSFEEDS_PATTERN.format(user_id=curry30.id)
+        key_kd35 = USER_NEWSFEEDS_PATTERN.format(user_id=self.kd35.id)
+        self.assertEqual(conn.llen(key_curry30), 2)
+        self.assertEqual(conn.exists(key_kd35), False)
+        cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(cached_kd35_feeds[0].tweet_id, lbj23_tweet.id)
+        self.assertEqual(len(cached_kd35_feeds), 2)
+
+    def test_fanout_routing(self):
+        for i in range(FANOUT_LARGE_AUTHOR_FOLLOWERS):
+            user = self.create_user(f'user:{i}')
+            self.create_friendship(user, self.lbj23)
+        lbj23_tweet = self.create_tweet(self.lbj23, 'I am coming home!!')
+        with mock.patch.object(
+            fanout_newsfeeds_batch_task,
+            'apply_async',
+            wraps=fanout_newsfeeds_batch_task.apply_async,
+        ) as apply_async:
+            fanout_newsfeeds_main_task(lbj23_tweet.id, self.lbj23.id)
+        # <Wayne Shih> 18-Oct-2026
+        # lbj23 has become a large author, so only the first batch goes to the newsfeeds queue
+        routing_keys = [call.kwargs['routing_key'] for call in apply_async.call_args_list]
+        self.assertEqual(len(routing_keys), 2)
+        self.assertEqual(routing_keys, ['newsfeeds', 'newsfeeds_bulk'])
+        self.assertEqual(
+            NewsFeed.objects.filter(tweet_id=lbj23_tweet.id).count(),
+            FANOUT_LARGE_AUTHOR_FOLLOWERS + 1,
+        )
+
+    def test_adaptive_fanout_batch_size(self):
+        self.assertEqual(NewsFeedService.get_fanout_batch_size(), FANOUT_BATCH_SIZE)
+        with mock.patch.multiple(
+            'newsfeeds.services',
+            FANOUT_BATCH_TARGET_SECONDS=1.0,
+            FANOUT_MIN_BATCH_SIZE=10,
+            FANOUT_MAX_BATCH_SIZE=1000,
+        ):
+            # 10ms per follower  <Wayne Shih> 18-Oct-2026
+            NewsFeedService.record_fanout_batch_latency(100, 1.0)
+            self.assertEqual(NewsFeedService.get_fanout_batch_size(), 100)
+            # <Wayne Shih> 18-Oct-2026
+            # Slower batches shrink the batch size, by the moving average
+            NewsFeedService.record_fanout_batch_latency(100, 6.0)
+            self.assertEqual(NewsFeedService.get_fanout_batch_size(), 50)
+            for _ in range(50):
+                NewsFeedService.record_fanout_batch_latency(100, 1000.0)
+            self.assertEqual(NewsFeedService.get_fanout_batch_size(), 10)
+            for _ in range(100):
+                NewsFeedService.record_fanout_batch_latency(1000, 0.001)
+            self.assertEqual(NewsFeedService.get_fanout_batch_size(), 1000)
+
+    def test_delete_newsfeeds_of_deleted_tweet(self):
+        _run_in_timeline_modes(self, self._test_delete_newsfeeds_of_deleted_tweet)
+
+    def _test_delete_newsfeeds_of_deleted_tweet(self):
+        users = [self.kd35]
+        for i in range(FANOUT_BATCH_SIZE):
+            user = self.create_user(f'user:{self.lbj23.id}:{i}')
+            self.create_friendship(user, self.lbj23)
+            users.append(user)
+        kd35_tweet = self.create_tweet(self.kd35, 'kd35 tweet')
+        NewsFeedService.fanout_to_followers(kd35_tweet)
+        lbj23_tweet = self.create_tweet(self.lbj23, 'I am coming home!!')
+        NewsFeedService.fanout_to_followers(lbj23_tweet)
+        for user in users:
+            NewsFeedService.get_cached_newsfeeds(user.id)
+        self.assertEqual(
+            NewsFeed.objects.filter(tweet_id=lbj23_tweet.id).count(),
+            FANOUT_BATCH_SIZE + 2,
+        )
+
+        # <Wayne Shih> 18-Oct-2026
+        # Newsfeeds of the tweet are deleted from db and cache in batches
+        lbj23_tweet_id = lbj23_tweet.id
+        lbj23_tweet.delete()
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=lbj23_tweet_id).exists(), False)
+        self.assertEqual(
+            [feed.tweet_id for feed in NewsFeedService.get_cached_newsfeeds(self.kd35.id)],
+            [kd35_tweet.id],
+        )
+        for user in users[1:]:
+            self.assertEqual(len(NewsFeedService.get_cached_newsfeeds(user.id)), 0)
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=kd35_tweet.id).count(), 1)
+
+        msg = delete_newsfeeds_main_task(lbj23_tweet_id)
+        self.assertEqual(msg, '0 batches created, going to delete 0 newsfeeds.')
+
+        for user in users[1:]:
+            user.delete()
+        kd35_tweet.delete()
+
+
+class NewsfeedPullModeTests(TestCase):
+
+    def setUp(self):
+        self.clear_cache()
+
+        self.mj23 = self.create_user(username='mj23')
+        self.kd35 = self.create_user(username='kd35')
+        self.create_friendship(self.kd35, self.mj23)
+        for i in range(FANOUT_PULL_MODE_FOLLOWERS_THRESHOLD - 1):
+            user = self.create_user(f'mj23_follower:{i}')
+            self.create_friendship(user, self.mj23)
+
+    def _drop_followers_below_push_mode_threshold(self):
+        # followers except kd35  <Wayne Shih> 18-Oct-2026
+        follower_ids = Friendship.objects.filter(to_user_id=self.mj23.id)\
+            .exclude(from_user_id=self.kd35.id)\
+            .values_list('id', flat=True)
+        num_followers = Friendship.objects.filter(to_user_id=self.mj23.id).count()
+        num_to_drop = num_followers - FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD + 1
+        for friendship in Friendship.objects.filter(id__in=list(follower_ids)[:num_to_drop]):
+            friendship.delete()
+
+    def test_pull_mode_fanout(self):
+        conn = RedisClient.get_connection()
+        mj23_tweet = self.create_tweet(self.mj23, 'I am back!')
+        NewsFeedService.fanout_to_followers(mj23_tweet)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Only the newsfeed of mj23 himself is created
+        self.assertEqual(conn.zscore(PULL_MODE_USERS_KEY, self.mj23.id) is None, False)
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=mj23_tweet.id).count(), 1)
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).count(), 0)
+
+        # <Wayne Shih> 18-Oct-2026
+        # mj23 stays in pull mode just below the threshold to enter it
+        Friendship.objects.filter(from_user_id=self.kd35.id, to_user_id=self.mj23.id).delete()
+        mj23_tweet = self.create_tweet(self.mj23, 'I am back again!')
+        NewsFeedService.fanout_to_followers(mj23_tweet)
+        self.assertEqual(conn.zscore(PULL_MODE_USERS_KEY, self.mj23.id) is None, False)
+        self.assertEqual(NewsFeed.objects.filter(tweet_id=mj23_tweet.id).count(), 1)
+
+        # <Wayne Shih> 18-Oct-2026
+        # mj23 falls back to push mode below FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD
+        self._drop_followers_below_push_mode_threshold()
+        mj23_tweet = self.create_tweet(self.mj23, 'I am back once more!')
+        NewsFeedService.fanout_to_followers(mj23_tweet)
+        self.assertEqual(conn.zscore(PULL_MODE_USERS_KEY, self.mj23.id) is None, True)
+        self.assertEqual(
+            NewsFeed.objects.filter(tweet_id=mj23_tweet.id).count(),
+            FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD,
+        )
+
+    def test_leave_pull_mode(self):
+        pulled_tweet = self.create_tweet(self.mj23, 'pulled tweet')
+        NewsFeedService.fanout_to_followers(pulled_tweet)
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).count(), 0)
+
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets posted in pull mode are fanned out late at their own time, once mj23 falls
+        # back to push mode
+        self._drop_followers_below_push_mode_threshold()
+        pushed_tweet = self.create_tweet(self.mj23, 'pushed tweet')
+        NewsFeedService.fanout_to_followers(pushed_tweet)
+        self.assertEqual(NewsFeedService.get_pull_mode_since(self.mj23.id), None)
+        kd35_newsfeeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(
+            [feed.tweet_id for feed in kd35_newsfeeds],
+            [pushed_tweet.id, pulled_tweet.id],
+        )
+        self.assertEqual(kd35_newsfeeds[1].id is None, False)
+        self.assertEqual(kd35_newsfeeds[1].created_at, pulled_tweet.created_at)
+        self.assertEqual(
+            NewsFeed.objects.filter(tweet_id=pulled_tweet.id).count(),
+            FANOUT_PUSH_MODE_FOLLOWERS_THRESHOLD,
+        )
+
+    def test_leave_pull_mode_with_many_pulled_tweets(self):
+        # <Wayne Shih> 18-Oct-2026
+        # Only the latest REDIS_LIST_SIZE_LIMIT tweets posted in pull mode are fanned out late
+        pulled_tweets = []
+        for i in range(settings.REDIS_LIST_SIZE_LIMIT + 2):
+            pulled_tweet = self.create_tweet(self.mj23, f'pulled tweet - {i}')
+            NewsFeedService.fanout_to_followers(pulled_tweet)
+            pulled_tweets.append(pulled_tweet)
+        self._drop_followers_below_push_mode_threshold()
+        with mock.patch.object(fanout_newsfeeds_main_task, 'delay') as delay:
+            NewsFeedService.update_pull_mode(self.mj23.id, since=utc_now())
+        self.assertEqual(
+            [call.args[0] for call in delay.call_args_list],
+            [tweet.id for tweet in pulled_tweets[::-1][:settings.REDIS_LIST_SIZE_LIMIT]],
+        )
+
+    def test_get_newsfeeds_with_pull_mode_followings(self):
+        lbj23 = self.create_user(username='lbj23')
+        self.create_friendship(self.kd35, lbj23)
+        tweets = []
+        for i in range(3):
+            for user in (self.mj23, lbj23):
+                tweet = self.create_tweet(user, f'{user.username} tweet - {i}')
+                NewsFeedService.fanout_to_followers(tweet)
+                tweets.append(tweet)
+        tweets = tweets[::-1]
+
+        # <Wayne Shih> 18-Oct-2026
+        # mj23's tweets are pulled while lbj23's tweets are pushed
+        kd35_newsfeeds = list(NewsFeedService.get_cached_newsfeeds(self.kd35.id))
+        self.assertEqual([feed.tweet_id for feed in kd35_newsfeeds], [t.id for t in tweets])
+        for feed in kd35_newsfeeds:
+            self.assertEqual(feed.user_id, self.kd35.id)
+            self.assertEqual(feed.id is None, feed.cached_tweet.user_id == self.mj23.id)
+
+        # pull mode tweets are not seen after unfollowing  <Wayne Shih> 18-Oct-2026
+        Friendship.objects.filter(from_user_id=self.kd35.id, to_user_id=self.mj23.id).delete()
+        kd35_newsfeeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(
+            [feed.tweet_id for feed in kd35_newsfeeds],
+            [tweet.id for tweet in tweets if tweet.user_id == lbj23.id],
+        )
+
+    def test_get_newsfeeds_before_and_after_pull_mode(self):
+        # <Wayne Shih> 18-Oct-2026
+        # mj23 is in push mode after losing a follower
+        Friendship.objects.filter(to_user_id=self.mj23.id).exclude(from_user_id=self.kd35.id)\
+            .first()\
+            .delete()
+        pushed_tweet = self.create_tweet(self.mj23, 'pushed tweet')
+        NewsFeedService.fanout_to_followers(pushed_tweet)
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).count(), 1)
+
+        # <Wayne Shih> 18-Oct-2026
+        # mj23 is in pull mode again, tweets fanned out before pull mode are not duplicated
+        self.create_friendship(self.create_user('mj23_new_follower'), self.mj23)
+        pulled_tweet = self.create_tweet(self.mj23, 'pulled tweet')
+        NewsFeedService.fanout_to_followers(pulled_tweet)
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).count(), 1)
+
+        kd35_newsfeeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(
+            [feed.tweet_id for feed in kd35_newsfeeds],
+            [pulled_tweet.id, pushed_tweet.id],
+        )
+        self.assertEqual(kd35_newsfeeds[0].id, None)
+        self.assertEqual(kd35_newsfeeds[1].id is None, False)
+
+
+class NewsfeedFriendshipTests(TestCase):
+
+    def setUp(self):
+        self.clear_cache()
+
+        self.lbj23 = self.create_user(username='lbj23')
+        self.kd35 = self.create_user(username='kd35')
+        self.curry30 = self.create_user(username='curry30')
+
+    def _create_tweets(self, user, minutes_ago_list):
+        # newest first, like cached tweets  <Wayne Shih> 18-Oct-2026
+        now = utc_now()
+        tweets = []
+        for i, minutes_ago in enumerate(minutes_ago_list):
+            tweet = self.create_tweet(user, f'{user.username} tweet - {i}')
+            tweet.created_at = now - timedelta(minutes=minutes_ago)
+            tweet.save()
+            tweets.append(tweet)
+        # drop cached tweets with the old created_at  <Wayne Shih> 18-Oct-2026
+        self.clear_cache()
+        return tweets[::-1]
+
+    def _create_newsfeed(self, user, tweet):
+        # as if it was fanned out when the tweet was created  <Wayne Shih> 18-Oct-2026
+        newsfeed = self.create_newsfeed(user, tweet)
+        newsfeed.created_at = tweet.created_at
+        newsfeed.save()
+        return newsfeed
+
+    def test_backfill_newsfeeds_on_follow(self):
+        _run_in_timeline_modes(
+            self,
+            self._test_backfill_newsfeeds_on_follow,
+            reset_models=(Tweet, NewsFeed, Friendship),
+        )
+
+    def _test_backfill_newsfeeds_on_follow(self):
+        self.create_friendship(self.kd35, self.curry30)
+        curry30_tweets = self._create_tweets(self.curry30, [11, 9])
+        for tweet in curry30_tweets:
+            self._create_newsfeed(self.kd35, tweet)
+        lbj23_tweets = self._create_tweets(self.lbj23, [12, 10, 8])
+        NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+
+        # lbj23's tweets are merged into kd35's newsfeeds in time order  <Wayne Shih> 18-Oct-2026
+        self.create_friendship(self.kd35, self.lbj23)
+        expected_tweet_ids = [
+            tweet.id
+            for tweet in sorted(
+                curry30_tweets + lbj23_tweets,
+                key=lambda tweet: tweet.created_at,
+                reverse=True,
+            )
+        ]
+        cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual([feed.tweet_id for feed in cached_kd35_feeds], expected_tweet_ids)
+        for feed in cached_kd35_feeds:
+            self.assertEqual(feed.id is None, False)
+            self.assertEqual(feed.created_at, feed.cached_tweet.created_at)
+        self.clear_cache()
+        cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual([feed.tweet_id for feed in cached_kd35_feeds], expected_tweet_ids)
+
+        # backfill is idempotent  <Wayne Shih> 18-Oct-2026
+        msg = backfill_newsfeeds_task(self.kd35.id, self.lbj23.id)
+        self.assertEqual(msg, '0 newsfeeds backfilled.')
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).count(), 5)
+
+    def test_backfill_newsfeeds_bounded(self):
+        lbj23_tweets = self._create_tweets(
+            self.lbj23,
+            range(settings.REDIS_LIST_SIZE_LIMIT + 2, 0, -1),
+        )
+        msg = backfill_newsfeeds_task(self.kd35.id, self.lbj23.id)
+        self.assertEqual(msg, f'{settings.REDIS_LIST_SIZE_LIMIT} newsfeeds backfilled.')
+        self.assertEqual(
+            list(NewsFeed.objects.filter(user_id=self.kd35.id).values_list('tweet_id', flat=True)),
+            [tweet.id for tweet in lbj23_tweets[:settings.REDIS_LIST_SIZE_LIMIT]],
+        )
+
+    def test_backfill_newsfeeds_of_pull_mode_user(self):
+        lbj23_tweets = self._create_tweets(self.lbj23, [12, 10, 8])
+        conn = RedisClient.get_connection()
+        conn.zadd(PULL_MODE_USERS_KEY, {
+            self.lbj23.id: datetime_to_timestamp_us(lbj23_tweets[0].created_at),
+        })
+
+        # tweets since pull mode are pulled instead  <Wayne Shih> 18-Oct-2026
+        msg = backfill_newsfeeds_task(self.kd35.id, self.lbj23.id)
+        self.assertEqual(msg, '2 newsfeeds backfilled.')
+        self.assertEqual(
+            set(NewsFeed.objects.filter(user_id=self.kd35.id).values_list('tweet_id', flat=True)),
+            {tweet.id for tweet in lbj23_tweets[1:]},
+        )
+
+    def test_purge_newsfeeds_on_unfollow(self):
+        self.create_friendship(self.kd35, self.curry30)
+        self.create_friendship(self.kd35, self.lbj23)
+        curry30_tweets = self._create_tweets(self.curry30, [11, 9])
+        lbj23_tweets = self._create_tweets(self.lbj23, [12, 10])
+        for tweet in curry30_tweets + lbj23_tweets:
+            self._create_newsfeed(self.kd35, tweet)
+        cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(len(cached_kd35_feeds), 4)
+
+        Friendship.objects.filter(from_user_id=self.kd35.id, to_user_id=self.lbj23.id).delete()
+        cached_kd35_feeds = NewsFeedService.get_cached_newsfeeds(self.kd35.id)
+        self.assertEqual(
+            [feed.tweet_id for feed in cached_kd35_feeds],
+            [tweet.id for tweet in curry30_tweets],
+        )
+        self.assertEqual(NewsFeed.objects.filter(user_id=self.kd35.id).count(), 2)
+
+        msg = purge_newsfeeds_task(self.kd35.id, self.lbj23.id)
+        self.assertEqual(msg, '0 newsfeeds purged.')
@@ -0,0 +1,89 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#     This is a script to compare the serializers of objects cached in redis timelines, by
+#     bytes per entry and the time to deserialize a whole cached list of tweets and newsfeeds.
+#
+#     Usage:
+#       python manage.py shell -c \
+#           "from scripts.benchmark_redis_serializers import *; benchmark_redis_serializers()"
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+import timeit
+from datetime import timedelta
+
+from django.conf import settings
+
+from newsfeeds.models import NewsFeed
+from tweets.models import Tweet
+from utils.caches.redis_serializers import CompactModelSerializer, DjangoModelSerializer
+from utils.time_helpers import utc_now
+
+
+def _create_objects(num_objects):
+    # <Wayne Shih> 18-Oct-2026
+    # Objects are not saved, since serializers only read their field values
+    now = utc_now()
+    tweets = [
+        Tweet(
+            id=1000000 + i,
+            user_id=1000 + i % 7,
+            content=f'Default content -- Welcome to Django-Twitter -- {i}',
+            created_at=now - timedelta(minutes=i),
+            comments_count=i % 13,
+            likes_count=i % 29,
+        )
+        for i in range(num_objects)
+    ]
+    newsfeeds = [
+        NewsFeed(
+            id=5000000 + i,
+            user_id=2000,
+            tweet_id=tweet.id,
+            created_at=tweet.created_at,
+        )
+        for i, tweet in enumerate(tweets)
+    ]
+    return {'Tweet': tweets, 'NewsFeed': newsfeeds}
+
+
+def benchmark_redis_serializers(num_objects=None, repeat=20):
+    if num_objects is None:
+        num_objects = settings.REDIS_LIST_SIZE_LIMIT
+
+    results = []
+    for model_name, objects in _create_objects(num_objects).items():
+        for serializer in (DjangoModelSerializer, CompactModelSerializer):
+            # <Wayne Shih> 18-Oct-2026
+            # Redis always returns bytes
+            serialized_list = [
+                data if isinstance(data, bytes) else data.encode()
+                for data in (serializer.serialize(obj) for obj in objects)
+            ]
+            seconds = min(timeit.repeat(
+                lambda: [serializer.deserialize(data) for data in serialized_list],
+                number=1,
+                repeat=repeat,
+            ))
+            results.append({
+                'model': model_name,
+                'serializer': serializer.__name__,
+                'bytes_per_entry': sum(len(data) for data in serialized_list) / num_objects,
+                'deserialize_ms': seconds * 1000,
+            })
+
+    print(f'{num_objects} objects per list, best of {repeat}')
+    print(f'{"model":<10}{"serializer":<26}{"bytes/entry":>12}{"deserialize ms":>16}')
+    for result in results:
+        print(
+            f'{result["model"]:<10}{result["serializer"]:<26}'
+            f'{result["bytes_per_entry"]:>12.1f}{result["deserialize_ms"]:>16.2f}'
+        )
+    return results
@@ -0,0 +1,174 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#     This is a script to reconcile likes_count and comments_count of tweets and comments with
+#     the likes and comments they really have, in db and in redis cache.
+#
+#     Ids are reconciled by chunks. Counts of a chunk are recounted by one GROUP BY query per
+#     kind, and only the rows and cached counts which drifted are repaired. Chunks are split to
+#     shards by chunk index, so that shards run in parallel never touch the same rows.
+#
+#     Usage:
+#       python manage.py reconcile_counts tweet --shard 0 --num-shards 4
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# 18-Oct-2026  Wayne Shih              Recount drifted counts in the UPDATE repairing them
+# $HISTORY$
+# =================================================================================================
+
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import (
+    Case,
+    Count,
+    IntegerField,
+    Max,
+    Min,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from comments.models import Comment
+from likes.models import Like
+from tweets.models import Tweet
+from utils.caches.redis_helpers import RedisHelper
+
+
+RECONCILE_COUNTS_BATCH_SIZE = 1000
+
+
+def _count_by_group(queryset, group_by):
+    # <Wayne Shih> 18-Oct-2026
+    # order_by() clears the default ordering, which would be added to GROUP BY otherwise.
+    # - https://docs.djangoproject.com/en/3.1/topics/db/aggregation/
+    return dict(
+        queryset.order_by().values(group_by).annotate(count=Count('id')).values_list(
+            group_by, 'count'
+        )
+    )
+
+
+def _recount(model_class, id_start, id_end):
+    # <Wayne Shih> 18-Oct-2026
+    # Returns {attr: {object_id: count}} of objects in [id_start, id_end)
+    counts = {}
+    if model_class == Tweet:
+        counts['comments_count'] = _count_by_group(
+            Comment.objects.filter(tweet_id__gte=id_start, tweet_id__lt=id_end),
+            'tweet_id',
+        )
+
+    content_type = ContentType.objects.get_for_model(model_class)
+    counts['likes_count'] = _count_by_group(
+        Like.objects.filter(
+            content_type=content_type,
+            object_id__gte=id_start,
+            object_id__lt=id_end,
+        ),
+        'object_id',
+    )
+    return counts
+
+
+def _get_count_subquery(model_class, attr):
+    # <Wayne Shih> 18-Oct-2026
+    # (SELECT COUNT(*) ... WHERE object_id = <model table>.id), or NULL if there is none
+    if attr == 'comments_count':
+        queryset, group_by = Comment.objects.filter(tweet_id=OuterRef('id')), 'tweet_id'
+    else:
+        queryset, group_by = Like.objects.filter(
+            content_type=ContentType.objects.get_for_model(model_class),
+            object_id=OuterRef('id'),
+        ), 'object_id'
+    return Subquery(
+        queryset.order_by().values(group_by).annotate(count=Count('id')).values('count'),
+        output_field=IntegerField(),
+    )
+
+
+def _repair_counts_in_db(model_class, attr, pending_deltas):
+    # <Wayne Shih> 18-Oct-2026
+    # UPDATE ... SET attr = COALESCE((SELECT COUNT(*) ...), 0) - CASE id WHEN ... END
+    # The count is taken by the UPDATE itself rather than by the recount read before, so a like
+    # or comment committed in between is counted once, instead of being added on top of a
+    # stored count which has counted it already.
+    if not pending_deltas:
+        return
+    model_class.objects.filter(id__in=pending_deltas).update(**{
+        attr: Coalesce(_get_count_subquery(model_class, attr), Value(0)) - Case(
+            *[
+                When(id=object_id, then=Value(delta))
+                for object_id, delta in pending_deltas.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    })
+
+
+def _reconcile_chunk(model_class, id_start, id_end, stats):
+    attrs = ('comments_count', 'likes_count') if model_class == Tweet else ('likes_count',)
+    rows = model_class.objects.filter(id__gte=id_start, id__lt=id_end).order_by().values_list(
+        'id', *attrs
+    )
+    stored_counts = {row[0]: dict(zip(attrs, row[1:])) for row in rows}
+    if not stored_counts:
+        return
+
+    recounts = _recount(model_class, id_start, id_end)
+    object_ids = list(stored_counts)
+    for attr in attrs:
+        counts = {object_id: recounts[attr].get(object_id, 0) for object_id in object_ids}
+
+        # <Wayne Shih> 18-Oct-2026
+        # In write-behind mode, counts in db are expected to lag behind by the deltas pending.
+        # Stored counts and recounts are read by separate queries, so they only tell which
+        # counts drifted. The drifted counts are recounted again by the UPDATE which repairs
+        # them, see _repair_counts_in_db().
+        pending_deltas = RedisHelper.get_pending_count_deltas(model_class, object_ids, attr)
+        drifted_ids = [
+            object_id
+            for object_id, count in counts.items()
+            if count - pending_deltas[object_id] != (stored_counts[object_id][attr] or 0)
+        ]
+        _repair_counts_in_db(model_class, attr, {
+            object_id: pending_deltas[object_id]
+            for object_id in drifted_ids
+        })
+        stats['db_repaired'] += len(drifted_ids)
+        stats['cache_repaired'] += RedisHelper.delete_drifted_counts(model_class, counts, attr)
+    stats['objects'] += len(object_ids)
+
+
+def reconcile_counts(
+    model_class,
+    id_start=None,
+    id_end=None,
+    batch_size=RECONCILE_COUNTS_BATCH_SIZE,
+    shard=0,
+    num_shards=1,
+):
+    if model_class not in (Tweet, Comment):
+        raise ValueError('model_class is expected to be Tweet or Comment')
+    if not 0 <= shard < num_shards:
+        raise ValueError('shard is expected to be in [0, num_shards)')
+
+    id_range = model_class.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+    if id_start is None:
+        id_start = id_range['min_id'] or 0
+    if id_end is None:
+        id_end = (id_range['max_id'] or 0) + 1
+
+    stats = {'objects': 0, 'db_repaired': 0, 'cache_repaired': 0}
+    for chunk_index, chunk_start in enumerate(range(id_start, id_end, batch_size)):
+        if chunk_index % num_shards != shard:
+            continue
+        chunk_end = min(chunk_start + batch_size, id_end)
+        _reconcile_chunk(model_class, chunk_start, chunk_end, stats)
+    return stats
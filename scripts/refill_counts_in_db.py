@@ -8,33 +8,15 @@
 #    Date      Name                    Description of Change
 # 05-Jun-2022  Wayne Shih              Initial create
 # 10-Jun-2022  Wayne Shih              Extend refill_counts_in_db() for Tweet and Comment
+# 18-Oct-2026  Wayne Shih              Delegate to reconcile_counts()
 # $HISTORY$
 # =================================================================================================
 
 
-from django.db.models import F
-
-from comments.models import Comment
-from tweets.models import Tweet
+from scripts.reconcile_counts import reconcile_counts
 
 
 def refill_counts_in_db(model_class, id_start, id_end):
-    if model_class not in (Tweet, Comment):
-        raise ValueError('model_class is expected to be Tweet or Comment')
-
-    for obj_id in range(id_start, id_end):
-        obj_qs = model_class.objects.filter(id=obj_id)
-        obj = obj_qs.first()
-        if obj is None:
-            continue
-
-        if model_class == Tweet:
-            obj_qs.update(
-                comments_count=obj.comment_set.count() + (F('comments_count') - F('comments_count')),
-                likes_count=obj.like_set.count() + (F('likes_count') - F('likes_count')),
-            )
-
-        if model_class == Comment:
-            obj_qs.update(
-                likes_count=obj.like_set.count() + (F('likes_count') - F('likes_count')),
-            )
+    # <Wayne Shih> 18-Oct-2026
+    # Kept for callers of the old script, see reconcile_counts() instead
+    return reconcile_counts(model_class, id_start, id_end)
@@ -20,6 +20,7 @@
 # 28-May-2022  Wayne Shih              Add clear redis up
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
 # 05-Jun-2022  Wayne Shih              Add create_friendship
+# 18-Oct-2026  Wayne Shih              Clear LocalCache in clear_cache()
 # $HISTORY$
 # =================================================================================================
 
@@ -35,6 +36,7 @@ from friendships.models import Friendship
 from likes.models import Like
 from newsfeeds.models import NewsFeed
 from tweets.models import Tweet
+from utils.caches.local_cache import LocalCache
 from utils.caches.redis_client import RedisClient
 
 
@@ -99,3 +101,4 @@ class TestCase(DjangoTestCase):
     def clear_cache(self):
         caches['testing'].clear()
         RedisClient.clear()
+        LocalCache.clear()
@@ -11,12 +11,14 @@
 # 13-Nov-2021  Wayne Shih              Add id
 # 25-Mar-2022  Wayne Shih              Add TweetPhotoAdmin
 # 30-Mar-2022  Wayne Shih              Add filter for TweetPhotoAdmin
+# 18-Oct-2026  Wayne Shih              Show fanout progress
 # $HISTORY$
 # =================================================================================================
 
 
 from django.contrib import admin
 
+from newsfeeds.services import NewsFeedService
 from tweets.models import Tweet, TweetPhoto
 
 
@@ -28,8 +30,20 @@ class TweetAdmin(admin.ModelAdmin):
         'created_at',
         'user',
         'content',
+        'fanout_progress',
     )
 
+    # <Wayne Shih> 18-Oct-2026
+    # How far the fanout of a tweet has got, see NewsFeedService.get_fanout_progress()
+    def fanout_progress(self, tweet):
+        progress = NewsFeedService.get_fanout_progress(tweet.id)
+        if progress is None:
+            return '-'
+        total = progress['total'] if progress['total'] is not None else 'dispatching'
+        return f'{progress["done"]}/{progress["failed"]}/{total}'
+
+    fanout_progress.short_description = 'fanout (done/failed/total)'
+
 
 @admin.register(TweetPhoto)
 class TweetPhotoAdmin(admin.ModelAdmin):
@@ -22,20 +22,40 @@
 # 30-Mar-2022  Wayne Shih              Add tweet photo to serializers
 # 26-May-2022  Wayne Shih              Fetch user from cache
 # 09-Jun-2022  Wayne Shih              Fetch likes_count and comments_count from cache
+# 18-Oct-2026  Wayne Shih              Load fields of a page of tweets by TweetLoader
+# 18-Oct-2026  Wayne Shih              Prefetch users by page through TweetLoader
 # $HISTORY$
 # =================================================================================================
 
 
+from django.db import models
 from rest_framework import serializers
 
 from accounts.api.serializers import UserSerializerForTweet
 from comments.api.serializers import CommentSerializer
 from likes.api.serializers import LikeSerializer
-from likes.services import LikeService
 from tweets.constants import TWEET_PHOTOS_UPLOAD_LIMIT
+from tweets.loaders import TweetLoader
 from tweets.models import Tweet
 from tweets.services import TweetService
-from utils.caches.redis_helpers import RedisHelper
+
+
+def get_tweet_loader(context):
+    # <Wayne Shih> 18-Oct-2026
+    # One loader per serializer context, i.e. per request.
+    if 'tweet_loader' not in context:
+        context['tweet_loader'] = TweetLoader(context['request'].user)
+    return context['tweet_loader']
+
+
+class TweetListSerializer(serializers.ListSerializer):
+    # <Wayne Shih> 18-Oct-2026
+    # Load fields for the whole page before serializing tweets one by one
+    # - https://www.django-rest-framework.org/api-guide/serializers/#customizing-listserializer-behavior
+    def to_representation(self, data):
+        tweets = list(data.all() if isinstance(data, models.Manager) else data)
+        get_tweet_loader(self.context).load(tweets)
+        return super().to_representation(tweets)
 
 
 class TweetSerializer(serializers.ModelSerializer):
@@ -57,23 +77,19 @@ class TweetSerializer(serializers.ModelSerializer):
             'has_liked',
             'photo_urls',
         )
+        list_serializer_class = TweetListSerializer
 
     def get_comments_count(self, obj):
-        return RedisHelper.get_count(obj, 'comments_count')
+        return get_tweet_loader(self.context).get_comments_count(obj)
 
     def get_likes_count(self, obj):
-        return RedisHelper.get_count(obj, 'likes_count')
+        return get_tweet_loader(self.context).get_likes_count(obj)
 
     def get_has_liked(self, obj):
-        return LikeService.get_has_liked(self.context['request'].user, obj)
+        return get_tweet_loader(self.context).get_has_liked(obj)
 
     def get_photo_urls(self, obj):
-        photos = obj.tweetphoto_set.filter(has_deleted=False).order_by('order')
-        photo_urls = [
-            photo.file.url
-            for photo in photos
-        ]
-        return photo_urls
+        return get_tweet_loader(self.context).get_photo_urls(obj)
 
     # <Wayne Shih> 30-Mar-2022
     # TODO:
@@ -24,6 +24,9 @@
 # 29-May-2022  Wayne Shih              Add tests for user tweets cache
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
 # 18-Jun-2022  Wayne Shih              Add a test for ratelimit
+# 18-Oct-2026  Wayne Shih              Add a test for loading fields of tweets by page
+# 18-Oct-2026  Wayne Shih              Add a test for pagination with ties
+# 18-Oct-2026  Wayne Shih              Add test for malformed cursors
 # $HISTORY$
 # =================================================================================================
 
@@ -33,6 +36,8 @@ from urllib import parse
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -41,6 +46,7 @@ from tweets.models import Tweet, TweetPhoto
 from twitter.caches import USER_TWEETS_PATTERN
 from utils.pagination import EndlessPagination
 from utils.caches.redis_client import RedisClient
+from utils.time_helpers import datetime_to_timestamp_us
 
 TWEET_LIST_URL = '/api/tweets/'
 TWEET_CREATE_URL = '/api/tweets/'
@@ -492,6 +498,56 @@ class TweetApiTests(TestCase):
         self.assertEqual(response.data['results'][0]['id'], new_tweet2.id)
         self.assertEqual(response.data['results'][1]['id'], new_tweet1.id)
 
+    def test_list_pagination_with_malformed_cursor(self):
+        kb24 = self.create_user(username='kb24')
+        self.create_tweet(kb24, 'kb24::tweet')
+        for params in (
+            {'created_at__lt': 'abc'},
+            {'created_at__gt': '2022-13-01'},
+            {'cursor__lt': 'abc_1'},
+            {'cursor__gt': '1652435335928339_abc'},
+            {'cursor__lt': str(10 ** 30)},
+        ):
+            response = self.anonymous_client.get(TWEET_LIST_URL, {'user_id': kb24.id, **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {list(params)[0]: 'invalid cursor.'})
+
+    def test_list_pagination_with_ties(self):
+        kb24 = self.create_user(username='kb24')
+        tweets = [self.create_tweet(kb24, f'kb24::tweet::{i}') for i in range(5)]
+        Tweet.objects.filter(user_id=kb24.id).update(created_at=tweets[0].created_at)
+        tweet_ids = sorted([tweet.id for tweet in tweets], reverse=True)
+
+        def _get_all_tweet_ids():
+            response = self.anonymous_client.get(TWEET_LIST_URL, {
+                'user_id': kb24.id,
+                'page_size': 2,
+            })
+            results = response.data['results']
+            while response.data['has_next']:
+                self.assertEqual('cursor__lt=' in response.data['next'], True)
+                response = self.anonymous_client.get(response.data['next'])
+                results.extend(response.data['results'])
+            return [tweet['id'] for tweet in results]
+
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets created in the same microsecond are neither skipped nor duplicated
+        for sorted_set in [False, True]:
+            with self.settings(REDIS_TIMELINE_SORTED_SET=sorted_set):
+                self.clear_cache()
+                self.assertEqual(_get_all_tweet_ids(), tweet_ids)
+        with self.settings(REDIS_LIST_SIZE_LIMIT=2):
+            self.clear_cache()
+            self.assertEqual(_get_all_tweet_ids(), tweet_ids)
+
+        # pull down to refresh with cursor  <Wayne Shih> 18-Oct-2026
+        cursor = f'{datetime_to_timestamp_us(tweets[0].created_at)}_{tweet_ids[2]}'
+        response = self.anonymous_client.get(TWEET_LIST_URL, {
+            'user_id': kb24.id,
+            'cursor__gt': cursor,
+        })
+        self.assertEqual([tweet['id'] for tweet in response.data['results']], tweet_ids[:2])
+
     def test_cached_tweet_list(self):
         kb24 = self.create_user(username='kb24')
 
@@ -531,6 +587,45 @@ class TweetApiTests(TestCase):
             self.assertEqual(response.data['results'][i]['id'], tweets[i].id)
         self.assertEqual(conn.exists(key_kb24), True)
 
+    def test_list_api_loads_fields_by_page(self):
+        tweets = self.tweets1[::-1]
+        self.create_like(self.user2, tweets[0])
+        self.create_comment(self.user2, tweets[1])
+        TweetPhoto.objects.create(
+            tweet=tweets[2],
+            user=self.user1,
+            file=SimpleUploadedFile(
+                name='logo-shot.jpg',
+                content=str.encode('logo shot image'),
+                content_type='image/jpeg',
+            ),
+        )
+        user2_client = APIClient()
+        user2_client.force_authenticate(self.user2)
+
+        response = user2_client.get(TWEET_LIST_URL, {'user_id': self.user1.id})
+        results = response.data['results']
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tweet['id'] for tweet in results], [tweet.id for tweet in tweets])
+        self.assertEqual([tweet['has_liked'] for tweet in results], [True, False, False])
+        self.assertEqual([tweet['likes_count'] for tweet in results], [1, 0, 0])
+        self.assertEqual([tweet['comments_count'] for tweet in results], [0, 1, 0])
+        self.assertEqual([len(tweet['photo_urls']) for tweet in results], [0, 0, 1])
+        self.assertEqual(results[0]['user']['username'], 'lbj23')
+
+        # <Wayne Shih> 18-Oct-2026
+        # Number of db queries does not grow with the page size
+        with CaptureQueriesContext(connection) as one_tweet_queries:
+            response = user2_client.get(TWEET_LIST_URL, {'user_id': self.user1.id, 'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        with CaptureQueriesContext(connection) as three_tweets_queries:
+            response = user2_client.get(TWEET_LIST_URL, {'user_id': self.user1.id, 'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(
+            len(three_tweets_queries.captured_queries),
+            len(one_tweet_queries.captured_queries),
+        )
+
     def test_ratelimit(self):
         if settings.TESTING:
             settings.RATELIMIT_ENABLE = True
@@ -24,6 +24,7 @@
 # 29-May-2022  Wayne Shih              React to user tweet cache
 # 05-Jun-2022  Wayne Shih              React to only caching REDIS_LIST_SIZE_LIMIT in redis
 # 18-Jun-2022  Wayne Shih              Add ratelimit
+# 18-Oct-2026  Wayne Shih              Hydrate page from ids only cache
 # $HISTORY$
 # =================================================================================================
 
@@ -105,6 +106,9 @@ class TweetViewSet(viewsets.GenericViewSet):
         if page is None:
             tweets = self.filter_queryset(self.get_queryset()).prefetch_related('user')
             page = self.paginate_queryset(tweets)
+        # <Wayne Shih> 18-Oct-2026
+        # Only tweets of this page are hydrated if cache holds ids only.
+        page = TweetService.hydrate_tweets(page)
         serializer = TweetSerializer(page, many=True, context={'request': request})
         return self.get_paginated_response(serializer.data)
 
@@ -0,0 +1,74 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#   Request scoped data loader for tweet serializers
+#
+#   Fields of a page of tweets are loaded in one multi-get or db query per kind instead of a few
+#   round trips per tweet, similar to DataLoader.
+#   - https://github.com/graphql/dataloader
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+from django.contrib.auth.models import User
+
+from accounts.services import UserService
+from likes.services import LikeService
+from tweets.models import Tweet
+from tweets.services import TweetService
+from utils.caches.memcached_helpers import MemcachedHelper
+from utils.caches.redis_helpers import RedisHelper
+
+
+class TweetLoader(object):
+
+    def __init__(self, user: User):
+        # <Wayne Shih> 18-Oct-2026
+        # user is the one who sends the request, which is for has_liked
+        self.user = user
+        self.loaded_tweet_ids = set()
+        self.comments_counts = {}
+        self.likes_counts = {}
+        self.liked_tweet_ids = set()
+        self.photo_urls = {}
+
+    def load(self, tweets):
+        tweets = [tweet for tweet in tweets if tweet.id not in self.loaded_tweet_ids]
+        if not tweets:
+            return
+
+        tweet_ids = [tweet.id for tweet in tweets]
+        self.comments_counts.update(RedisHelper.get_counts(tweets, 'comments_count'))
+        self.likes_counts.update(RedisHelper.get_counts(tweets, 'likes_count'))
+        self.liked_tweet_ids.update(
+            LikeService.get_liked_object_ids(self.user, Tweet, tweet_ids)
+        )
+        self.photo_urls.update(TweetService.get_photo_urls(tweet_ids))
+
+        users = MemcachedHelper.prefetch_objects_through_cache(tweets, User, 'user')
+        UserService.prefetch_profiles_through_cache(users)
+        self.loaded_tweet_ids.update(tweet_ids)
+
+    # <Wayne Shih> 18-Oct-2026
+    # Tweets which are not loaded yet are loaded one by one on first access, e.g. a single tweet
+    # for the tweet create api.
+    def get_comments_count(self, tweet: Tweet):
+        self.load([tweet])
+        return self.comments_counts[tweet.id]
+
+    def get_likes_count(self, tweet: Tweet):
+        self.load([tweet])
+        return self.likes_counts[tweet.id]
+
+    def get_has_liked(self, tweet: Tweet):
+        self.load([tweet])
+        return tweet.id in self.liked_tweet_ids
+
+    def get_photo_urls(self, tweet: Tweet):
+        self.load([tweet])
+        return self.photo_urls[tweet.id]
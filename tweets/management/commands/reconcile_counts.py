@@ -0,0 +1,59 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#   Command to reconcile likes_count and comments_count with the likes and comments in db,
+#   see scripts/reconcile_counts.py
+#
+#   Ref: https://docs.djangoproject.com/en/3.1/howto/custom-management-commands/
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+from django.core.management.base import BaseCommand, CommandError
+
+from comments.models import Comment
+from scripts.reconcile_counts import RECONCILE_COUNTS_BATCH_SIZE, reconcile_counts
+from tweets.models import Tweet
+
+
+MODEL_CLASSES = {
+    'tweet': Tweet,
+    'comment': Comment,
+}
+
+
+class Command(BaseCommand):
+    help = 'Reconcile likes_count and comments_count with the likes and comments in db'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=list(MODEL_CLASSES))
+        parser.add_argument('--id-start', type=int, default=None)
+        parser.add_argument('--id-end', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_COUNTS_BATCH_SIZE)
+        # <Wayne Shih> 18-Oct-2026
+        # Run one command per shard, e.g. --shard 0..3 --num-shards 4, with the same id range.
+        parser.add_argument('--shard', type=int, default=0)
+        parser.add_argument('--num-shards', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            stats = reconcile_counts(
+                MODEL_CLASSES[options['model']],
+                id_start=options['id_start'],
+                id_end=options['id_end'],
+                batch_size=options['batch_size'],
+                shard=options['shard'],
+                num_shards=options['num_shards'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            '{objects} objects reconciled, {db_repaired} counts repaired in db, '
+            '{cache_repaired} counts repaired in cache.'.format(**stats)
+        )
@@ -23,6 +23,7 @@
 # 29-May-2022  Wayne Shih              Add Django signal-listener for user tweets cache
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
 # 05-Jun-2022  Wayne Shih              Add denormalization for comments_count and likes_count
+# 18-Oct-2026  Wayne Shih              Use objects prefetched by page if any
 # $HISTORY$
 # =================================================================================================
 
@@ -83,7 +84,7 @@ class Tweet(models.Model):
 
     @property
     def cached_user(self):
-        return MemcachedHelper.get_object_through_cache(User, self.user_id)
+        return MemcachedHelper.get_related_object_through_cache(self, User, 'user')
 
 
 class TweetPhoto(models.Model):
@@ -8,6 +8,10 @@
 #    Date      Name                    Description of Change
 # 27-Mar-2022  Wayne Shih              Initial create
 # 29-May-2022  Wayne Shih              Add uer tweets cache, react to redis helper
+# 18-Oct-2026  Wayne Shih              Add hydrate_tweets()
+# 18-Oct-2026  Wayne Shih              Add get_photo_urls()
+# 18-Oct-2026  Wayne Shih              Order tweets by id for ties of created_at
+# 18-Oct-2026  Wayne Shih              Add invalidate_user_tweets_cache()
 # $HISTORY$
 # =================================================================================================
 
@@ -38,14 +42,25 @@ class TweetService(object):
         # Use bulk create instead, then only one insert query
         TweetPhoto.objects.bulk_create(tweet_photos)
 
+    @classmethod
+    def get_photo_urls(cls, tweet_ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Returns {tweet_id: photo_urls} of a page of tweets in one db query
+        photo_urls = {tweet_id: [] for tweet_id in tweet_ids}
+        photos = TweetPhoto.objects.filter(tweet_id__in=tweet_ids, has_deleted=False)\
+            .order_by('tweet_id', 'order')
+        for photo in photos:
+            photo_urls[photo.tweet_id].append(photo.file.url)
+        return photo_urls
+
     @classmethod
     def _get_tweet_queryset(cls, user_id, view=None):
         if view is not None:
             return view.filter_queryset(
-                Tweet.objects.all().order_by('-created_at').prefetch_related('user')
+                Tweet.objects.all().order_by('-created_at', '-id').prefetch_related('user')
             )
         return Tweet.objects.filter(user_id=user_id)\
-            .order_by('-created_at')\
+            .order_by('-created_at', '-id')\
             .prefetch_related('user')
 
     @classmethod
@@ -56,10 +71,22 @@ class TweetService(object):
         key = USER_TWEETS_PATTERN.format(user_id=user_id)
         return RedisHelper.load_objects(key, tweets)
 
+    @classmethod
+    def hydrate_tweets(cls, tweets):
+        return RedisHelper.hydrate_objects(Tweet, tweets)
+
     @classmethod
     def push_tweet_to_user_tweets_cache(cls, tweet):
         # <Wayne Shih> 29-May-2022
         # Queryset is in fact lazy loading, so this line doesn't trigger db query yet
-        tweets = Tweet.objects.filter(user_id=tweet.user_id).order_by('-created_at')
+        tweets = Tweet.objects.filter(user_id=tweet.user_id).order_by('-created_at', '-id')
         key = USER_TWEETS_PATTERN.format(user_id=tweet.user_id)
         RedisHelper.push_objects(key, tweet, tweets)
+
+    @classmethod
+    def invalidate_user_tweets_cache(cls, user_id):
+        # <Wayne Shih> 18-Oct-2026
+        # user_id is None if the user has been deleted, see on_delete=models.SET_NULL
+        if user_id is None:
+            return
+        RedisHelper.delete_objects([USER_TWEETS_PATTERN.format(user_id=user_id)])
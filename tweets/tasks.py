@@ -0,0 +1,40 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#   Define async tasks for workers to execute
+#     - https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+#     - https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+from celery import shared_task
+
+from comments.models import Comment
+from tweets.models import Tweet
+from utils.caches.redis_helpers import RedisHelper
+
+
+# <Wayne Shih> 18-Oct-2026
+# Counts changed in redis only in write-behind mode, see COUNTS_WRITE_BEHIND
+WRITE_BEHIND_COUNTS = (
+    (Tweet, 'likes_count'),
+    (Tweet, 'comments_count'),
+    (Comment, 'likes_count'),
+)
+
+
+# <Wayne Shih> 18-Oct-2026
+# Scheduled by CELERY_BEAT_SCHEDULE. Deltas are flushed even if write-behind mode is turned off,
+# so that deltas left by the mode are never lost.
+@shared_task(routing_key='default')
+def flush_count_deltas_task():
+    num_objects = 0
+    for model_class, attr in WRITE_BEHIND_COUNTS:
+        num_objects += RedisHelper.flush_count_deltas(model_class, attr)
+    return f'Counts of {num_objects} objects flushed.'
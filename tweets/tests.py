@@ -16,21 +16,33 @@
 # 28-May-2022  Wayne Shih              Add a test to test redis cache
 # 28-May-2022  Wayne Shih              Add tests to user tweets cache
 # 30-May-2022  Wayne Shih              React to utils file structure refactor
+# 18-Oct-2026  Wayne Shih              Add test for user tweets cache with ids only
+# 18-Oct-2026  Wayne Shih              Add test for user tweets cache in sorted sets
+# 18-Oct-2026  Wayne Shih              React to sorted set timeline cursors
+# 18-Oct-2026  Wayne Shih              React to dropping cached tweets on tweet deletion
+# 18-Oct-2026  Wayne Shih              Add tests for count reconciliation
+# 18-Oct-2026  Wayne Shih              Add test for reconciling with a like in between
 # $HISTORY$
 # =================================================================================================
 
 
 from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
 
+from comments.models import Comment
+from scripts.reconcile_counts import _recount, reconcile_counts
 from testing.testcases import TestCase
 from tweets.models import Tweet, TweetPhoto
 from tweets.services import TweetService
 from twitter.caches import USER_TWEETS_PATTERN
 from utils.caches.redis_client import RedisClient
-from utils.caches.redis_serializers import DjangoModelSerializer
-from utils.time_helpers import utc_now
+from utils.caches.redis_helpers import RedisHelper, SortedSetTimeline
+from utils.caches.redis_serializers import DjangoModelSerializer, ObjectRef
+from utils.time_helpers import datetime_to_timestamp_us, utc_now
 
 
 class TweetTests(TestCase):
@@ -255,3 +267,170 @@ class TweetCacheTests(TestCase):
         lbj23_tweets = TweetService.get_cached_tweets(self.lbj23.id)
         self.assertEqual(type(lbj23_tweets), list)
         self.assertEqual([tweet.id for tweet in lbj23_tweets], [new_lbj23_tweet.id])
+
+    def test_get_user_tweets_ids_only(self):
+        tweets = [self.create_tweet(self.sc30, f'logo shot - {i}') for i in range(3)]
+        tweets = tweets[::-1]
+        conn = RedisClient.get_connection()
+        key_sc30 = USER_TWEETS_PATTERN.format(user_id=self.sc30.id)
+
+        with self.settings(REDIS_TIMELINE_IDS_ONLY=True):
+            # test cache miss  <Wayne Shih> 18-Oct-2026
+            RedisClient.clear()
+            sc30_tweets = TweetService.get_cached_tweets(self.sc30.id)
+            self.assertEqual(sc30_tweets, tweets)
+
+            # test cache hit with ids only  <Wayne Shih> 18-Oct-2026
+            new_tweet = self.create_tweet(self.sc30, 'logo shot - new')
+            tweets.insert(0, new_tweet)
+            sc30_tweets = TweetService.get_cached_tweets(self.sc30.id)
+            self.assertEqual(
+                sc30_tweets,
+                [ObjectRef(tweet.id, tweet.created_at) for tweet in tweets],
+            )
+            self.assertEqual(conn.lindex(key_sc30, 0).startswith(f'{new_tweet.id}:'.encode()), True)
+
+            # test hydrate tweets, deleted tweets are skipped  <Wayne Shih> 18-Oct-2026
+            tweets[1].delete()
+            hydrated_tweets = TweetService.hydrate_tweets(sc30_tweets)
+            self.assertEqual(hydrated_tweets, [tweets[0]] + tweets[2:])
+            self.assertEqual(hydrated_tweets[0].content, 'logo shot - new')
+
+            # cached tweets are dropped on tweet deletion  <Wayne Shih> 18-Oct-2026
+            self.assertEqual(conn.exists(key_sc30), False)
+            TweetService.get_cached_tweets(self.sc30.id)
+
+        # lists cached with ids only are still readable  <Wayne Shih> 18-Oct-2026
+        sc30_tweets = TweetService.get_cached_tweets(self.sc30.id)
+        self.assertEqual(isinstance(sc30_tweets[0], ObjectRef), True)
+        self.assertEqual(TweetService.hydrate_tweets(sc30_tweets), [tweets[0]] + tweets[2:])
+
+    def test_get_user_tweets_sorted_set(self):
+        tweets = [self.create_tweet(self.sc30, f'logo shot - {i}') for i in range(3)]
+        tweets = tweets[::-1]
+        conn = RedisClient.get_connection()
+        key_sc30 = USER_TWEETS_PATTERN.format(user_id=self.sc30.id)
+
+        with self.settings(REDIS_TIMELINE_SORTED_SET=True):
+            # test cache miss  <Wayne Shih> 18-Oct-2026
+            RedisClient.clear()
+            sc30_tweets = TweetService.get_cached_tweets(self.sc30.id)
+            self.assertEqual(isinstance(sc30_tweets, SortedSetTimeline), True)
+            self.assertEqual(conn.exists(key_sc30), False)
+            self.assertEqual(conn.zcard(f'{key_sc30}:zset'), 3)
+            self.assertEqual(len(sc30_tweets), 3)
+            self.assertEqual(list(sc30_tweets), tweets)
+
+            # test push tweet to cache while key exists  <Wayne Shih> 18-Oct-2026
+            new_tweet = self.create_tweet(self.sc30, 'logo shot - new')
+            tweets.insert(0, new_tweet)
+            sc30_tweets = TweetService.get_cached_tweets(self.sc30.id)
+            self.assertEqual(list(sc30_tweets), tweets)
+
+            # test range reads  <Wayne Shih> 18-Oct-2026
+            timestamps_us = [datetime_to_timestamp_us(tweet.created_at) for tweet in tweets]
+            self.assertEqual(sc30_tweets.get_older(limit=2), tweets[:2])
+            self.assertEqual(sc30_tweets.get_older(timestamps_us[1]), tweets[2:])
+            self.assertEqual(sc30_tweets.get_older(timestamps_us[1], limit=1), tweets[2:3])
+            self.assertEqual(sc30_tweets.get_newer(timestamps_us[2]), tweets[:2])
+            self.assertEqual(sc30_tweets.get_newer(timestamps_us[0]), [])
+
+            # ties are broken by id  <Wayne Shih> 18-Oct-2026
+            Tweet.objects.filter(user_id=self.sc30.id).update(created_at=tweets[0].created_at)
+            RedisClient.clear()
+            sc30_tweets = TweetService.get_cached_tweets(self.sc30.id)
+            tweets = sorted(tweets, key=lambda tweet: tweet.id, reverse=True)
+            self.assertEqual(list(sc30_tweets), tweets)
+            self.assertEqual(sc30_tweets.get_older(limit=1), tweets)
+            self.assertEqual(sc30_tweets.get_older(timestamps_us[0], tweets[1].id), tweets[2:])
+            self.assertEqual(sc30_tweets.get_newer(timestamps_us[0], tweets[1].id), tweets[:1])
+
+
+class ReconcileCountsTests(TestCase):
+
+    def setUp(self):
+        self.clear_cache()
+
+        self.lbj23 = self.create_user(username='cavs_lbj23')
+        self.kb24 = self.create_user(username='kobe24')
+        self.tweets = [self.create_tweet(self.lbj23) for _ in range(3)]
+        self.comment = self.create_comment(self.kb24, self.tweets[0])
+        self.create_like(self.lbj23, self.tweets[0])
+        self.create_like(self.kb24, self.tweets[0])
+        self.create_like(self.lbj23, self.comment)
+
+    def _get_counts(self, model_class, attr):
+        return list(model_class.objects.order_by('id').values_list(attr, flat=True))
+
+    def test_reconcile_counts(self):
+        # counts drift in db and cache  <Wayne Shih> 18-Oct-2026
+        Tweet.objects.update(likes_count=7, comments_count=0)
+        Comment.objects.update(likes_count=0)
+        conn = RedisClient.get_connection()
+        self.assertEqual(RedisHelper.get_count(self.tweets[1], 'likes_count'), 7)
+        self.assertEqual(RedisHelper.get_count(self.tweets[2], 'comments_count'), 0)
+
+        out = StringIO()
+        with self.assertNumQueries(6):
+            call_command('reconcile_counts', 'tweet', stdout=out)
+        self.assertEqual(
+            out.getvalue(),
+            '3 objects reconciled, 4 counts repaired in db, 1 counts repaired in cache.\n',
+        )
+        self.assertEqual(self._get_counts(Tweet, 'likes_count'), [2, 0, 0])
+        self.assertEqual(self._get_counts(Tweet, 'comments_count'), [1, 0, 0])
+        self.assertEqual(conn.exists(f'Tweet:{self.tweets[1].id}:likes_count'), 0)
+        self.assertEqual(RedisHelper.get_count(self.tweets[1], 'likes_count'), 0)
+        self.assertEqual(RedisHelper.get_count(self.tweets[2], 'comments_count'), 0)
+
+        stats = reconcile_counts(Comment)
+        self.assertEqual(stats, {'objects': 1, 'db_repaired': 1, 'cache_repaired': 0})
+        self.assertEqual(self._get_counts(Comment, 'likes_count'), [1])
+
+        # counts reconciled already are not touched  <Wayne Shih> 18-Oct-2026
+        stats = reconcile_counts(Tweet)
+        self.assertEqual(stats, {'objects': 3, 'db_repaired': 0, 'cache_repaired': 0})
+
+    def test_reconcile_counts_by_shards(self):
+        Tweet.objects.update(likes_count=7)
+        tweet_ids = [tweet.id for tweet in self.tweets]
+        kwargs = {'id_start': tweet_ids[0], 'batch_size': 1, 'num_shards': 2}
+
+        # chunks of a shard are every num_shards chunks  <Wayne Shih> 18-Oct-2026
+        stats = reconcile_counts(Tweet, shard=1, **kwargs)
+        self.assertEqual(stats, {'objects': 1, 'db_repaired': 1, 'cache_repaired': 0})
+        self.assertEqual(self._get_counts(Tweet, 'likes_count'), [7, 0, 7])
+        stats = reconcile_counts(Tweet, shard=0, **kwargs)
+        self.assertEqual(stats, {'objects': 2, 'db_repaired': 2, 'cache_repaired': 0})
+        self.assertEqual(self._get_counts(Tweet, 'likes_count'), [2, 0, 0])
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_counts', 'tweet', '--shard', '2', '--num-shards', '2')
+
+    def test_reconcile_counts_write_behind(self):
+        # counts in db lag behind by the deltas pending  <Wayne Shih> 18-Oct-2026
+        with self.settings(COUNTS_WRITE_BEHIND=True):
+            self.create_like(self.lbj23, self.tweets[1])
+        self.assertEqual(self._get_counts(Tweet, 'likes_count'), [2, 0, 0])
+        stats = reconcile_counts(Tweet)
+        self.assertEqual(stats, {'objects': 3, 'db_repaired': 0, 'cache_repaired': 0})
+
+        Tweet.objects.filter(id=self.tweets[1].id).update(likes_count=1)
+        stats = reconcile_counts(Tweet)
+        self.assertEqual(stats['db_repaired'], 1)
+        self.assertEqual(self._get_counts(Tweet, 'likes_count'), [2, 0, 0])
+        self.assertEqual(RedisHelper.get_count(self.tweets[1], 'likes_count'), 1)
+
+    def test_reconcile_counts_with_like_in_between(self):
+        # <Wayne Shih> 18-Oct-2026
+        # A like lands after the stored counts are read and before the recount
+        Tweet.objects.filter(id=self.tweets[1].id).update(likes_count=7)
+
+        def recount_after_like(*args, **kwargs):
+            self.create_like(self.kb24, self.tweets[1])
+            return _recount(*args, **kwargs)
+
+        with mock.patch('scripts.reconcile_counts._recount', side_effect=recount_after_like):
+            stats = reconcile_counts(Tweet)
+        self.assertEqual(stats['db_repaired'], 1)
+        self.assertEqual(self._get_counts(Tweet, 'likes_count'), [2, 1, 0])
@@ -11,13 +11,25 @@
 # 27-May-2022  Wayne Shih              React to memcached helper
 # 29-May-2022  Wayne Shih              Add USER_TWEETS_PATTERN
 # 30-May-2022  Wayne Shih              Add USER_NEWSFEEDS_PATTERN
+# 18-Oct-2026  Wayne Shih              Add PULL_MODE_USERS_KEY
+# 18-Oct-2026  Wayne Shih              Cache followers and followings in redis instead of memcached
+# 18-Oct-2026  Wayne Shih              Add FANOUT_PROGRESS_PATTERN
+# 18-Oct-2026  Wayne Shih              Add USER_LAST_ACTIVITY_KEY
+# 18-Oct-2026  Wayne Shih              Add FANOUT_SECONDS_PER_FOLLOWER_KEY
+# 18-Oct-2026  Wayne Shih              Add LOCAL_CACHE_INVALIDATION_CHANNEL
 # $HISTORY$
 # =================================================================================================
 
 # memcached
-FOLLOWINGS_PATTERN = 'followings:{user_id}'
 USER_PROFILE_PATTERN = 'user_profile:{user_id}'
 
 # redis
 USER_TWEETS_PATTERN = 'user_tweets:{user_id}'
 USER_NEWSFEEDS_PATTERN = 'user_newsfeeds:{user_id}'
+PULL_MODE_USERS_KEY = 'pull_mode_users'
+USER_FOLLOWERS_PATTERN = 'user_followers:{user_id}'
+USER_FOLLOWINGS_PATTERN = 'user_followings:{user_id}'
+FANOUT_PROGRESS_PATTERN = 'fanout_progress:{tweet_id}'
+USER_LAST_ACTIVITY_KEY = 'user_last_activity'
+FANOUT_SECONDS_PER_FOLLOWER_KEY = 'fanout_seconds_per_follower'
+LOCAL_CACHE_INVALIDATION_CHANNEL = 'local_cache_invalidation'
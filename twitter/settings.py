@@ -26,6 +26,21 @@
 # 12-Jun-2022  Wayne Shih              Add celery settings and use redis as MQ broker, fix lint
 # 12-Jun-2022  Wayne Shih              Add CELERY_QUEUES for routing tasks
 # 18-Jun-2022  Wayne Shih              Add settings for ratelimits
+# 18-Oct-2026  Wayne Shih              Add REDIS_TIMELINE_IDS_ONLY
+# 18-Oct-2026  Wayne Shih              Add REDIS_TIMELINE_SORTED_SET
+# 18-Oct-2026  Wayne Shih              Add IdentityMapMiddleware
+# 18-Oct-2026  Wayne Shih              Add REDIS_REFILL_LOCK_TIMEOUT and REDIS_REFILL_WAIT_TIME
+# 18-Oct-2026  Wayne Shih              Add REDIS_MODEL_SERIALIZER
+# 18-Oct-2026  Wayne Shih              Add FRIENDSHIP_PAGE_NUMBER_PAGINATION
+# 18-Oct-2026  Wayne Shih              Add LastActivityMiddleware and newsfeeds_low queue
+# 18-Oct-2026  Wayne Shih              Add newsfeeds_bulk queue
+# 18-Oct-2026  Wayne Shih              Add NEWSFEED_REBUILD_FROM_FOLLOWINGS
+# 18-Oct-2026  Wayne Shih              Add settings for LocalCache
+# 18-Oct-2026  Wayne Shih              Add COUNTS_WRITE_BEHIND and CELERY_BEAT_SCHEDULE
+# 18-Oct-2026  Wayne Shih              Serve newsfeeds_low by its own worker pool
+# 18-Oct-2026  Wayne Shih              Fix comment of newsfeeds worker queues
+# 18-Oct-2026  Wayne Shih              Document NEWSFEED_REBUILD_FROM_FOLLOWINGS refill lock
+# 18-Oct-2026  Wayne Shih              Fix comment of NEWSFEED_REBUILD_FROM_FOLLOWINGS
 # $HISTORY$
 # =================================================================================================
 
@@ -117,6 +132,12 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    # <Wayne Shih> 18-Oct-2026
+    # Fetch and unpickle each cached object at most once per request
+    'utils.middlewares.IdentityMapMiddleware',
+    # <Wayne Shih> 18-Oct-2026
+    # Track last activity of users for activity-aware fanout
+    'utils.middlewares.LastActivityMiddleware',
 ]
 
 ROOT_URLCONF = 'twitter.urls'
@@ -244,6 +265,26 @@ REDIS_PORT = 6379
 REDIS_DB = 1 if not TESTING else 0
 REDIS_KEY_EXPIRE_TIME = 7 * 86400  # in seconds
 REDIS_LIST_SIZE_LIMIT = 200 if not TESTING else 15
+# <Wayne Shih> 18-Oct-2026
+# Cache only (id, created_at) of objects in timeline lists such as user tweets and newsfeeds,
+# and only hydrate the objects of the requested page through memcached.
+REDIS_TIMELINE_IDS_ONLY = False
+# <Wayne Shih> 18-Oct-2026
+# Cache timelines in sorted sets scored by created_at instead of lists, so that pagination
+# only reads the requested page from redis.
+REDIS_TIMELINE_SORTED_SET = False
+# <Wayne Shih> 18-Oct-2026
+# Serializer of objects cached in redis timelines, which could be
+# - 'utils.caches.redis_serializers.DjangoModelSerializer': django json serializer
+# - 'utils.caches.redis_serializers.CompactModelSerializer': pickled field values, which is
+#   smaller and faster to deserialize, see scripts/benchmark_redis_serializers.py
+REDIS_MODEL_SERIALIZER = 'utils.caches.redis_serializers.DjangoModelSerializer'
+# <Wayne Shih> 18-Oct-2026
+# Only one request refills a missing cache key at a time. The refill lock expires in case its
+# holder dies, and the others wait for the refill at most REDIS_REFILL_WAIT_TIME before they
+# read from db without caching.
+REDIS_REFILL_LOCK_TIMEOUT = 5  # in seconds
+REDIS_REFILL_WAIT_TIME = 0.2  # in seconds
 
 # <Wayne Shih> 11-Jun-2022
 # Celery Configuration Options
@@ -273,7 +314,51 @@ CELERY_TASK_ALWAYS_EAGER = TESTING
 CELERY_QUEUES = (
     Queue('default', routing_key='default'),
     Queue('newsfeeds', routing_key='newsfeeds'),
+    # <Wayne Shih> 18-Oct-2026
+    # Fanout of large accounts, see FANOUT_LARGE_AUTHOR_FOLLOWERS. There is no scheduler between
+    # queues. The redis transport of kombu just rotates the order in which a worker polls its
+    # queues, so each non-empty queue gets about the same share of the worker. Start newsfeeds
+    # workers by the following command, and newsfeeds_low workers separately, see below.
+    # $ celery -A twitter worker -Q newsfeeds,newsfeeds_bulk -l INFO
+    # - https://docs.celeryq.dev/projects/kombu/en/stable/reference/kombu.transport.redis.html
+    Queue('newsfeeds_bulk', routing_key='newsfeeds_bulk'),
+    # <Wayne Shih> 18-Oct-2026
+    # Fanout to dormant followers. Queues consumed by the same worker get about the same share,
+    # so this queue is never consumed by newsfeeds workers. It is served by a separate worker
+    # pool with lower concurrency instead, which is what defers it behind active followers:
+    # $ celery -A twitter worker -Q newsfeeds_low -c 2 -l INFO
+    Queue('newsfeeds_low', routing_key='newsfeeds_low'),
 )
+# <Wayne Shih> 18-Oct-2026
+# Periodic tasks, run by
+# $ celery -A twitter beat -l INFO
+# - https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html
+CELERY_BEAT_SCHEDULE = {
+    'flush-count-deltas': {
+        'task': 'tweets.tasks.flush_count_deltas_task',
+        'schedule': 5.0,  # in seconds
+        'options': {'routing_key': 'default', 'expires': 5.0},
+    },
+}
+
+# <Wayne Shih> 18-Oct-2026
+# Write-behind mode of likes_count and comments_count. Likes and comments change counts in redis
+# only, instead of updating the rows of their objects in the request, which all contend on the
+# row lock of a hot object. Deltas are flushed to db in batches by flush_count_deltas_task, and
+# reads get counts from redis anyway, see RedisHelper.get_count().
+COUNTS_WRITE_BEHIND = False
+
+# <Wayne Shih> 18-Oct-2026
+# Process wide LRU cache in front of memcached for hot objects, see utils/caches/local_cache.py.
+# Only models with a TTL here are cached, keyed by the prefix of their memcached keys.
+LOCAL_CACHE_ENABLED = False
+LOCAL_CACHE_MAX_ENTRIES = 5000
+LOCAL_CACHE_MAX_BYTES = 16 * 1024 * 1024
+LOCAL_CACHE_TTLS = {  # in seconds
+    'user': 60,
+    'user_profile': 30,
+    'tweet': 10,
+}
 
 # <Wayne Shih> 18-Jun-2022
 # Rate Limit
@@ -282,6 +367,19 @@ RATELIMIT_ENABLE = not TESTING
 RATELIMIT_USE_CACHE = 'ratelimit'
 RATELIMIT_CACHE_PREFIX = 'rl:'
 
+# <Wayne Shih> 18-Oct-2026
+# Followers and followings apis are paginated by keyset on (created_at, id) with counts from
+# cached counters. Set it True for the page number response with count and num_pages, which
+# costs a COUNT(*) and an OFFSET scan on every page.
+FRIENDSHIP_PAGE_NUMBER_PAGINATION = False
+
+# <Wayne Shih> 18-Oct-2026
+# Rebuild missing cached newsfeeds by a k-way merge of the cached tweets of followings instead of
+# reading them from the newsfeed table. Newsfeeds merged but not in the table yet are created, so
+# that a user who has just followed many users starts with a full newsfeeds. Only the refill lock
+# holder rebuilds, the other readers read the newsfeed table.
+NEWSFEED_REBUILD_FROM_FOLLOWINGS = False
+
 
 try:
     from .local_settings import *
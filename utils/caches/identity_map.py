@@ -0,0 +1,74 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#   utils provide with a request scoped identity map in front of memcached
+#
+#   While a request is being handled, every object fetched through memcached is kept here by its
+#   cache key, so that the same object is fetched and unpickled at most once per request.
+#   - https://martinfowler.com/eaaCatalog/identityMap.html
+#
+#   It is activated by IdentityMapMiddleware only, so it does nothing out of a request, e.g. in
+#   celery tasks.
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+import threading
+
+
+# <Wayne Shih> 18-Oct-2026
+# Each thread handles one request at a time.
+# - https://docs.python.org/3/library/threading.html#thread-local-data
+_local = threading.local()
+
+
+class IdentityMap(object):
+
+    @classmethod
+    def activate(cls):
+        _local.objects = {}
+
+    @classmethod
+    def deactivate(cls):
+        _local.objects = None
+
+    @classmethod
+    def _get_objects(cls):
+        return getattr(_local, 'objects', None)
+
+    @classmethod
+    def get(cls, key):
+        objects = cls._get_objects()
+        if objects is None:
+            return None
+        return objects.get(key)
+
+    @classmethod
+    def get_many(cls, keys):
+        objects = cls._get_objects()
+        if objects is None:
+            return {}
+        return {key: objects[key] for key in keys if key in objects}
+
+    @classmethod
+    def set(cls, key, obj):
+        objects = cls._get_objects()
+        if objects is not None:
+            objects[key] = obj
+
+    @classmethod
+    def set_many(cls, key_to_obj):
+        objects = cls._get_objects()
+        if objects is not None:
+            objects.update(key_to_obj)
+
+    @classmethod
+    def delete(cls, key):
+        objects = cls._get_objects()
+        if objects is not None:
+            objects.pop(key, None)
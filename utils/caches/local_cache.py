@@ -0,0 +1,174 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#   utils provide with a process wide LRU cache in front of memcached
+#
+#   Very hot objects, e.g. celebrity users and trending tweets, are kept in memory of each worker
+#   process, so that they don't go over the network to memcached on every request.
+#   - Only models with a TTL in LOCAL_CACHE_TTLS are cached, and only if LOCAL_CACHE_ENABLED.
+#   - Entries are bounded by LOCAL_CACHE_MAX_ENTRIES and LOCAL_CACHE_MAX_BYTES, and the least
+#     recently used ones are evicted first.
+#   - Objects are kept pickled like memcached does, so each get returns its own copy.
+#   - Invalidation is published over redis pub/sub, so every worker process drops its stale copy.
+#     A copy missing an invalidation, e.g. while the subscriber reconnects, expires with its TTL.
+#     - https://redis.io/docs/manual/pubsub/
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# $HISTORY$
+# =================================================================================================
+
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from twitter.caches import LOCAL_CACHE_INVALIDATION_CHANNEL
+from utils.caches.redis_client import RedisClient
+
+
+# <Wayne Shih> 18-Oct-2026
+# Shared by all threads of the process, see IdentityMap for request scoped objects instead.
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (expire time, pickled object)
+
+
+class LocalCache(object):
+    num_bytes = 0
+    hits = 0
+    misses = 0
+    _listener_pid = None
+
+    @classmethod
+    def _get_ttl(cls, key):
+        # <Wayne Shih> 18-Oct-2026
+        # Keys are in form of <model name>:<id>, see MemcachedHelper.get_key()
+        if not settings.LOCAL_CACHE_ENABLED:
+            return None
+        return settings.LOCAL_CACHE_TTLS.get(key.split(':', 1)[0])
+
+    @classmethod
+    def _pop(cls, key):
+        # <Wayne Shih> 18-Oct-2026
+        # Caller must hold the lock
+        entry = _entries.pop(key, None)
+        if entry is not None:
+            cls.num_bytes -= len(entry[1])
+
+    @classmethod
+    def get(cls, key):
+        return cls.get_many([key]).get(key)
+
+    @classmethod
+    def get_many(cls, keys):
+        keys = [key for key in keys if cls._get_ttl(key) is not None]
+        if not keys:
+            return {}
+
+        cls._start_invalidation_listener()
+        now = time.monotonic()
+        pickled_objects = {}
+        with _lock:
+            for key in keys:
+                entry = _entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    cls._pop(key)
+                    entry = None
+                if entry is None:
+                    cls.misses += 1
+                    continue
+                _entries.move_to_end(key)
+                cls.hits += 1
+                pickled_objects[key] = entry[1]
+        return {key: pickle.loads(data) for key, data in pickled_objects.items()}
+
+    @classmethod
+    def set(cls, key, obj):
+        cls.set_many({key: obj})
+
+    @classmethod
+    def set_many(cls, key_to_obj):
+        pickled_objects = {}
+        for key, obj in key_to_obj.items():
+            ttl = cls._get_ttl(key)
+            if ttl is None:
+                continue
+            data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+            if len(data) <= settings.LOCAL_CACHE_MAX_BYTES:
+                pickled_objects[key] = (time.monotonic() + ttl, data)
+        if not pickled_objects:
+            return
+
+        with _lock:
+            for key, entry in pickled_objects.items():
+                cls._pop(key)
+                _entries[key] = entry
+                cls.num_bytes += len(entry[1])
+            while len(_entries) > settings.LOCAL_CACHE_MAX_ENTRIES \
+                    or cls.num_bytes > settings.LOCAL_CACHE_MAX_BYTES:
+                _, (_, data) = _entries.popitem(last=False)
+                cls.num_bytes -= len(data)
+
+    @classmethod
+    def delete(cls, key):
+        # <Wayne Shih> 18-Oct-2026
+        # Drop the copy of this process only, see invalidate() for all processes
+        with _lock:
+            cls._pop(key)
+
+    @classmethod
+    def invalidate(cls, key):
+        if cls._get_ttl(key) is None:
+            return
+        cls.delete(key)
+        conn = RedisClient.get_connection()
+        conn.publish(LOCAL_CACHE_INVALIDATION_CHANNEL, key)
+
+    @classmethod
+    def _handle_invalidation(cls, message):
+        cls.delete(message['data'].decode())
+
+    @classmethod
+    def _start_invalidation_listener(cls):
+        # <Wayne Shih> 18-Oct-2026
+        # Started lazily once per process, since gunicorn forks workers after loading the app
+        # and threads don't survive fork. Entries inherited from the parent process might have
+        # missed invalidations, so they are dropped.
+        # - https://github.com/redis/redis-py#publish--subscribe
+        pid = os.getpid()
+        if cls._listener_pid == pid:
+            return
+
+        with _lock:
+            if cls._listener_pid == pid:
+                return
+            _entries.clear()
+            cls.num_bytes = 0
+            pubsub = RedisClient.get_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{LOCAL_CACHE_INVALIDATION_CHANNEL: cls._handle_invalidation})
+            pubsub.run_in_thread(sleep_time=1, daemon=True)
+            cls._listener_pid = pid
+
+    @classmethod
+    def get_stats(cls):
+        with _lock:
+            return {
+                'hits': cls.hits,
+                'misses': cls.misses,
+                'entries': len(_entries),
+                'bytes': cls.num_bytes,
+            }
+
+    @classmethod
+    def clear(cls):
+        with _lock:
+            _entries.clear()
+            cls.num_bytes = 0
+            cls.hits = 0
+            cls.misses = 0
@@ -8,12 +8,23 @@
 #    Date      Name                    Description of Change
 # 27-May-2022  Wayne Shih              Initial create
 # 30-May-2022  Wayne Shih              Refactor utils file structure
+# 18-Oct-2026  Wayne Shih              Add get_objects_through_cache()
+# 18-Oct-2026  Wayne Shih              Look up the request scoped identity map before memcached
+# 18-Oct-2026  Wayne Shih              Add prefetch_objects_through_cache() for a page of instances
+# 18-Oct-2026  Wayne Shih              Look up the process wide LocalCache before memcached
+# 18-Oct-2026  Wayne Shih              Invalidate objects by bumping versions of their keys
+# 18-Oct-2026  Wayne Shih              Create missing versions by one set_many()
 # $HISTORY$
 # =================================================================================================
 
 
 from django.conf import settings
 from django.core.cache import caches
+from django.db import transaction
+
+from utils.caches.identity_map import IdentityMap
+from utils.caches.local_cache import LocalCache
+from utils.time_helpers import datetime_to_timestamp_us, utc_now
 
 
 cache = caches['default'] if not settings.TESTING else caches['testing']
@@ -26,21 +37,168 @@ class MemcachedHelper(object):
         key = f'{model_class.__name__.lower()}:{object_id}'
         return key
 
+    # <Wayne Shih> 18-Oct-2026
+    # Objects are cached in memcached under versioned keys, <key>:v<version>, and invalidated by
+    # bumping the version instead of deleting the key. A reader reads the version before db, so
+    # if it races with a writer, it can only write the old object back under the old version,
+    # which no one reads any more and which expires by itself.
+    # A version which is missing, e.g. evicted, starts over from the current time in
+    # microseconds, so it never goes back to a version of objects cached before.
+    # - https://github.com/memcached/memcached/wiki/ProgrammingTricks#namespacing
+    @classmethod
+    def _get_version_key(cls, key):
+        return f'{key}:version'
+
+    @classmethod
+    def get_versioned_keys(cls, keys):
+        version_keys = {key: cls._get_version_key(key) for key in keys}
+        versions = cache.get_many(version_keys.values())
+        missing_version_keys = [
+            version_key
+            for version_key in version_keys.values()
+            if version_key not in versions
+        ]
+        if missing_version_keys:
+            # <Wayne Shih> 18-Oct-2026
+            # Missing versions are created by one set_many() instead of one add() per key, and
+            # are not read back. A version set by others in the meantime might be overwritten,
+            # which only moves the key to a fresh version, i.e. one more invalidation. Objects
+            # this reader caches under its own version are then never read, and expire.
+            initial_version = datetime_to_timestamp_us(utc_now())
+            missing_versions = {
+                version_key: initial_version
+                for version_key in missing_version_keys
+            }
+            cache.set_many(missing_versions, timeout=None)
+            versions.update(missing_versions)
+        return {
+            key: f'{key}:v{versions.get(version_key, 0)}'
+            for key, version_key in version_keys.items()
+        }
+
+    @classmethod
+    def get_versioned_key(cls, key):
+        return cls.get_versioned_keys([key])[key]
+
+    @classmethod
+    def _bump_version(cls, key):
+        version_key = cls._get_version_key(key)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.add(version_key, datetime_to_timestamp_us(utc_now()), timeout=None)
+
+    @classmethod
+    def bump_version(cls, key):
+        # <Wayne Shih> 18-Oct-2026
+        # Bump once more after the transaction commits, since a reader might read the object
+        # which is not committed yet between the save and the commit.
+        # - https://docs.djangoproject.com/en/3.1/topics/db/transactions/#performing-actions-after-commit
+        cls._bump_version(key)
+        transaction.on_commit(lambda: cls._bump_version(key))
+
     @classmethod
     def get_object_through_cache(cls, model_class, object_id):
         key = cls.get_key(model_class, object_id)
-        obj = cache.get(key)
+        obj = IdentityMap.get(key)
+        if obj is not None:
+            return obj
+
+        obj = LocalCache.get(key)
+        if obj is not None:
+            IdentityMap.set(key, obj)
+            return obj
+
+        versioned_key = cls.get_versioned_key(key)
+        obj = cache.get(versioned_key)
         if obj is not None:
+            LocalCache.set(key, obj)
+            IdentityMap.set(key, obj)
             return obj
 
         # <Wayne Shih> 25-May-2022
         # Here expects the user exists in DB, if not, let it throw an error
         # - https://docs.djangoproject.com/en/4.0/ref/models/querysets/#get
         obj = model_class.objects.get(id=object_id)
-        cache.set(key, obj)
+        cache.set(versioned_key, obj)
+        LocalCache.set(key, obj)
+        IdentityMap.set(key, obj)
         return obj
 
+    @classmethod
+    def get_objects_through_cache(cls, model_class, object_ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Batch version of get_object_through_cache(), which costs one memcached get_many()
+        # and one db query for the cache misses at most. Objects are returned in the order of
+        # object_ids. Unlike get_object_through_cache(), objects not in db are skipped.
+        # - https://docs.djangoproject.com/en/3.1/topics/cache/#basic-usage
+        keys = [cls.get_key(model_class, object_id) for object_id in object_ids]
+        objects = IdentityMap.get_many(keys)
+        uncached_keys = [key for key in keys if key not in objects]
+        if uncached_keys:
+            local_objects = LocalCache.get_many(uncached_keys)
+            IdentityMap.set_many(local_objects)
+            objects.update(local_objects)
+            uncached_keys = [key for key in uncached_keys if key not in local_objects]
+        if uncached_keys:
+            versioned_keys = cls.get_versioned_keys(uncached_keys)
+            memcached_objects = cache.get_many(versioned_keys.values())
+            cached_objects = {
+                key: memcached_objects[versioned_key]
+                for key, versioned_key in versioned_keys.items()
+                if versioned_key in memcached_objects
+            }
+            LocalCache.set_many(cached_objects)
+            IdentityMap.set_many(cached_objects)
+            objects.update(cached_objects)
+        missing_ids = [
+            object_id
+            for object_id, key in zip(object_ids, keys)
+            if key not in objects
+        ]
+        if missing_ids:
+            missing_objects = {
+                cls.get_key(model_class, obj.id): obj
+                for obj in model_class.objects.filter(id__in=missing_ids)
+            }
+            cache.set_many({
+                versioned_keys[key]: obj
+                for key, obj in missing_objects.items()
+            })
+            LocalCache.set_many(missing_objects)
+            IdentityMap.set_many(missing_objects)
+            objects.update(missing_objects)
+
+        return [objects[key] for key in keys if key in objects]
+
+    @classmethod
+    def prefetch_objects_through_cache(cls, instances, model_class, field_name):
+        # <Wayne Shih> 18-Oct-2026
+        # Fetch the objects referred by instance.<field_name>_id for a page of instances in one
+        # get_objects_through_cache(), and attach them to the instances so that
+        # get_related_object_through_cache() costs nothing. Returns the fetched objects.
+        object_ids = list({
+            getattr(instance, f'{field_name}_id')
+            for instance in instances
+            if getattr(instance, f'{field_name}_id') is not None
+        })
+        objects = cls.get_objects_through_cache(model_class, object_ids)
+        id_to_object = {obj.id: obj for obj in objects}
+        for instance in instances:
+            obj = id_to_object.get(getattr(instance, f'{field_name}_id'))
+            if obj is not None:
+                setattr(instance, f'_cached_{field_name}', obj)
+        return objects
+
+    @classmethod
+    def get_related_object_through_cache(cls, instance, model_class, field_name):
+        if hasattr(instance, f'_cached_{field_name}'):
+            return getattr(instance, f'_cached_{field_name}')
+        return cls.get_object_through_cache(model_class, getattr(instance, f'{field_name}_id'))
+
     @classmethod
     def invalidate_object_cache(cls, model_class, object_id):
         key = cls.get_key(model_class, object_id)
-        cache.delete(key)
+        cls.bump_version(key)
+        LocalCache.invalidate(key)
+        IdentityMap.delete(key)
@@ -10,23 +10,266 @@
 # 30-May-2022  Wayne Shih              Refactor utils file structure
 # 05-Jun-2022  Wayne Shih              Only cache REDIS_LIST_SIZE_LIMIT in redis
 # 09-Jun-2022  Wayne Shih              Add helpers to cache and get counts
+# 18-Oct-2026  Wayne Shih              Add helper to push objects to cached lists in one round trip
+# 18-Oct-2026  Wayne Shih              Add ids only mode for cached lists and hydrate_objects()
+# 18-Oct-2026  Wayne Shih              Add sorted set timelines
+# 18-Oct-2026  Wayne Shih              Add get_counts()
+# 18-Oct-2026  Wayne Shih              Update counts atomically by lua script, refill by SET NX
+# 18-Oct-2026  Wayne Shih              Refill missing keys in single flight
+# 18-Oct-2026  Wayne Shih              Serialize timelines by REDIS_MODEL_SERIALIZER
+# 18-Oct-2026  Wayne Shih              Break ties of sorted set timelines by id
+# 18-Oct-2026  Wayne Shih              Add helpers for sorted sets of ids
+# 18-Oct-2026  Wayne Shih              Add helpers for progress records
+# 18-Oct-2026  Wayne Shih              Add get_scores_in_sorted_set() and delete_objects()
+# 18-Oct-2026  Wayne Shih              Add helpers for moving averages
+# 18-Oct-2026  Wayne Shih              Add remove_objects_from_cached_lists()
+# 18-Oct-2026  Wayne Shih              Add is_cached()
+# 18-Oct-2026  Wayne Shih              Add write-behind count deltas
+# 18-Oct-2026  Wayne Shih              Add delete_drifted_counts() for reconciliation
+# 18-Oct-2026  Wayne Shih              Add rebuild to load_objects() for refill lock holder
+# 18-Oct-2026  Wayne Shih              Load id sets to own keys under a renewed lock
+# 18-Oct-2026  Wayne Shih              Remove get_progress_status()
+# 18-Oct-2026  Wayne Shih              Add get_cached_objects_many()
 # $HISTORY$
 # =================================================================================================
 
 
+import time
+import uuid
+from contextlib import contextmanager
+
 from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.module_loading import import_string
 
+from utils.caches.memcached_helpers import MemcachedHelper
 from utils.caches.redis_client import RedisClient
-from utils.caches.redis_serializers import DjangoModelSerializer
+from utils.caches.redis_serializers import (
+    CompactModelSerializer,
+    DjangoModelSerializer,
+    ObjectRef,
+    ObjectRefSerializer,
+)
+from utils.time_helpers import datetime_to_timestamp_us
+
+
+# <Wayne Shih> 18-Oct-2026
+# KEYS are the lists to push to, ARGV[1] is the list size limit and ARGV[i + 1] is the
+# serialized object for KEYS[i]. A list is pushed only if it is cached, so the whole batch
+# costs a single round trip and never touches db.
+PUSH_TO_CACHED_LISTS_SCRIPT = """
+local num_pushed = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('LPUSH', key, ARGV[i + 1])
+        redis.call('LTRIM', key, 0, tonumber(ARGV[1]) - 1)
+        num_pushed = num_pushed + 1
+    end
+end
+return num_pushed
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Same as PUSH_TO_CACHED_LISTS_SCRIPT but for sorted sets, where ARGV[2 * i] is the score and
+# ARGV[2 * i + 1] is the serialized object for KEYS[i].
+PUSH_TO_CACHED_SORTED_SETS_SCRIPT = """
+local num_pushed = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZADD', key, ARGV[2 * i], ARGV[2 * i + 1])
+        redis.call('ZREMRANGEBYRANK', key, 0, -tonumber(ARGV[1]) - 1)
+        num_pushed = num_pushed + 1
+    end
+end
+return num_pushed
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Increase KEYS[1] by ARGV[1] only if it is cached, so that a count is never created from
+# nothing. nil means a cache miss.
+INCR_COUNT_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Release the refill lock KEYS[1] only if it is still held by ARGV[1], OW the lock might have
+# expired and been acquired by someone else.
+# - https://redis.io/docs/manual/patterns/distributed-locks/
+RELEASE_REFILL_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Add ARGV[2] scored by ARGV[1] to sorted set KEYS[1] only if it is cached, so that a partial
+# set is never created from nothing. nil means a cache miss.
+ADD_TO_CACHED_SORTED_SET_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Set the status of item ARGV[1] in progress hash KEYS[1] to ARGV[2], and keep the number of
+# items of each status in the field named by the status. Setting the status an item already has
+# changes nothing, so an item reported twice, e.g. by a retried task, is counted once.
+# ARGV[3] is the expire time of the hash.
+SET_PROGRESS_STATUS_SCRIPT = """
+local field = 'item:' .. ARGV[1]
+local old_status = redis.call('HGET', KEYS[1], field)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if old_status == ARGV[2] then
+    return 0
+end
+if old_status then
+    redis.call('HINCRBY', KEYS[1], old_status, -1)
+end
+redis.call('HSET', KEYS[1], field, ARGV[2])
+redis.call('HINCRBY', KEYS[1], ARGV[2], 1)
+return 1
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Update the exponential moving average KEYS[1] by the sample ARGV[1] of weight ARGV[2]. Floats
+# are returned as strings, since redis truncates numbers returned by lua to integers.
+UPDATE_MOVING_AVERAGE_SCRIPT = """
+local average = tonumber(redis.call('GET', KEYS[1]))
+if average then
+    average = average + tonumber(ARGV[2]) * (tonumber(ARGV[1]) - average)
+else
+    average = tonumber(ARGV[1])
+end
+redis.call('SET', KEYS[1], tostring(average))
+return tostring(average)
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Add ARGV[2] to the delta of object ARGV[1] in hash KEYS[1], which is flushed to db later, and
+# to the cached count KEYS[2] only if it is cached. nil means a cache miss.
+ADD_COUNT_DELTA_SCRIPT = """
+redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return redis.call('INCRBY', KEYS[2], ARGV[2])
+end
+return nil
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Move deltas KEYS[1] to KEYS[2] to be flushed, unless KEYS[2] is left by a flush which failed,
+# which is flushed first. Deltas added in the meantime go to a new KEYS[1].
+START_FLUSH_COUNT_DELTAS_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Keep the refill lock KEYS[1] and the loading key KEYS[2] alive for ARGV[2] seconds only if the
+# lock is still held by ARGV[1]. OW the loading key is dropped, and 0 tells the loader to stop.
+RENEW_ID_SET_LOAD_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    return 1
+end
+redis.call('DEL', KEYS[2])
+return 0
+"""
+
+# <Wayne Shih> 18-Oct-2026
+# Rename the loading key KEYS[2] to KEYS[3] and expire it in ARGV[2] seconds only if the refill
+# lock KEYS[1] is still held by ARGV[1]. OW the loading key is dropped.
+FINISH_ID_SET_LOAD_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('RENAME', KEYS[2], KEYS[3])
+    redis.call('EXPIRE', KEYS[3], ARGV[2])
+    return 1
+end
+redis.call('DEL', KEYS[2])
+return 0
+"""
+
+REFILL_POLL_INTERVAL = 0.01  # in seconds
+
+COUNT_DELTAS_FLUSH_BATCH_SIZE = 500
+COUNT_DELTAS_FLUSH_LOCK_TIMEOUT = 60  # in seconds
+
+# <Wayne Shih> 18-Oct-2026
+# Sorted sets of ids always contain this member scored by 0, so that an empty set is still
+# cached. No object has id 0.
+ID_SET_SENTINEL = 0
+ID_SET_LOAD_BATCH_SIZE = 1000
+# <Wayne Shih> 18-Oct-2026
+# Loading the follower set of a large account takes far longer than REDIS_REFILL_LOCK_TIMEOUT,
+# so the lock is held for this long and renewed after each batch instead.
+ID_SET_LOAD_LOCK_TIMEOUT = 60  # in seconds
 
 
 class RedisHelper(object):
 
+    @classmethod
+    def _get_model_serializer(cls):
+        return import_string(settings.REDIS_MODEL_SERIALIZER)
+
+    @classmethod
+    def serialize(cls, obj):
+        if settings.REDIS_TIMELINE_IDS_ONLY:
+            return ObjectRefSerializer.serialize(obj)
+        return cls._get_model_serializer().serialize(obj)
+
+    @classmethod
+    def deserialize(cls, serialized_data):
+        # <Wayne Shih> 18-Oct-2026
+        # Each model serializer marks its data with its own prefix, so lists cached before
+        # switching REDIS_MODEL_SERIALIZER or REDIS_TIMELINE_IDS_ONLY are still readable.
+        model_serializers = (
+            cls._get_model_serializer(),
+            DjangoModelSerializer,
+            CompactModelSerializer,
+        )
+        for model_serializer in model_serializers:
+            if serialized_data.startswith(model_serializer.PREFIX):
+                return model_serializer.deserialize(serialized_data)
+        return ObjectRefSerializer.deserialize(serialized_data)
+
+    @classmethod
+    @contextmanager
+    def _single_flight_refill(cls, key):
+        # <Wayne Shih> 18-Oct-2026
+        # Cache stampede protection. Yields True to the only caller which should refill the
+        # missing key. The others wait until the refill is done and get False, then they read
+        # the key, or read from db if it is still missing.
+        # - https://en.wikipedia.org/wiki/Cache_stampede
+        conn = RedisClient.get_connection()
+        lock_key = f'{key}:refill_lock'
+        token = uuid.uuid4().hex
+        if not conn.set(lock_key, token, nx=True, ex=settings.REDIS_REFILL_LOCK_TIMEOUT):
+            deadline = time.monotonic() + settings.REDIS_REFILL_WAIT_TIME
+            while conn.exists(lock_key) and time.monotonic() < deadline:
+                time.sleep(REFILL_POLL_INTERVAL)
+            yield False
+            return
+
+        try:
+            # <Wayne Shih> 18-Oct-2026
+            # The key might have been refilled by the previous lock holder in the meantime
+            yield not conn.exists(key)
+        finally:
+            release_refill_lock = conn.register_script(RELEASE_REFILL_LOCK_SCRIPT)
+            release_refill_lock(keys=[lock_key], args=[token])
+
     @classmethod
     def _load_objects_to_cache(cls, key, queryset):
         conn = RedisClient.get_connection()
         serialized_list = [
-            DjangoModelSerializer.serialize(obj)
+            cls.serialize(obj)
             for obj in queryset[:settings.REDIS_LIST_SIZE_LIMIT]
         ]
         if serialized_list:
@@ -34,69 +277,593 @@ class RedisHelper(object):
             conn.expire(key, settings.REDIS_KEY_EXPIRE_TIME)
 
     @classmethod
-    def load_objects(cls, key, queryset):
+    def _get_sorted_set_key(cls, key):
+        # <Wayne Shih> 18-Oct-2026
+        # Sorted sets use their own keys so that switching REDIS_TIMELINE_SORTED_SET never hits
+        # a list cached under the same key.
+        return f'{key}:zset'
+
+    @classmethod
+    def _load_objects_to_sorted_set(cls, key, queryset):
+        conn = RedisClient.get_connection()
+        mapping = {
+            cls.serialize(obj): datetime_to_timestamp_us(obj.created_at)
+            for obj in queryset[:settings.REDIS_LIST_SIZE_LIMIT]
+        }
+        if mapping:
+            conn.zadd(key, mapping)
+            conn.expire(key, settings.REDIS_KEY_EXPIRE_TIME)
+
+    @classmethod
+    def load_objects(cls, key, queryset, rebuild=None):
+        # <Wayne Shih> 18-Oct-2026
+        # rebuild, if given, is called instead of reading queryset to refill the missing key.
+        # It is called by the refill lock holder only, so concurrent readers never rebuild the
+        # same key. The others read queryset if the key is still missing.
         conn = RedisClient.get_connection()
-        if conn.exists(key):
-            serialized_list = conn.lrange(key, 0, -1)
-            return [
-                DjangoModelSerializer.deserialize(serialized_data)
-                for serialized_data in serialized_list
-            ]
+        if settings.REDIS_TIMELINE_SORTED_SET:
+            key = cls._get_sorted_set_key(key)
+            if not conn.exists(key):
+                with cls._single_flight_refill(key) as should_refill:
+                    if should_refill:
+                        objects = rebuild() if rebuild else queryset
+                        cls._load_objects_to_sorted_set(key, objects)
+                if not conn.exists(key):
+                    return list(queryset)
+            return SortedSetTimeline(key)
+
+        if not conn.exists(key):
+            with cls._single_flight_refill(key) as should_refill:
+                if should_refill:
+                    objects = rebuild() if rebuild else queryset
+                    cls._load_objects_to_cache(key, objects)
+                    return list(objects)
+            if not conn.exists(key):
+                return list(queryset)
 
-        cls._load_objects_to_cache(key, queryset)
-        return list(queryset)
+        serialized_list = conn.lrange(key, 0, -1)
+        return [
+            cls.deserialize(serialized_data)
+            for serialized_data in serialized_list
+        ]
+
+    @classmethod
+    def is_cached(cls, key):
+        conn = RedisClient.get_connection()
+        if settings.REDIS_TIMELINE_SORTED_SET:
+            key = cls._get_sorted_set_key(key)
+        return bool(conn.exists(key))
+
+    @classmethod
+    def get_cached_objects_many(cls, keys):
+        # <Wayne Shih> 18-Oct-2026
+        # Read many cached timelines in one pipeline. Returns {key: objects} from the newest to
+        # the oldest, where objects is None if the key is not cached. Unlike load_objects(),
+        # missing keys are not refilled, which is left to the caller.
+        conn = RedisClient.get_connection()
+        keys = list(keys)
+        pipeline = conn.pipeline(transaction=False)
+        for key in keys:
+            if settings.REDIS_TIMELINE_SORTED_SET:
+                key = cls._get_sorted_set_key(key)
+                pipeline.exists(key)
+                pipeline.zrevrange(key, 0, -1)
+                continue
+            pipeline.exists(key)
+            pipeline.lrange(key, 0, -1)
+        results = pipeline.execute()
+        cached_objects = {}
+        for key, exists, serialized_list in zip(keys, results[::2], results[1::2]):
+            if not exists:
+                cached_objects[key] = None
+                continue
+            objects = [cls.deserialize(serialized_data) for serialized_data in serialized_list]
+            if settings.REDIS_TIMELINE_SORTED_SET:
+                objects.sort(key=get_timeline_sort_key)
+            cached_objects[key] = objects
+        return cached_objects
 
     @classmethod
     def push_objects(cls, key, obj, queryset):
         conn = RedisClient.get_connection()
-        if conn.exists(key):
-            conn.lpush(key, DjangoModelSerializer.serialize(obj))
-            conn.ltrim(key, 0, settings.REDIS_LIST_SIZE_LIMIT - 1)
+        if settings.REDIS_TIMELINE_SORTED_SET:
+            key = cls._get_sorted_set_key(key)
+            if not conn.exists(key):
+                with cls._single_flight_refill(key) as should_refill:
+                    if should_refill:
+                        cls._load_objects_to_sorted_set(key, queryset)
+                        return
+                if not conn.exists(key):
+                    return
+            conn.zadd(key, {cls.serialize(obj): datetime_to_timestamp_us(obj.created_at)})
+            conn.zremrangebyrank(key, 0, -settings.REDIS_LIST_SIZE_LIMIT - 1)
             return
 
-        cls._load_objects_to_cache(key, queryset)
+        if not conn.exists(key):
+            with cls._single_flight_refill(key) as should_refill:
+                if should_refill:
+                    cls._load_objects_to_cache(key, queryset)
+                    return
+            # <Wayne Shih> 18-Oct-2026
+            # Refilled by someone else, who might have missed obj, so still push it
+            if not conn.exists(key):
+                return
+
+        conn.lpush(key, cls.serialize(obj))
+        conn.ltrim(key, 0, settings.REDIS_LIST_SIZE_LIMIT - 1)
+
+    @classmethod
+    def delete_objects(cls, keys):
+        # <Wayne Shih> 18-Oct-2026
+        # Delete cached timelines, no matter if they are cached in lists or sorted sets
+        if not keys:
+            return
+        conn = RedisClient.get_connection()
+        conn.delete(*keys, *[cls._get_sorted_set_key(key) for key in keys])
+
+    @classmethod
+    def push_objects_to_cached_lists(cls, keys_and_objects):
+        # <Wayne Shih> 18-Oct-2026
+        # Bulk version of push_objects() for fanout. Unlike push_objects(), a list which is not
+        # cached is skipped instead of being refilled from db. It will be loaded by its owner's
+        # next read anyway, and refilling thousands of cold lists here is what makes fanout slow.
+        if not keys_and_objects:
+            return 0
+
+        conn = RedisClient.get_connection()
+        if settings.REDIS_TIMELINE_SORTED_SET:
+            push_to_cached_sorted_sets = conn.register_script(PUSH_TO_CACHED_SORTED_SETS_SCRIPT)
+            keys = [cls._get_sorted_set_key(key) for key, _ in keys_and_objects]
+            args = [settings.REDIS_LIST_SIZE_LIMIT]
+            for _, obj in keys_and_objects:
+                args.extend([datetime_to_timestamp_us(obj.created_at), cls.serialize(obj)])
+            return push_to_cached_sorted_sets(keys=keys, args=args)
+
+        push_to_cached_lists = conn.register_script(PUSH_TO_CACHED_LISTS_SCRIPT)
+        keys = [key for key, _ in keys_and_objects]
+        args = [settings.REDIS_LIST_SIZE_LIMIT] + [
+            cls.serialize(obj)
+            for _, obj in keys_and_objects
+        ]
+        return push_to_cached_lists(keys=keys, args=args)
+
+    @classmethod
+    def remove_objects_from_cached_lists(cls, keys_and_objects):
+        # <Wayne Shih> 18-Oct-2026
+        # Counterpart of push_objects_to_cached_lists(). Cached entries are removed by their
+        # serialized value, which is rebuilt from the objects, so lists are never read back.
+        # LREM costs O(REDIS_LIST_SIZE_LIMIT) at most and ZREM O(log(REDIS_LIST_SIZE_LIMIT)).
+        # - https://redis.io/commands/lrem/
+        # - https://redis.io/commands/zrem/
+        if not keys_and_objects:
+            return 0
+
+        conn = RedisClient.get_connection()
+        pipeline = conn.pipeline()
+        for key, obj in keys_and_objects:
+            if settings.REDIS_TIMELINE_SORTED_SET:
+                pipeline.zrem(cls._get_sorted_set_key(key), cls.serialize(obj))
+            else:
+                pipeline.lrem(key, 1, cls.serialize(obj))
+        return sum(pipeline.execute())
+
+    @classmethod
+    def hydrate_objects(cls, model_class, objects):
+        # <Wayne Shih> 18-Oct-2026
+        # Replace ObjectRefs with the objects they refer to, which costs one memcached get_many()
+        # and one db query at most. Objects which have been deleted are skipped.
+        object_ids = [obj.id for obj in objects if isinstance(obj, ObjectRef)]
+        if not object_ids:
+            return objects
+
+        hydrated_objects = {
+            obj.id: obj
+            for obj in MemcachedHelper.get_objects_through_cache(model_class, object_ids)
+        }
+        return [
+            hydrated_objects[obj.id] if isinstance(obj, ObjectRef) else obj
+            for obj in objects
+            if not isinstance(obj, ObjectRef) or obj.id in hydrated_objects
+        ]
 
     @classmethod
     def _get_key_for_count(cls, obj, attr):
         return f'{obj.__class__.__name__}:{obj.id}:{attr}'
 
+    # <Wayne Shih> 18-Oct-2026
+    # In write-behind mode, see COUNTS_WRITE_BEHIND, counts are changed in redis only and their
+    # deltas are kept in a hash per model and attr, field per object id, until they are flushed
+    # to db in batches by flush_count_deltas(). So counts refilled from db add deltas pending.
+    @classmethod
+    def _get_keys_for_count_deltas(cls, model_class, attr):
+        key = f'{model_class.__name__}:{attr}:deltas'
+        return key, f'{key}:flushing'
+
+    @classmethod
+    def get_pending_count_deltas(cls, model_class, object_ids, attr):
+        conn = RedisClient.get_connection()
+        pipeline = conn.pipeline()
+        for key in cls._get_keys_for_count_deltas(model_class, attr):
+            pipeline.hmget(key, object_ids)
+        deltas = {object_id: 0 for object_id in object_ids}
+        for values in pipeline.execute():
+            for object_id, value in zip(object_ids, values):
+                deltas[object_id] += int(value or 0)
+        return deltas
+
+    @classmethod
+    def add_count_delta(cls, obj, attr, amount):
+        conn = RedisClient.get_connection()
+        deltas_key, _ = cls._get_keys_for_count_deltas(obj.__class__, attr)
+        key = cls._get_key_for_count(obj, attr)
+        add_count_delta = conn.register_script(ADD_COUNT_DELTA_SCRIPT)
+        count = add_count_delta(keys=[deltas_key, key], args=[obj.id, amount])
+        if count is not None:
+            return count
+        return cls._refill_count_cache_from_db(key, obj, attr)
+
+    @classmethod
+    def flush_count_deltas(cls, model_class, attr):
+        # <Wayne Shih> 18-Oct-2026
+        # Deltas of many likes to the same object are coalesced into one update, and updates of
+        # a batch of objects go in one query. Only one flush of a model and attr runs at a time.
+        # A delta is removed right after its batch commits, so a flush which fails is resumed
+        # by the next one without applying the batches done twice.
+        # Counts refilled between the commit and the removal might count a delta twice, which
+        # is repaired by reconciliation.
+        conn = RedisClient.get_connection()
+        deltas_key, flushing_key = cls._get_keys_for_count_deltas(model_class, attr)
+        lock_key = f'{flushing_key}:lock'
+        token = uuid.uuid4().hex
+        if not conn.set(lock_key, token, nx=True, ex=COUNT_DELTAS_FLUSH_LOCK_TIMEOUT):
+            return 0
+
+        try:
+            start_flush = conn.register_script(START_FLUSH_COUNT_DELTAS_SCRIPT)
+            values = start_flush(keys=[deltas_key, flushing_key])
+            deltas = {
+                int(object_id): int(delta)
+                for object_id, delta in zip(values[::2], values[1::2])
+            }
+            object_ids = list(deltas)
+            for i in range(0, len(object_ids), COUNT_DELTAS_FLUSH_BATCH_SIZE):
+                batch_ids = object_ids[i:i + COUNT_DELTAS_FLUSH_BATCH_SIZE]
+                cls.update_counts_in_db(model_class, attr, {
+                    object_id: deltas[object_id]
+                    for object_id in batch_ids
+                })
+                conn.hdel(flushing_key, *batch_ids)
+            return len(object_ids)
+        finally:
+            release_lock = conn.register_script(RELEASE_REFILL_LOCK_SCRIPT)
+            release_lock(keys=[lock_key], args=[token])
+
+    @classmethod
+    def update_counts_in_db(cls, model_class, attr, deltas):
+        # <Wayne Shih> 18-Oct-2026
+        # UPDATE ... SET attr = attr + CASE id WHEN ... END WHERE id IN (...)
+        # - https://docs.djangoproject.com/en/3.1/ref/models/conditional-expressions/
+        deltas = {object_id: delta for object_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        model_class.objects.filter(id__in=deltas).update(**{
+            attr: F(attr) + Case(
+                *[When(id=object_id, then=Value(delta)) for object_id, delta in deltas.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        })
+
     @classmethod
     def _refill_count_cache_from_db(cls, key, obj, attr):
+        # <Wayne Shih> 18-Oct-2026
+        # SET NX never overwrites a count which has been refilled and increased by others
+        # in the meantime, so no increment is lost while the key is being refilled.
         conn = RedisClient.get_connection()
-        obj.refresh_from_db()
-        conn.set(key, getattr(obj, attr))
-        conn.expire(key, settings.REDIS_KEY_EXPIRE_TIME)
-        return getattr(obj, attr)
+        with cls._single_flight_refill(key) as should_refill:
+            if not should_refill:
+                count = conn.get(key)
+                if count is not None:
+                    return int(count)
+
+            count = obj.__class__.objects.filter(id=obj.id).values_list(attr, flat=True).first()
+            if count is not None:
+                count += cls.get_pending_count_deltas(obj.__class__, [obj.id], attr)[obj.id]
+            if should_refill and count is not None:
+                conn.set(key, count, ex=settings.REDIS_KEY_EXPIRE_TIME, nx=True)
+            return count
 
     @classmethod
     def get_count(cls, obj, attr):
         conn = RedisClient.get_connection()
         key = cls._get_key_for_count(obj, attr)
-        if conn.exists(key):
-            return int(conn.get(key))
+        count = conn.get(key)
+        if count is not None:
+            return int(count)
 
         return cls._refill_count_cache_from_db(key, obj, attr)
 
     @classmethod
-    def incr_count(cls, obj, attr):
+    def get_counts(cls, objects, attr):
+        # <Wayne Shih> 18-Oct-2026
+        # Batch version of get_count(), which returns {obj.id: count} by one MGET and one db
+        # query for the counts not in cache.
+        if not objects:
+            return {}
+
+        conn = RedisClient.get_connection()
+        keys = [cls._get_key_for_count(obj, attr) for obj in objects]
+        counts = {}
+        missing_objects = []
+        for obj, count in zip(objects, conn.mget(keys)):
+            if count is None:
+                missing_objects.append(obj)
+            else:
+                counts[obj.id] = int(count)
+        if not missing_objects:
+            return counts
+
+        model_class = missing_objects[0].__class__
+        missing_ids = [obj.id for obj in missing_objects]
+        db_counts = dict(model_class.objects.filter(id__in=missing_ids).values_list('id', attr))
+        pending_deltas = cls.get_pending_count_deltas(model_class, missing_ids, attr)
+        for object_id, count in db_counts.items():
+            if count is not None:
+                db_counts[object_id] = count + pending_deltas[object_id]
+        pipeline = conn.pipeline()
+        for obj in missing_objects:
+            count = db_counts.get(obj.id)
+            counts[obj.id] = count
+            if count is not None:
+                key = cls._get_key_for_count(obj, attr)
+                pipeline.set(key, count, ex=settings.REDIS_KEY_EXPIRE_TIME, nx=True)
+        pipeline.execute()
+        return counts
+
+    @classmethod
+    def delete_drifted_counts(cls, model_class, counts, attr):
+        # <Wayne Shih> 18-Oct-2026
+        # counts are {object_id: count} recounted from db. Cached counts which drifted are
+        # deleted rather than overwritten, so that they are refilled from db and deltas pending
+        # on next read without losing any increment in the meantime.
+        if not counts:
+            return 0
+
+        conn = RedisClient.get_connection()
+        keys = [f'{model_class.__name__}:{object_id}:{attr}' for object_id in counts]
+        drifted_keys = [
+            key
+            for key, count, cached_count in zip(keys, counts.values(), conn.mget(keys))
+            if cached_count is not None and int(cached_count) != count
+        ]
+        if drifted_keys:
+            conn.delete(*drifted_keys)
+        return len(drifted_keys)
+
+    @classmethod
+    def _incr_count_by(cls, obj, attr, amount):
         conn = RedisClient.get_connection()
         key = cls._get_key_for_count(obj, attr)
-        if conn.exists(key):
-            return conn.incr(key)
+        incr_count_if_exists = conn.register_script(INCR_COUNT_IF_EXISTS_SCRIPT)
+        count = incr_count_if_exists(keys=[key], args=[amount])
+        if count is not None:
+            return count
 
         # <Wayne Shih> 05-Jun-2022
         # Caller needs to guarantee that it updates the count in db itself.
         # This helper is only responsible for the count in redis cache.
         return cls._refill_count_cache_from_db(key, obj, attr)
 
+    @classmethod
+    def incr_count(cls, obj, attr):
+        return cls._incr_count_by(obj, attr, 1)
+
     @classmethod
     def decr_count(cls, obj, attr):
+        return cls._incr_count_by(obj, attr, -1)
+
+    @classmethod
+    def _load_ids_to_sorted_set(cls, key, ids_and_scores, lock_key, token):
+        # <Wayne Shih> 18-Oct-2026
+        # Large sets are loaded in batches to a temporary key of this loader which is renamed at
+        # the end, so that nobody reads a partially loaded set. The lock is renewed after each
+        # batch. If it has been lost, e.g. the loader stalled, another loader has taken over,
+        # so this one stops and never renames its set over the other's.
+        conn = RedisClient.get_connection()
+        loading_key = f'{key}:loading:{token}'
+        renew_load = conn.register_script(RENEW_ID_SET_LOAD_SCRIPT)
+        mapping = {ID_SET_SENTINEL: 0}
+        for object_id, score in ids_and_scores:
+            mapping[object_id] = score
+            if len(mapping) >= ID_SET_LOAD_BATCH_SIZE:
+                conn.zadd(loading_key, mapping)
+                mapping = {}
+                if not renew_load(keys=[lock_key, loading_key],
+                                  args=[token, ID_SET_LOAD_LOCK_TIMEOUT]):
+                    return False
+        if mapping:
+            conn.zadd(loading_key, mapping)
+        finish_load = conn.register_script(FINISH_ID_SET_LOAD_SCRIPT)
+        return bool(finish_load(
+            keys=[lock_key, loading_key, key],
+            args=[token, settings.REDIS_KEY_EXPIRE_TIME],
+        ))
+
+    @classmethod
+    def load_id_sorted_set(cls, key, get_ids_and_scores):
+        # <Wayne Shih> 18-Oct-2026
+        # Cache a whole set of ids scored by time, e.g. followers scored by follow time.
+        # get_ids_and_scores() returns an iterable of (id, score), which is only called by the
+        # caller holding the refill lock. Returns whether the set is cached, OW the caller
+        # needs to read from db. Unlike _single_flight_refill(), the others never wait for a
+        # load, which might take long.
         conn = RedisClient.get_connection()
-        key = cls._get_key_for_count(obj, attr)
         if conn.exists(key):
-            return conn.decr(key)
+            return True
 
-        # <Wayne Shih> 05-Jun-2022
-        # Caller needs to guarantee that it updates the count in db itself.
-        # This helper is only responsible for the count in redis cache.
-        return cls._refill_count_cache_from_db(key, obj, attr)
+        lock_key = f'{key}:refill_lock'
+        token = uuid.uuid4().hex
+        if not conn.set(lock_key, token, nx=True, ex=ID_SET_LOAD_LOCK_TIMEOUT):
+            return bool(conn.exists(key))
+        try:
+            if not conn.exists(key):
+                cls._load_ids_to_sorted_set(key, get_ids_and_scores(), lock_key, token)
+        finally:
+            release_refill_lock = conn.register_script(RELEASE_REFILL_LOCK_SCRIPT)
+            release_refill_lock(keys=[lock_key], args=[token])
+        return bool(conn.exists(key))
+
+    @classmethod
+    def iter_ids_in_sorted_set(cls, key, batch_size):
+        # <Wayne Shih> 18-Oct-2026
+        # Yield lists of ids from the oldest to the newest by keyset on scores, so that ids
+        # added or removed in the meantime never make others skipped or yielded twice, which
+        # could happen if paged by ranks. Each batch is completed with the ids tied with its
+        # last score, so it might have more than batch_size ids.
+        conn = RedisClient.get_connection()
+        # <Wayne Shih> 18-Oct-2026
+        # Exclude ID_SET_SENTINEL scored by 0
+        min_score = '(0'
+        while True:
+            entries = conn.zrangebyscore(key, min_score, '+inf', start=0, num=batch_size,
+                                         withscores=True)
+            if not entries:
+                return
+            last_score = int(entries[-1][1])
+            is_last_batch = len(entries) < batch_size
+            if not is_last_batch:
+                entries = [entry for entry in entries if int(entry[1]) != last_score]
+                entries += conn.zrangebyscore(key, last_score, last_score, withscores=True)
+            yield [int(member) for member, _ in entries]
+            if is_last_batch:
+                return
+            min_score = f'({last_score}'
+
+    @classmethod
+    def get_scores_in_sorted_set(cls, key, ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Returns {id: score} in one round trip, where score is None if id is not a member.
+        # A pipeline of ZSCORE is used instead of ZMSCORE, which needs redis 6.2.
+        # - https://redis.io/commands/zmscore/
+        conn = RedisClient.get_connection()
+        ids = list(ids)
+        pipeline = conn.pipeline(transaction=False)
+        for object_id in ids:
+            pipeline.zscore(key, object_id)
+        return dict(zip(ids, pipeline.execute()))
+
+    @classmethod
+    def get_ids_in_sorted_set(cls, key, ids):
+        # <Wayne Shih> 18-Oct-2026
+        # Batch membership check in one round trip
+        return {
+            object_id
+            for object_id, score in cls.get_scores_in_sorted_set(key, ids).items()
+            if score is not None
+        }
+
+    @classmethod
+    def add_id_to_cached_sorted_set(cls, key, object_id, score):
+        conn = RedisClient.get_connection()
+        add_to_cached_sorted_set = conn.register_script(ADD_TO_CACHED_SORTED_SET_SCRIPT)
+        add_to_cached_sorted_set(keys=[key], args=[score, object_id])
+
+    @classmethod
+    def remove_id_from_sorted_set(cls, key, object_id):
+        conn = RedisClient.get_connection()
+        conn.zrem(key, object_id)
+
+    @classmethod
+    def update_moving_average(cls, key, value, weight):
+        conn = RedisClient.get_connection()
+        update_moving_average = conn.register_script(UPDATE_MOVING_AVERAGE_SCRIPT)
+        return float(update_moving_average(keys=[key], args=[value, weight]))
+
+    @classmethod
+    def get_moving_average(cls, key):
+        conn = RedisClient.get_connection()
+        average = conn.get(key)
+        return float(average) if average is not None else None
+
+    @classmethod
+    def set_progress_status(cls, key, item, status):
+        conn = RedisClient.get_connection()
+        set_progress_status = conn.register_script(SET_PROGRESS_STATUS_SCRIPT)
+        return bool(set_progress_status(
+            keys=[key],
+            args=[item, status, settings.REDIS_KEY_EXPIRE_TIME],
+        ))
+
+
+def get_timeline_sort_key(obj):
+    # <Wayne Shih> 18-Oct-2026
+    # Timelines are ordered by (created_at, id) from newest to oldest, which is ascending by this
+    # key. The id breaks ties of objects created in the same microsecond. Objects not saved in db
+    # such as newsfeeds of pull mode tweets have no id, and go after the saved ones.
+    return -datetime_to_timestamp_us(obj.created_at), -(obj.id or 0)
+
+
+class SortedSetTimeline(object):
+    # <Wayne Shih> 18-Oct-2026
+    # Lazy timeline cached in a redis sorted set scored by created_at in microseconds.
+    # Pagination reads a page by ZREVRANGEBYSCORE ... LIMIT in O(log(n) + page_size) instead
+    # of loading the whole cached list.
+    # - https://redis.io/commands/zrevrangebyscore/
+
+    def __init__(self, key):
+        self.key = key
+
+    def __iter__(self):
+        return iter(self.get_older())
+
+    def __len__(self):
+        conn = RedisClient.get_connection()
+        return conn.zcard(self.key)
+
+    def _load(self, max_score, min_score, limit=None):
+        conn = RedisClient.get_connection()
+        if limit is None:
+            members = conn.zrevrangebyscore(self.key, max_score, min_score, withscores=True)
+        else:
+            members = conn.zrevrangebyscore(
+                self.key, max_score, min_score, start=0, num=limit, withscores=True,
+            )
+        if limit is not None and len(members) == limit:
+            # <Wayne Shih> 18-Oct-2026
+            # Members with the same score are ordered by their serialized data rather than id,
+            # so load the whole tie at the end of the page, OW the next page might skip some.
+            last_score = members[-1][1]
+            members = [member for member in members if member[1] != last_score]
+            members += conn.zrevrangebyscore(self.key, last_score, last_score, withscores=True)
+        objects = [
+            RedisHelper.deserialize(serialized_data)
+            for serialized_data, _ in members
+        ]
+        return sorted(objects, key=get_timeline_sort_key)
+
+    def _load_ties(self, timestamp_us):
+        return self._load(timestamp_us, timestamp_us)
+
+    # <Wayne Shih> 18-Oct-2026
+    # Cursors are (created_at in microseconds, id). If id is None, only created_at is compared.
+    # '(' means exclusive.
+    def get_newer(self, timestamp_us, object_id=None):
+        objects = self._load('+inf', f'({timestamp_us}')
+        if object_id is not None:
+            objects += [obj for obj in self._load_ties(timestamp_us) if (obj.id or 0) > object_id]
+        return sorted(objects, key=get_timeline_sort_key)
+
+    def get_older(self, timestamp_us=None, object_id=None, limit=None):
+        if timestamp_us is None:
+            return self._load('+inf', '-inf', limit)
+
+        objects = []
+        if object_id is not None:
+            objects = [
+                obj
+                for obj in self._load_ties(timestamp_us)
+                if (obj.id or 0) < object_id
+            ]
+        # <Wayne Shih> 18-Oct-2026
+        # More than limit objects might be returned, which are cut by the caller
+        return objects + self._load(f'({timestamp_us}', '-inf', limit)
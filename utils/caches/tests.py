@@ -8,14 +8,46 @@
 #    Date      Name                    Description of Change
 # 28-May-2022  Wayne Shih              Initial create
 # 30-May-2022  Wayne Shih              Refactor utils file structure
+# 18-Oct-2026  Wayne Shih              Test ObjectRefSerializer and get_objects_through_cache()
+# 18-Oct-2026  Wayne Shih              Add a test for count helpers
+# 18-Oct-2026  Wayne Shih              Add a test for identity map
+# 18-Oct-2026  Wayne Shih              Add a test for prefetch_objects_through_cache()
+# 18-Oct-2026  Wayne Shih              Add a test for single flight refill
+# 18-Oct-2026  Wayne Shih              Add a test for CompactModelSerializer
+# 18-Oct-2026  Wayne Shih              Add a test for sorted sets of ids
+# 18-Oct-2026  Wayne Shih              Add a test for local cache
+# 18-Oct-2026  Wayne Shih              Add a test for versioned keys
+# 18-Oct-2026  Wayne Shih              Add test_write_behind_counts
+# 18-Oct-2026  Wayne Shih              Test missing versions are created in one batch
+# 18-Oct-2026  Wayne Shih              Test id set loader losing its lock
+# 18-Oct-2026  Wayne Shih              Add test for get_cached_objects_many()
 # $HISTORY$
 # =================================================================================================
 
 
+import pickle
+import time
+from unittest import mock
+
 from django.conf import settings
+from django.contrib.auth.models import User
 
+from accounts.services import UserService
 from testing.testcases import TestCase
+from tweets.models import Tweet
+from tweets.services import TweetService
+from tweets.tasks import flush_count_deltas_task
+from twitter.caches import LOCAL_CACHE_INVALIDATION_CHANNEL, USER_TWEETS_PATTERN
+from utils.caches.identity_map import IdentityMap
+from utils.caches.local_cache import LocalCache
+from utils.caches.memcached_helpers import MemcachedHelper, cache
 from utils.caches.redis_client import RedisClient
+from utils.caches.redis_helpers import RedisHelper
+from utils.caches.redis_serializers import (
+    CompactModelSerializer,
+    ObjectRef,
+    ObjectRefSerializer,
+)
 
 
 class UtilsCachesTest(TestCase):
@@ -43,3 +75,414 @@ class UtilsCachesTest(TestCase):
             except Exception as error:
                 self.assertEqual(error.__str__(), error_message)
             settings.TESTING = True
+
+    def test_object_ref_serializer(self):
+        user = self.create_user('lbj23')
+        tweet = self.create_tweet(user, 'I am the King!')
+        serialized_tweet = ObjectRefSerializer.serialize(tweet)
+        self.assertEqual(serialized_tweet.startswith(f'{tweet.id}:'), True)
+        self.assertEqual(ObjectRefSerializer.serialize(None), None)
+
+        conn = RedisClient.get_connection()
+        conn.set(f'tweet:{tweet.id}', serialized_tweet)
+        tweet_ref = ObjectRefSerializer.deserialize(conn.get(f'tweet:{tweet.id}'))
+        self.assertEqual(tweet_ref, ObjectRef(tweet.id, tweet.created_at))
+        self.assertEqual(ObjectRefSerializer.deserialize(None), None)
+
+    def test_get_objects_through_cache(self):
+        user = self.create_user('lbj23')
+        tweets = [self.create_tweet(user, f'tweet - {i}') for i in range(3)]
+        tweet_ids = [tweets[2].id, tweets[0].id, tweets[1].id]
+
+        # all cache miss  <Wayne Shih> 18-Oct-2026
+        cached_tweets = MemcachedHelper.get_objects_through_cache(Tweet, tweet_ids)
+        self.assertEqual([tweet.id for tweet in cached_tweets], tweet_ids)
+        for tweet_id in tweet_ids:
+            key = MemcachedHelper.get_versioned_key(MemcachedHelper.get_key(Tweet, tweet_id))
+            self.assertEqual(cache.get(key).id, tweet_id)
+
+        # partial cache hit, and tweets not in db are skipped  <Wayne Shih> 18-Oct-2026
+        non_existing_tweet_id = -1
+        tweets[0].content = 'new content'
+        tweets[0].save()
+        cached_tweets = MemcachedHelper.get_objects_through_cache(
+            Tweet,
+            [non_existing_tweet_id] + tweet_ids,
+        )
+        self.assertEqual([tweet.id for tweet in cached_tweets], tweet_ids)
+        self.assertEqual(cached_tweets[1].content, 'new content')
+        self.assertEqual(MemcachedHelper.get_objects_through_cache(Tweet, []), [])
+
+    def test_counts(self):
+        user = self.create_user('lbj23')
+        tweets = [self.create_tweet(user, f'tweet - {i}') for i in range(2)]
+        Tweet.objects.filter(id=tweets[0].id).update(likes_count=3)
+        conn = RedisClient.get_connection()
+        key = f'Tweet:{tweets[0].id}:likes_count'
+
+        # incr on cache miss refills the count from db  <Wayne Shih> 18-Oct-2026
+        self.assertEqual(RedisHelper.incr_count(tweets[0], 'likes_count'), 3)
+        self.assertEqual(conn.get(key), b'3')
+
+        # incr/decr on cache hit  <Wayne Shih> 18-Oct-2026
+        self.assertEqual(RedisHelper.incr_count(tweets[0], 'likes_count'), 4)
+        self.assertEqual(RedisHelper.decr_count(tweets[0], 'likes_count'), 3)
+        self.assertEqual(RedisHelper.get_count(tweets[0], 'likes_count'), 3)
+
+        # refill never overwrites a cached count  <Wayne Shih> 18-Oct-2026
+        RedisHelper._refill_count_cache_from_db(key, tweets[0], 'likes_count')
+        conn.incr(key)
+        RedisHelper._refill_count_cache_from_db(key, tweets[0], 'likes_count')
+        self.assertEqual(RedisHelper.get_count(tweets[0], 'likes_count'), 4)
+
+        # get counts of many objects  <Wayne Shih> 18-Oct-2026
+        counts = RedisHelper.get_counts(tweets, 'likes_count')
+        self.assertEqual(counts, {tweets[0].id: 4, tweets[1].id: 0})
+        self.assertEqual(RedisHelper.get_counts([], 'likes_count'), {})
+
+    def test_identity_map(self):
+        user = self.create_user('lbj23')
+        tweet = self.create_tweet(user, 'I am the King!')
+
+        # not in a request, every call gets a new copy  <Wayne Shih> 18-Oct-2026
+        cached_tweet = MemcachedHelper.get_object_through_cache(Tweet, tweet.id)
+        self.assertEqual(cached_tweet, tweet)
+        self.assertEqual(
+            MemcachedHelper.get_object_through_cache(Tweet, tweet.id) is cached_tweet,
+            False,
+        )
+
+        IdentityMap.activate()
+        try:
+            # in a request, the same object is returned  <Wayne Shih> 18-Oct-2026
+            cached_tweet = MemcachedHelper.get_object_through_cache(Tweet, tweet.id)
+            self.assertEqual(
+                MemcachedHelper.get_object_through_cache(Tweet, tweet.id) is cached_tweet,
+                True,
+            )
+            self.assertEqual(
+                MemcachedHelper.get_objects_through_cache(Tweet, [tweet.id])[0] is cached_tweet,
+                True,
+            )
+            profile = UserService.get_profile_through_cache(user.id)
+            self.assertEqual(UserService.get_profile_through_cache(user.id) is profile, True)
+            self.assertEqual(UserService.get_profiles_through_cache([user.id]), {user.id: profile})
+
+            # invalidated when saved  <Wayne Shih> 18-Oct-2026
+            tweet.content = 'Taco Tuesday!'
+            tweet.save()
+            profile.nickname = 'King James'
+            profile.save()
+            cached_tweet = MemcachedHelper.get_object_through_cache(Tweet, tweet.id)
+            self.assertEqual(cached_tweet.content, 'Taco Tuesday!')
+            self.assertEqual(UserService.get_profile_through_cache(user.id).nickname, 'King James')
+        finally:
+            IdentityMap.deactivate()
+
+        self.assertEqual(IdentityMap.get(MemcachedHelper.get_key(Tweet, tweet.id)), None)
+
+    def test_prefetch_objects_through_cache(self):
+        lbj23 = self.create_user('lbj23')
+        kb24 = self.create_user('kobe24')
+        tweets = [self.create_tweet(user) for user in [lbj23, kb24, lbj23]]
+        tweets = list(Tweet.objects.filter(id__in=[tweet.id for tweet in tweets]))
+
+        users = MemcachedHelper.prefetch_objects_through_cache(tweets, User, 'user')
+        self.assertEqual(set(users), {lbj23, kb24})
+        for tweet in tweets:
+            self.assertEqual(tweet.cached_user, tweet.user)
+        # <Wayne Shih> 18-Oct-2026
+        # Tweets of the same user share the prefetched user
+        lbj23_tweets = [tweet for tweet in tweets if tweet.user_id == lbj23.id]
+        self.assertEqual(lbj23_tweets[0].cached_user is lbj23_tweets[1].cached_user, True)
+
+        # not prefetched, fetch one by one  <Wayne Shih> 18-Oct-2026
+        tweet = Tweet.objects.get(id=tweets[0].id)
+        self.assertEqual(tweet.cached_user, tweets[0].user)
+        self.assertEqual(tweet.cached_user is tweets[0].cached_user, False)
+
+    def test_single_flight_refill(self):
+        user = self.create_user('lbj23')
+        tweets = [self.create_tweet(user, f'tweet - {i}') for i in range(2)]
+        tweets = tweets[::-1]
+        conn = RedisClient.get_connection()
+        key = USER_TWEETS_PATTERN.format(user_id=user.id)
+        count_key = f'Tweet:{tweets[0].id}:likes_count'
+        RedisClient.clear()
+
+        # <Wayne Shih> 18-Oct-2026
+        # Someone else is refilling, so read from db without caching after waiting
+        conn.set(f'{key}:refill_lock', 'someone else')
+        conn.set(f'{count_key}:refill_lock', 'someone else')
+        with self.settings(REDIS_REFILL_WAIT_TIME=0.05):
+            self.assertEqual(TweetService.get_cached_tweets(user.id), tweets)
+            self.assertEqual(RedisHelper.get_count(tweets[0], 'likes_count'), 0)
+        self.assertEqual(conn.exists(key), False)
+        self.assertEqual(conn.exists(count_key), False)
+
+        # refill once the lock is released  <Wayne Shih> 18-Oct-2026
+        conn.delete(f'{key}:refill_lock', f'{count_key}:refill_lock')
+        self.assertEqual(TweetService.get_cached_tweets(user.id), tweets)
+        self.assertEqual(RedisHelper.get_count(tweets[0], 'likes_count'), 0)
+        self.assertEqual(conn.llen(key), 2)
+        self.assertEqual(conn.get(count_key), b'0')
+        self.assertEqual(conn.exists(f'{key}:refill_lock'), False)
+        self.assertEqual(conn.exists(f'{count_key}:refill_lock'), False)
+
+    def test_get_cached_objects_many(self):
+        user = self.create_user('lbj23')
+        tweets = [self.create_tweet(user, f'tweet - {i}') for i in range(2)][::-1]
+        key = USER_TWEETS_PATTERN.format(user_id=user.id)
+        missing_key = USER_TWEETS_PATTERN.format(user_id=0)
+        for sorted_set in (False, True):
+            RedisClient.clear()
+            with self.settings(REDIS_TIMELINE_SORTED_SET=sorted_set):
+                # <Wayne Shih> 18-Oct-2026
+                # Missing keys are None and never refilled, cached ones are newest first
+                self.assertEqual(
+                    RedisHelper.get_cached_objects_many([key, missing_key]),
+                    {key: None, missing_key: None},
+                )
+                TweetService.get_cached_tweets(user.id)
+                cached_objects = RedisHelper.get_cached_objects_many([key, missing_key])
+                self.assertEqual(
+                    [tweet.id for tweet in cached_objects[key]],
+                    [tweet.id for tweet in tweets],
+                )
+                self.assertEqual(cached_objects[missing_key], None)
+
+    def test_compact_model_serializer(self):
+        user = self.create_user('lbj23')
+        tweet = self.create_tweet(user, 'I am the King!')
+        serialized_tweet = CompactModelSerializer.serialize(tweet)
+        self.assertEqual(serialized_tweet.startswith(CompactModelSerializer.PREFIX), True)
+        self.assertEqual(CompactModelSerializer.serialize(None), None)
+        self.assertEqual(CompactModelSerializer.deserialize(None), None)
+
+        cached_tweet = CompactModelSerializer.deserialize(serialized_tweet)
+        self.assertEqual(cached_tweet, tweet)
+        for attr in ('user_id', 'content', 'created_at', 'likes_count', 'comments_count'):
+            self.assertEqual(getattr(cached_tweet, attr), getattr(tweet, attr))
+
+        # cached before the model changed  <Wayne Shih> 18-Oct-2026
+        label, _, *values = pickle.loads(serialized_tweet[len(CompactModelSerializer.PREFIX):])
+        stale_data = CompactModelSerializer.PREFIX + pickle.dumps((label, -1, *values))
+        self.assertEqual(
+            CompactModelSerializer.deserialize(stale_data),
+            ObjectRef(tweet.id, tweet.created_at),
+        )
+
+        # timelines cached by the configured serializer  <Wayne Shih> 18-Oct-2026
+        compact_serializer = 'utils.caches.redis_serializers.CompactModelSerializer'
+        with self.settings(REDIS_MODEL_SERIALIZER=compact_serializer):
+            RedisClient.clear()
+            TweetService.get_cached_tweets(user.id)
+            cached_tweets = TweetService.get_cached_tweets(user.id)
+            self.assertEqual(cached_tweets, [tweet])
+            self.assertEqual(cached_tweets[0].content, 'I am the King!')
+            key = USER_TWEETS_PATTERN.format(user_id=user.id)
+            conn = RedisClient.get_connection()
+            self.assertEqual(conn.lindex(key, 0), serialized_tweet)
+
+    def test_id_sorted_set(self):
+        conn = RedisClient.get_connection()
+        key = 'test_id_sorted_set'
+
+        # empty set is still cached  <Wayne Shih> 18-Oct-2026
+        self.assertEqual(RedisHelper.load_id_sorted_set(key, lambda: []), True)
+        self.assertEqual(conn.exists(key), True)
+        self.assertEqual(list(RedisHelper.iter_ids_in_sorted_set(key, 2)), [])
+        self.assertEqual(RedisHelper.get_ids_in_sorted_set(key, [1, 2]), set())
+
+        # <Wayne Shih> 18-Oct-2026
+        # get_ids_and_scores() is not called once the set is cached
+        RedisHelper.add_id_to_cached_sorted_set(key, 1, 100)
+        self.assertEqual(RedisHelper.load_id_sorted_set(key, lambda: [(2, 200)]), True)
+        self.assertEqual(RedisHelper.get_ids_in_sorted_set(key, [1, 2]), {1})
+
+        # ids of the same score are never split into batches  <Wayne Shih> 18-Oct-2026
+        for object_id in range(2, 6):
+            RedisHelper.add_id_to_cached_sorted_set(key, object_id, 200)
+        RedisHelper.add_id_to_cached_sorted_set(key, 6, 300)
+        self.assertEqual(
+            list(RedisHelper.iter_ids_in_sorted_set(key, 2)),
+            [[1, 2, 3, 4, 5], [6]],
+        )
+        self.assertEqual(list(RedisHelper.iter_ids_in_sorted_set(key, 100)), [[1, 2, 3, 4, 5, 6]])
+        RedisHelper.remove_id_from_sorted_set(key, 3)
+        self.assertEqual(RedisHelper.get_ids_in_sorted_set(key, [3, 4, 7]), {4})
+
+        # nothing is added to a set which is not cached  <Wayne Shih> 18-Oct-2026
+        conn.delete(key)
+        RedisHelper.add_id_to_cached_sorted_set(key, 1, 100)
+        self.assertEqual(conn.exists(key), False)
+        ids_and_scores = [(object_id, object_id) for object_id in range(1, 2500)]
+        self.assertEqual(RedisHelper.load_id_sorted_set(key, lambda: ids_and_scores), True)
+        self.assertEqual(conn.zcard(key), 2500)
+        self.assertEqual(conn.keys(f'{key}:*'), [])
+
+        # <Wayne Shih> 18-Oct-2026
+        # A loader which has lost the lock to another loader never renames its partial set
+        conn.delete(key)
+
+        def ids_and_scores_taken_over():
+            for object_id in range(1, 2500):
+                if object_id == 1500:
+                    conn.set(f'{key}:refill_lock', 'someone else')
+                yield object_id, object_id
+
+        self.assertEqual(
+            RedisHelper.load_id_sorted_set(key, ids_and_scores_taken_over),
+            False,
+        )
+        self.assertEqual(conn.keys(f'{key}:*'), [f'{key}:refill_lock'.encode()])
+
+    def test_local_cache(self):
+        lbj23 = self.create_user('lbj23')
+        kd35 = self.create_user('kd35')
+        curry30 = self.create_user('curry30')
+        lbj23_key = MemcachedHelper.get_key(User, lbj23.id)
+        self.clear_cache()
+
+        with self.settings(LOCAL_CACHE_ENABLED=True, LOCAL_CACHE_MAX_ENTRIES=2):
+            # test miss, then hit without memcached  <Wayne Shih> 18-Oct-2026
+            user = MemcachedHelper.get_object_through_cache(User, lbj23.id)
+            self.assertEqual(LocalCache.get_stats()['misses'], 1)
+            cache.delete(MemcachedHelper.get_versioned_key(lbj23_key))
+            cached_user = MemcachedHelper.get_object_through_cache(User, lbj23.id)
+            self.assertEqual(cached_user, user)
+            self.assertEqual(cached_user is user, False)
+            self.assertEqual(LocalCache.get_stats()['hits'], 1)
+
+            # models without TTL are not cached  <Wayne Shih> 18-Oct-2026
+            with self.settings(LOCAL_CACHE_TTLS={'tweet': 10}):
+                MemcachedHelper.get_object_through_cache(User, lbj23.id)
+            self.assertEqual(LocalCache.get_stats()['hits'], 1)
+
+            # least recently used entries are evicted  <Wayne Shih> 18-Oct-2026
+            MemcachedHelper.get_objects_through_cache(User, [kd35.id, curry30.id])
+            stats = LocalCache.get_stats()
+            self.assertEqual(stats['entries'], 2)
+            self.assertEqual(stats['bytes'] > 0, True)
+            self.assertEqual(LocalCache.get(lbj23_key), None)
+            self.assertEqual(LocalCache.get(MemcachedHelper.get_key(User, curry30.id)), curry30)
+
+            # entries are bounded by bytes  <Wayne Shih> 18-Oct-2026
+            with self.settings(LOCAL_CACHE_MAX_BYTES=stats['bytes'] * 3 // 4):
+                LocalCache.set(lbj23_key, lbj23)
+                self.assertEqual(LocalCache.get_stats()['entries'], 1)
+
+            # entries expire  <Wayne Shih> 18-Oct-2026
+            LocalCache.set(lbj23_key, lbj23)
+            expired_at = time.monotonic() + settings.LOCAL_CACHE_TTLS['user']
+            with mock.patch('utils.caches.local_cache.time.monotonic', return_value=expired_at):
+                self.assertEqual(LocalCache.get(lbj23_key), None)
+
+            # invalidation is published to other processes  <Wayne Shih> 18-Oct-2026
+            pubsub = RedisClient.get_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(LOCAL_CACHE_INVALIDATION_CHANNEL)
+            LocalCache.set(lbj23_key, lbj23)
+            lbj23.save()
+            self.assertEqual(LocalCache.get(lbj23_key), None)
+            messages = [pubsub.get_message(timeout=0.1) for _ in range(3)]
+            message = next(message for message in messages if message is not None)
+            self.assertEqual(message['data'], lbj23_key.encode())
+            pubsub.close()
+
+            # and dropped by their invalidation listeners  <Wayne Shih> 18-Oct-2026
+            LocalCache.set(lbj23_key, lbj23)
+            LocalCache._handle_invalidation(message)
+            self.assertEqual(LocalCache.get(lbj23_key), None)
+
+            # profiles are cached as well  <Wayne Shih> 18-Oct-2026
+            profile = UserService.get_profile_through_cache(lbj23.id)
+            profile_key = f'user_profile:{lbj23.id}'
+            self.assertEqual(LocalCache.get(profile_key), profile)
+            profile.nickname = 'King James'
+            profile.save()
+            self.assertEqual(LocalCache.get(profile_key), None)
+
+        # disabled by default  <Wayne Shih> 18-Oct-2026
+        LocalCache.clear()
+        MemcachedHelper.get_object_through_cache(User, lbj23.id)
+        self.assertEqual(LocalCache.get_stats(), {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0})
+
+    def test_versioned_keys(self):
+        user = self.create_user('lbj23')
+        key = MemcachedHelper.get_key(User, user.id)
+        versioned_key = MemcachedHelper.get_versioned_key(key)
+        self.assertEqual(versioned_key.startswith(f'{key}:v'), True)
+        self.assertEqual(MemcachedHelper.get_versioned_key(key), versioned_key)
+
+        # <Wayne Shih> 18-Oct-2026
+        # A reader racing with a writer only writes the old object back under the old version
+        old_user = MemcachedHelper.get_object_through_cache(User, user.id)
+        user.username = 'king_james'
+        user.save()
+        cache.set(versioned_key, old_user)
+        new_versioned_key = MemcachedHelper.get_versioned_key(key)
+        self.assertEqual(new_versioned_key != versioned_key, True)
+        cached_user = MemcachedHelper.get_object_through_cache(User, user.id)
+        self.assertEqual(cached_user.username, 'king_james')
+
+        # an evicted version never goes back to old versions  <Wayne Shih> 18-Oct-2026
+        cache.delete(f'{key}:version')
+        self.assertEqual(
+            MemcachedHelper.get_versioned_key(key) in (versioned_key, new_versioned_key),
+            False,
+        )
+        cached_user = MemcachedHelper.get_object_through_cache(User, user.id)
+        self.assertEqual(cached_user.username, 'king_james')
+
+        # missing versions are created in one batch  <Wayne Shih> 18-Oct-2026
+        keys = [MemcachedHelper.get_key(Tweet, tweet_id) for tweet_id in range(3)]
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as mock_set_many:
+            versioned_keys = MemcachedHelper.get_versioned_keys(keys)
+            self.assertEqual(mock_set_many.call_count, 1)
+            self.assertEqual(MemcachedHelper.get_versioned_keys(keys), versioned_keys)
+            self.assertEqual(mock_set_many.call_count, 1)
+
+    def test_write_behind_counts(self):
+        lbj23 = self.create_user('lbj23')
+        tweet = self.create_tweet(lbj23, 'I am coming home!!')
+        users = [self.create_user(f'user:{i}') for i in range(3)]
+        conn = RedisClient.get_connection()
+        count_key = f'Tweet:{tweet.id}:likes_count'
+
+        with self.settings(COUNTS_WRITE_BEHIND=True):
+            self.assertEqual(RedisHelper.get_count(tweet, 'likes_count'), 0)
+            likes = [self.create_like(user, tweet) for user in users]
+            self.create_comment(users[0], tweet)
+
+            # counts are changed in redis only  <Wayne Shih> 18-Oct-2026
+            self.assertEqual(RedisHelper.get_count(tweet, 'likes_count'), 3)
+            self.assertEqual(RedisHelper.get_count(tweet, 'comments_count'), 1)
+            tweet.refresh_from_db()
+            self.assertEqual((tweet.likes_count, tweet.comments_count), (0, 0))
+
+            # counts refilled from db add deltas pending  <Wayne Shih> 18-Oct-2026
+            likes[0].delete()
+            conn.delete(count_key)
+            self.assertEqual(RedisHelper.get_count(tweet, 'likes_count'), 2)
+            conn.delete(count_key)
+            self.assertEqual(RedisHelper.get_counts([tweet], 'likes_count'), {tweet.id: 2})
+
+        # <Wayne Shih> 18-Oct-2026
+        # Deltas are flushed even if write-behind mode is turned off
+        msg = flush_count_deltas_task()
+        self.assertEqual(msg, 'Counts of 2 objects flushed.')
+        tweet.refresh_from_db()
+        self.assertEqual((tweet.likes_count, tweet.comments_count), (2, 1))
+        conn.delete(count_key)
+        self.assertEqual(RedisHelper.get_count(tweet, 'likes_count'), 2)
+        self.assertEqual(flush_count_deltas_task(), 'Counts of 0 objects flushed.')
+
+        # deltas left by a failed flush are flushed first  <Wayne Shih> 18-Oct-2026
+        conn.hset('Tweet:likes_count:deltas:flushing', tweet.id, 3)
+        conn.hset('Tweet:likes_count:deltas', tweet.id, 5)
+        self.assertEqual(RedisHelper.flush_count_deltas(Tweet, 'likes_count'), 1)
+        tweet.refresh_from_db()
+        self.assertEqual(tweet.likes_count, 5)
+        self.assertEqual(RedisHelper.flush_count_deltas(Tweet, 'likes_count'), 1)
+        tweet.refresh_from_db()
+        self.assertEqual(tweet.likes_count, 10)
@@ -0,0 +1,49 @@
+# =================================================================================================
+#                                  All Rights Reserved.
+# =================================================================================================
+# File description:
+#       Custom middlewares
+#
+#       Ref: https://docs.djangoproject.com/en/3.1/topics/http/middleware/#writing-your-own-middleware
+#
+# =================================================================================================
+#    Date      Name                    Description of Change
+# 18-Oct-2026  Wayne Shih              Initial create
+# 18-Oct-2026  Wayne Shih              Add LastActivityMiddleware
+# $HISTORY$
+# =================================================================================================
+
+
+from accounts.services import UserService
+from utils.caches.identity_map import IdentityMap
+
+
+class IdentityMapMiddleware(object):
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        IdentityMap.activate()
+        try:
+            return self.get_response(request)
+        finally:
+            # <Wayne Shih> 18-Oct-2026
+            # Never leak objects to the next request handled by the same thread
+            IdentityMap.deactivate()
+
+
+class LastActivityMiddleware(object):
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # <Wayne Shih> 18-Oct-2026
+        # Check the user after the response, since DRF sets the user it authenticates back to
+        # the django request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            UserService.touch_last_activity(user.id)
+        return response
@@ -14,19 +14,64 @@
 # 29-Apr-2022  Wayne Shih              React to deprecating keys in tweets and newsfeeds list api
 # 29-May-2022  Wayne Shih              Make paginate_queryset() compatible with list
 # 05-Jun-2022  Wayne Shih              React to only caching REDIS_LIST_SIZE_LIMIT in redis
+# 18-Oct-2026  Wayne Shih              Paginate timelines cached in sorted sets by range
+# 18-Oct-2026  Wayne Shih              Find cursors by bisect, add cursors with id tie breaker
+# 18-Oct-2026  Wayne Shih              Add paginate_querysets()
+# 18-Oct-2026  Wayne Shih              Reject malformed cursors with 400
+# 18-Oct-2026  Wayne Shih              Build next link from the last object paginated
 # $HISTORY$
 # =================================================================================================
 
 
+import bisect
+import heapq
+
 from dateutil import parser
 
 from django.conf import settings
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
 from rest_framework.pagination import BasePagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.utils.urls import replace_query_param
 
+from utils.caches.redis_helpers import SortedSetTimeline, get_timeline_sort_key
+from utils.time_helpers import datetime_to_timestamp_us, timestamp_us_to_datetime
+
+
+# <Wayne Shih> 18-Oct-2026
+# A cursor is '{created_at in microseconds}_{id}', e.g. '1652435335928339_42', where the id
+# breaks ties of objects created in the same microsecond. It is cheaper to parse than an ISO
+# datetime. Cursors of objects without id only have the created_at part.
+def format_cursor(obj):
+    timestamp_us = datetime_to_timestamp_us(obj.created_at)
+    if obj.id is None:
+        return str(timestamp_us)
+    return f'{timestamp_us}_{obj.id}'
+
+
+def parse_cursor(cursor: str):
+    timestamp_us, _, object_id = cursor.partition('_')
+    return int(timestamp_us), int(object_id) if object_id else None
+
+
+class _SortKeys(object):
+    # <Wayne Shih> 18-Oct-2026
+    # Read-only sequence of get_timeline_sort_key() of a timeline for bisect, where keys are only
+    # computed for the O(log(n)) entries bisect looks at.
+    # - https://docs.python.org/3/library/bisect.html
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+
+    def __len__(self):
+        return len(self.timeline)
+
+    def __getitem__(self, index):
+        return get_timeline_sort_key(self.timeline[index])
+
 
 class EndlessPagination(BasePagination):
     page_size = 20 if not settings.TESTING else 10
@@ -37,43 +82,81 @@ class EndlessPagination(BasePagination):
         super().__init__()
         self.request = None
         self.has_next = False
+        self.cursor__gt = None
+        self.cursor__lt = None
+        self.last_object = None
+
+    def _get_cursor(self, lookup):
+        # <Wayne Shih> 18-Oct-2026
+        # created_at__gt/created_at__lt in ISO format are still accepted for old clients.
+        # A malformed cursor is a bad request rather than a server error.
+        query_params = self.request.query_params
+        for param in (f'cursor__{lookup}', f'created_at__{lookup}'):
+            if param not in query_params:
+                continue
+            try:
+                if param.startswith('cursor'):
+                    cursor = parse_cursor(query_params[param])
+                else:
+                    created_at = parser.isoparse(query_params[param])
+                    cursor = datetime_to_timestamp_us(created_at), None
+                timestamp_us_to_datetime(cursor[0])
+            except (ValueError, OverflowError) as e:
+                raise ValidationError({param: 'invalid cursor.'}) from e
+            return cursor
+        return None
 
     def _paginate_list(self, reversed_ordered_list: list):
-        if 'created_at__gt' in self.request.query_params:
-            created_at__gt = parser.isoparse(self.request.query_params['created_at__gt'])
-            objects = []
-            for index, obj in enumerate(reversed_ordered_list):
-                if obj.created_at > created_at__gt:
-                    objects.append(obj)
-                else:
-                    break
+        # <Wayne Shih> 18-Oct-2026
+        # Find the cursor by binary search on (created_at, id), since the list is ordered by
+        # get_timeline_sort_key(). float('inf') makes a cursor without id compare created_at only.
+        sort_keys = _SortKeys(reversed_ordered_list)
+        if self.cursor__gt is not None:
+            timestamp_us, object_id = self.cursor__gt
+            key = (-timestamp_us, float('-inf') if object_id is None else -object_id)
             self.has_next = False
-            return objects
+            return reversed_ordered_list[:bisect.bisect_left(sort_keys, key)]
 
         index = 0
-        if 'created_at__lt' in self.request.query_params:
-            created_at__lt = parser.isoparse(self.request.query_params['created_at__lt'])
-            for index, obj in enumerate(reversed_ordered_list):
-                if obj.created_at < created_at__lt:
-                    break
-            else:
-                self.has_next = False
-                return []
+        if self.cursor__lt is not None:
+            timestamp_us, object_id = self.cursor__lt
+            key = (-timestamp_us, float('inf') if object_id is None else -object_id)
+            index = bisect.bisect_right(sort_keys, key)
 
         objects = reversed_ordered_list[index:index + self.page_size + 1]
         self.has_next = (len(objects) > self.page_size)
         return objects[:self.page_size]
 
+    def _paginate_sorted_set(self, timeline: SortedSetTimeline):
+        # <Wayne Shih> 18-Oct-2026
+        # Same as _paginate_list() but only the requested page is read from redis
+        if self.cursor__gt is not None:
+            self.has_next = False
+            return timeline.get_newer(*self.cursor__gt)
+
+        if self.cursor__lt is None:
+            objects = timeline.get_older(limit=self.page_size + 1)
+        else:
+            objects = timeline.get_older(*self.cursor__lt, limit=self.page_size + 1)
+        self.has_next = (len(objects) > self.page_size)
+        return objects[:self.page_size]
+
     def _set_up_attrs(self, request: Request):
         self.request = request
         self.page_size = int(request.query_params.get('page_size', self.page_size))
         if self.page_size > self.max_page_size:
             self.page_size = self.max_page_size
+        self.cursor__gt = self._get_cursor('gt')
+        self.cursor__lt = self._get_cursor('lt')
 
     def paginate_cached_list(self, cached_list: list, request: Request):
         self._set_up_attrs(request)
-        paginated_list = self._paginate_list(cached_list)
-        if 'created_at__gt' in self.request.query_params:
+        if isinstance(cached_list, SortedSetTimeline):
+            paginated_list = self._paginate_sorted_set(cached_list)
+        else:
+            paginated_list = self._paginate_list(cached_list)
+        self.last_object = paginated_list[-1] if paginated_list else None
+        if self.cursor__gt is not None:
             return paginated_list
 
         if self.has_next:
@@ -82,7 +165,22 @@ class EndlessPagination(BasePagination):
             return paginated_list
         return None
 
+    def _get_cursor_filter(self, lookup, cursor):
+        timestamp_us, object_id = cursor
+        created_at = timestamp_us_to_datetime(timestamp_us)
+        cursor_filter = Q(**{f'created_at__{lookup}': created_at})
+        if object_id is not None:
+            cursor_filter |= Q(created_at=created_at, **{f'id__{lookup}': object_id})
+        return cursor_filter
+
     def paginate_queryset(self, queryset: QuerySet, request: Request, view=None):
+        return self.paginate_querysets([queryset], request)
+
+    def paginate_querysets(self, querysets: list, request: Request):
+        # <Wayne Shih> 18-Oct-2026
+        # Querysets are paginated by the same cursor and merged by (created_at, id), e.g.
+        # newsfeeds in db and tweets of pull mode followings. Each queryset is read at most a
+        # page, which is enough for the merged page.
         self._set_up_attrs(request)
 
         # <Wayne Shih> 08-Apr-2022
@@ -92,26 +190,39 @@ class EndlessPagination(BasePagination):
         #   In the future, this needs to be enhanced by pagination.
         #   Also, if 'created_at__gt' is too old, say over 7 days, then discard 'created_at__gt'
         #   and load the latest page.
-        if 'created_at__gt' in request.query_params:
-            created_at__gt = request.query_params['created_at__gt']
-            queryset = queryset.filter(created_at__gt=created_at__gt).order_by('-created_at')
+        pages = []
+        for queryset in querysets:
+            if self.cursor__gt is not None:
+                queryset = queryset.filter(self._get_cursor_filter('gt', self.cursor__gt))\
+                    .order_by('-created_at', '-id')
+                pages.append(list(queryset))
+                continue
+
+            if self.cursor__lt is not None:
+                queryset = queryset.filter(self._get_cursor_filter('lt', self.cursor__lt))
+            pages.append(list(queryset.order_by('-created_at', '-id')[:self.page_size + 1]))
+
+        objects = list(heapq.merge(*pages, key=get_timeline_sort_key))
+        if self.cursor__gt is not None:
             self.has_next = False
-            return list(queryset)
-
-        if 'created_at__lt' in request.query_params:
-            created_at__lt = request.query_params['created_at__lt']
-            queryset = queryset.filter(created_at__lt=created_at__lt)
-
-        queryset = queryset.order_by('-created_at')[:self.page_size + 1]
-        self.has_next = (len(queryset) > self.page_size)
-        return list(queryset[:self.page_size])
+        else:
+            self.has_next = (len(objects) > self.page_size)
+            objects = objects[:self.page_size]
+        self.last_object = objects[-1] if objects else None
+        return objects
 
     def _get_next_link(self, data):
         if not self.has_next:
             return None
+        # <Wayne Shih> 18-Oct-2026
+        # The cursor is of the last object paginated rather than serialized, since serializers
+        # might skip objects, e.g. newsfeeds of deleted tweets, even all objects of a page.
         url = self.request.build_absolute_uri()
-        created_at__lt = data[-1]['created_at']
-        return replace_query_param(url, 'created_at__lt', created_at__lt)
+        created_at__lt = DateTimeField().to_representation(self.last_object.created_at)
+        url = replace_query_param(url, 'created_at__lt', created_at__lt)
+        # <Wayne Shih> 18-Oct-2026
+        # cursor__lt takes precedence over created_at__lt, which is kept for old clients
+        return replace_query_param(url, 'cursor__lt', format_cursor(self.last_object))
 
     # <Wayne Shih> 02-Apr-2022
     # https://www.django-rest-framework.org/api-guide/pagination/#modifying-the-pagination-style
@@ -8,11 +8,26 @@
 #    Date      Name                    Description of Change
 # 30-Aug-2021  Wayne Shih              Initial create
 # 10-Oct-2021  Wayne Shih              React to pylint checks
+# 18-Oct-2026  Wayne Shih              Add datetime and timestamp in microseconds conversions
 # $HISTORY$
 # =================================================================================================
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 def utc_now():
     return datetime.now(timezone.utc)
+
+
+# <Wayne Shih> 18-Oct-2026
+# Use integer arithmetic instead of datetime.timestamp() to keep microsecond-precision.
+def datetime_to_timestamp_us(dt: datetime):
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds
+
+
+def timestamp_us_to_datetime(timestamp_us: int):
+    return EPOCH + timedelta(microseconds=timestamp_us)